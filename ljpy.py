@@ -47,21 +47,47 @@ An example could be MCN500T85R9.output
 The structure of the input file is a keyword followed by another entry or
 multiple entries. An example input file is included with the program. Please
 also refer to the included documentation.
+
+A report of how the pair loops scale with the number of threads for the
+system in an input file is written with the following command.
+
+  python ljpy.py scaling <inputfile> <reportfile>
+
+A sweep over many state points, such as a grid of temperatures and 
+densities, is run on a pool of worker processes with the following command.
+The manifest file lists the keywords that change from point to point (see
+src/sweep.py) and the averages of every point are written to the summary 
+file.
+
+  python ljpy.py sweep <baseinputfile> <manifestfile> <summaryfile>
+
+The samples of the potential energy and virial recorded by MC simulations
+(keyword reweight) are reweighted to predict the averages over a range of
+temperatures (see src/reweight.py) with the following command. Samples from
+simulations at several temperatures are combined.
+
+  python ljpy.py reweight <Tmin> <Tmax> <nT> <reportfile> <samplefile> ...
+
+The compiled kernels are saved in a cache and loaded by later runs. The cache
+is filled ahead of time, for example after installing or changing ljpy, with
+the following command.
+
+  python ljpy.py precompile
 """
 
 # Import relevant libraries
 #import numpy as np
-import sys, random, time
+import sys
 from datetime import datetime
 #import numpy as np
-#from ljpyclasses import simulation, site, props
-#from src.ljpyclasses import site
-from src.read_input import readinput
-from src.initialize_positions import initializepositions
-from src.initialize_files import initializefiles
-from src.initialize_velocities import initializevelocities
-from src.nvemd import nvemd
-from src.nvtmc import nvtmc
+#from ljpyclasses import simulation, particles, props
+#from src.ljpyclasses import particles
+from src.simulate import simulate
+from src.scaling import scalingreport
+from src.sweep import sweep
+from src.reweight import reweightreport
+from src.precompile import precompile
+from src.jit_cache import compiletimer
 
 # ========================================================================= #
 # Initialize the timer.                                                     #
@@ -74,63 +100,86 @@ from src.nvtmc import nvtmc
 start_time=datetime.now()
         
 # ========================================================================= #
-# Check the command line arguments for the input and output file names.     #
+# Fill the cache of compiled kernels instead of running a simulation.       #
 # ========================================================================= #
-if len(sys.argv) != 3:
-    print("This program requires two command line arguments: the path to",
-          "the input file\nand the path to the output file.\n")
-    sys.exit("Error: Invalid or missing command line arguments.")
+if len(sys.argv) == 2 and sys.argv[1] == "precompile":
+    precompile()
+    sys.exit()
 
 # ========================================================================= #
-# Read the input file and store the simulation parameters to an object.     #
-# ========================================================================= #
-sim=readinput(sys.argv)
+# Reweight the samples of MC simulations instead of running a simulation.   #
+# ========================================================================= #
+if len(sys.argv) >= 7 and sys.argv[1] == "reweight":
+    try:
+        Tmin, Tmax, nT = float(sys.argv[2]), float(sys.argv[3]), \
+                         int(sys.argv[4])
+    except ValueError:
+        sys.exit("The temperatures and number of temperatures for " +
+                 "reweighting are not valid numbers.\n")
+    if not 0.0 < Tmin <= Tmax or nT < 1:
+        sys.exit("The temperatures for reweighting must be greater than " +
+                 "zero and increasing.\n")
+    reweightreport(Tmin, Tmax, nT, sys.argv[5], sys.argv[6:])
+    sys.exit()
 
 # ========================================================================= #
-# Initialize the random number generator (rng).                             #
+# Start measuring the time spent compiling kernels. The cache of compiled   #
+# kernels for the current source was chosen when src was imported.         #
 # ========================================================================= #
-# Use the seed specified in the input file. Otherwise, get the seed from
-# the system clock.
-# Note: The current state of the rng is saved so that it can be passed
-# to functions that use random numbers. The purpose of passing the state
-# back and forth between functions that use random numbers is to always get
-# the same sequence of random numbers for a given seed value.
-if sim.seedkeyvalue == "generate":
-    sim.seed=-1*int(time.time()) # make a seed from the system clock
-random.seed(sim.seed) # initialize the rng
+timer=compiletimer()
 
 # ========================================================================= #
-# Initialize or read in positions.                                          #
+# Write the thread scaling report instead of running a simulation.          #
 # ========================================================================= #
-atom=initializepositions(sim)
+if len(sys.argv) == 4 and sys.argv[1] == "scaling":
+    scalingreport(sys.argv[2], sys.argv[3])
+    sys.exit()
 
 # ========================================================================= #
-# Initialize or read in velocities for an md simulation.                    #
-# Note: randstate is updated by initializevelocities.                       #
+# Run a sweep over many state points instead of one simulation.             #
 # ========================================================================= #
-if sim.method == "md": initializevelocities(sim, atom)
+if len(sys.argv) == 5 and sys.argv[1] == "sweep":
+    sweep(sys.argv[2], sys.argv[3], sys.argv[4])
+    sys.exit()
 
 # ========================================================================= #
-# Initialize the output files.                                              #
+# Check the command line arguments for the input and output file names.     #
 # ========================================================================= #
-initializefiles(sim, atom)
-print("Initialization Complete\n")
+if len(sys.argv) != 3:
+    print("This program requires two command line arguments: the path to",
+          "the input file\nand the path to the output file.\n")
+    sys.exit("Error: Invalid or missing command line arguments.")
 
 # ========================================================================= #
-# Call the driver for the md or mc simulation.                              #
+# Run the simulation. The input file is read, the positions, velocities,    #
+# and output files are initialized (or restored from a checkpoint), and the #
+# driver for the md, mc, or parallel tempering mc simulation is called (see #
+# src/simulate.py, which is also used by the points of a sweep).            #
 # ========================================================================= #
-if sim.method == "md": nvemd(sim,atom)
-else: nvtmc(sim,atom)
+sim=simulate(sys.argv)
   
 # ========================================================================= #
 # Calculate the wall time and finalize the simulation.                      #
 # ========================================================================= #
+# A warm start loads the kernels from the cache and a cold start compiles 
+# them. Both compile the constructors of the classes and the fields used 
+# from python, which numba can not cache, so the compile time is split into
+# the time for the kernels and the time for the classes.
 end_time=datetime.now()    
+timer.stop()
+tcompile=timer.duration
+start_type="warm (kernels loaded from cache, classes compiled)" \
+           if timer.warm() else "cold (kernels and classes compiled)"
 fp=open(sim.outputfile, "a")
 fp.write("\nTotal Wall Time (h:mm:ss): {}\n".format((end_time - start_time)))
+fp.write("Start:                      {}\n".format(start_type))
+fp.write("Compile Time (s):           {:.2f}\n".format(tcompile))
+fp.write("  Kernels (s):              {:.2f}\n".format(timer.kernels()))
+fp.write("  Classes (s):              {:.2f}\n".format(timer.classes))
+fp.write("Wall Time Less Compile (s): {:.2f}\n".format(
+         (end_time - start_time).total_seconds() - tcompile))
 fp.close()
 print("Total Wall Time: {} (hh:mm:ss)\n".format((end_time - start_time) / \
          1.0))
-    
-
-                    
\ No newline at end of file
+print("Compile Time: {:.2f} s ({:.2f} s kernels, {:.2f} s classes), {} "
+      "start\n".format(tcompile, timer.kernels(), timer.classes, start_type))
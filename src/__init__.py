@@ -0,0 +1,4 @@
+# The cached kernels are kept in a directory for the current source files
+# (see src/jit_cache.py), which must be chosen before any kernel is defined.
+from src.jit_cache import checkcache
+checkcache()
@@ -27,24 +27,105 @@
 # ========================================================================= #
 
 """
-This module is part of ljpy. It has a function that calculates the 
-potential energy of each atom with each of its neighbors.  It is used in MC
+This module is part of ljpy. It has functions that calculate the 
+potential energy of each atom with each of its neighbors.  They are used in MC
 to calculate the difference in energies for use in the metropolis criterion.    
+
+When the MC cell list is used (cl.ncell is 3 or more), only the particles in
+the cell of a point and the 26 cells around it are visited, so the cost of a
+move does not grow with the number of particles. Otherwise all the particles
+are visited.
 """
 # Import relevant libraries
 import numpy as np
 from numba import njit
-# This functions take a simulation object, a list of site objects, the
-# particle that is moved, and the coordinates of the particle that is moved.
-# It calculate the potential energy of this particle with all the other 
-# particles in the system. This subroutine is called twice for one monte carlo
-# move. It returns the potential energy of the particle for the state
-# in atom.
-@njit
-def atomic_pe(sim, atom, particle):
+from src.cell_list import cell_index, cell_wrap
+from src.potential import pair_potential
+
+# This function is passed a simulation object, the potential table, the 
+# array of positions, the index of a site, and the x, y, and z coordinates
+# of a point. It returns the potential energy and virial of the site with
+# a particle at the point.
+@njit(cache=True)
+def pair_energy(sim, tab, r, i, x, y, z):
     # Variables
     hL=sim.length/2.0
     
+    dx=r[i,0]-x
+    dy=r[i,1]-y
+    dz=r[i,2]-z
+    
+    # Apply minimum image convection
+    if np.abs(dx)>hL:
+        if dx < 0.0: dx=dx+sim.length
+        else: dx=dx-sim.length
+    if np.abs(dy)>hL:
+        if dy < 0.0: dy=dy+sim.length
+        else: dy=dy-sim.length
+    if np.abs(dz)>hL:
+        if dz < 0.0: dz=dz+sim.length
+        else: dz=dz-sim.length
+    
+    # Distance and energy calculation        
+    dr=dx*dx+dy*dy+dz*dz
+    if dr<sim.rc2:
+        u, fr = pair_potential(sim, tab, dr)
+        return(u, dr*fr)
+    
+    return(0.0, 0.0)
+
+# This function is passed a simulation object, the potential table, the
+# array of positions, an MC cell list, the index of a site, and the x, y,
+# and z coordinates of a point. It returns the potential energy and virial
+# of a particle at the point with all the sites in the 27 cells around the
+# point except the given site.
+@njit(cache=True)
+def cell_energy(sim, tab, r, cl, particle, x, y, z):
+    # Variables
+    nc=cl.ncell
+    head=cl.head
+    nxt=cl.nxt
+    c=cell_index(nc, sim.length, x, y, z)
+    ix=c%nc
+    iy=(c//nc)%nc
+    iz=c//(nc*nc)
+    
+    # Zero out the accumulators
+    u=0.0
+    w=0.0
+    
+    # Loop around the cell and its neighbors
+    for dz in range(-1, 2):
+        for dy in range(-1, 2):
+            for dx in range(-1, 2):
+                i=head[cell_wrap(nc, ix+dx, iy+dy, iz+dz)]
+                while i >= 0:
+                    if i != particle: # exclude the particle from itself
+                        ui, wi = pair_energy(sim, tab, r, i, x, y, z)
+                        u+=ui
+                        w+=wi
+                    i=nxt[i]
+    
+    return(u, w)
+
+# This functions take a simulation object, a particles object, an MC cell
+# list, and the particle that is moved. It calculate the potential energy of this 
+# particle with all the other particles in the system. It returns the
+# potential energy of the particle for the state in atom.
+@njit(cache=True)
+def atomic_pe(sim, atom, cl, particle):
+    # Variables
+    r=atom.r
+    tab=sim.tab
+    x=r[particle,0]
+    y=r[particle,1]
+    z=r[particle,2]
+    
+    # Use the cell list if there is one
+    if cl.ncell >= 3:
+        u, w = cell_energy(sim, tab, r, cl, particle, x, y, z)
+        return(u)
+    
     # Zero out the potential energy accumulator
     u=0.0
     
@@ -52,28 +133,48 @@ def atomic_pe(sim, atom, particle):
     # energy.
     for i in range(sim.N):
         if particle != i: # exclude particle i from itself
-            dx=atom[i].x-atom[particle].x
-            dy=atom[i].y-atom[particle].y
-            dz=atom[i].z-atom[particle].z
-            
-            # Apply minimum image convection
-            if np.abs(dx)>hL:
-                if dx < 0.0: dx=dx+sim.length
-                else: dx=dx-sim.length
-            if np.abs(dy)>hL:
-                if dy < 0.0: dy=dy+sim.length
-                else: dy=dy-sim.length
-            if np.abs(dz)>hL:
-                if dz < 0.0: dz=dz+sim.length
-                else: dz=dz-sim.length
-            
-            # Distance and energy calculation        
-            dr=dx*dx+dy*dy+dz*dz
-            if dr<sim.rc2:
-                dr2=1.0/dr
-                dr4=dr2*dr2
-                dr6=dr4*dr2
-                dr12=dr6*dr6
-                u+=4.0*(dr12-dr6)
+            ui, wi = pair_energy(sim, tab, r, i, x, y, z)
+            u+=ui
                 
-    return(u)
\ No newline at end of file
+    return(u)
+
+# This functions take a simulation object, a particles object, an MC cell
+# list, the particle that is moved, and the proposed new coordinates of the
+# particle.
+# It calculates the potential energy and virial of the particle with all
+# the other particles at both its old (current) and new positions in a 
+# single loop over the other particles. It returns the old energy, the
+# new energy, the old virial, and the new virial.
+@njit(cache=True)
+def atomic_pe_move(sim, atom, cl, particle, xnew, ynew, znew):
+    # Variables
+    r=atom.r
+    tab=sim.tab
+    xold=r[particle,0]
+    yold=r[particle,1]
+    zold=r[particle,2]
+    
+    # Use the cell list if there is one. The old and new positions can be
+    # in different cells, so the cells around each are visited separately.
+    if cl.ncell >= 3:
+        uold, wold = cell_energy(sim, tab, r, cl, particle, xold, yold, zold)
+        unew, wnew = cell_energy(sim, tab, r, cl, particle, xnew, ynew, znew)
+        return(uold, unew, wold, wnew)
+    
+    # Zero out the accumulators
+    uold=0.0
+    unew=0.0
+    wold=0.0
+    wnew=0.0
+    
+    # Loop around the neighbors of the selected particle
+    for i in range(sim.N):
+        if particle != i: # exclude particle i from itself
+            u, w = pair_energy(sim, tab, r, i, xold, yold, zold)
+            uold+=u
+            wold+=w
+            u, w = pair_energy(sim, tab, r, i, xnew, ynew, znew)
+            unew+=u
+            wnew+=w
+    
+    return(uold, unew, wold, wnew)
\ No newline at end of file
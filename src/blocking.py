@@ -0,0 +1,173 @@
+# blocking is part of ljpy for Lennard Jones simulations.                   #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# blocking.py                                                             	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It estimates the statistical errors of the 
+simulation averages with the blocking method of Flyvbjerg and Petersen 
+(J. Chem. Phys. 91, 461, 1989) without storing the time series.
+
+The samples of a simulation are correlated, so the error of an average can
+not be found from the variance of the samples alone. Blocking averages pairs
+of neighboring samples to make a new series with half as many samples that
+are less correlated, and repeats this until the samples are independent.
+The error found from the variance of the samples then stops changing.
+
+Here the blocks are made as the samples arrive. Level k holds the sums of 
+the samples averaged in blocks of 2**k samples, and a sample waiting for its
+partner. Adding a sample changes on average two levels, and 64 levels are
+enough for any simulation, so the memory and the cost do not grow with the 
+length of the simulation.
+
+The properties accumulated are listed by the indices below. They are the 
+instantaneous values of the whole system, and each driver adds one sample 
+per step (one sweep for MC). The drivers also use the errors to end the 
+production steps early once the targets of the target_error keyword are 
+reached.
+"""
+
+# Import relevant libraries
+import numpy as np
+import numba as nb
+from numba import njit
+from src.jit_cache import cacheable
+
+# Indices of the properties
+ipe=0       # potential energy
+ike=1       # kinetic energy
+iT=2        # temperature
+iP=3        # pressure
+ivirial=4   # virial
+irho=5      # density (only changes in NPT MC)
+nprop=6     # number of properties
+names=("pe", "ke", "temp", "pressure", "virial", "density") # input names
+perparticle=(True, True, False, False, True, False) # reported per particle
+nlevel=64   # number of levels
+
+spec = [('x',nb.float64[:]), ('n',nb.int64[:]), ('s',nb.float64[:,:]), \
+        ('s2',nb.float64[:,:]), ('wait',nb.float64[:,:]),                \
+        ('nwait',nb.int64[:])]
+
+# The class that holds the sums of each level
+@cacheable
+@nb.experimental.jitclass(spec)
+class blocks:
+    def __init__(self):
+        # x holds the sample to add, which is set before calling add
+        # n[k] is the number of blocks of level k
+        # s[k,j] is the sum of property j over the blocks of level k
+        # s2[k,j] is the sum of the squares
+        # wait[k,j] is the block of level k waiting for its partner
+        # nwait[k] is 1 if level k has a block waiting and 0 otherwise
+        self.x=np.zeros(nprop)
+        self.n=np.zeros(nlevel, dtype=np.int64)
+        self.s=np.zeros((nlevel,nprop))
+        self.s2=np.zeros((nlevel,nprop))
+        self.wait=np.zeros((nlevel,nprop))
+        self.nwait=np.zeros(nlevel, dtype=np.int64)
+
+# This function is passed a blocks object. It adds the sample in b.x to 
+# level 0 and the new blocks it completes to the higher levels.
+@njit(cache=True)
+def add(b):
+    x=b.x.copy()
+    n=b.n
+    s=b.s
+    s2=b.s2
+    wait=b.wait
+    nwait=b.nwait
+    for k in range(nlevel):
+        n[k]+=1
+        for j in range(nprop):
+            s[k,j]+=x[j]
+            s2[k,j]+=x[j]*x[j]
+        if nwait[k] == 0:
+            wait[k,:]=x
+            nwait[k]=1
+            return
+        for j in range(nprop):
+            x[j]=0.5*(wait[k,j] + x[j])
+        nwait[k]=0
+
+# This function is passed a blocks object and the index of a property. It
+# returns the average of the samples of the property.
+def mean(b, j):
+    return(b.s[0,j]/b.n[0])
+
+# This function is passed a blocks object and the index of a property. It
+# returns the variance of the blocks of each level of the property.
+def levelvar(b, j):
+    n=np.maximum(b.n, 1)
+    mean=b.s[:,j]/n
+    return(np.maximum(b.s2[:,j]/n - mean*mean, 0.0))
+
+# This function is passed the number of blocks of each level and the 
+# variance of the blocks of each level of a property. It returns the error
+# of the average of the property and its correlation time in steps (zero 
+# for independent samples). The level used is the smallest one with blocks
+# long enough to be independent by the criterion of Lee et al. (Phys. Rev.
+# E 83, 066706, 2011). If no level meets it, the simulation is too short 
+# for the error and nan is returned for both. If the level has a smaller 
+# error than level 0, the error of level 0 and a correlation time of zero 
+# are returned.
+def levelerror(bn, var):
+    n0=bn[0]
+    if n0 < 2: return(np.nan, np.nan)
+    err0=0.0
+    for k in range(nlevel):
+        n=bn[k]
+        if n < 2: break
+        err=np.sqrt(var[k]/(n - 1))
+        if k == 0: err0=err
+        if err0 == 0.0: return(0.0, 0.0)
+        if (2.0**k)**3 > 2.0*n0*(err/err0)**4:
+            # A level with a smaller error than level 0 is not taken as the
+            # plateau, and the samples are treated as independent
+            if err < err0: return(err0, 0.0)
+            return(err, 0.5*((err/err0)**2 - 1.0))
+    return(np.nan, np.nan)
+
+# This function is passed a blocks object and the index of a property. It
+# returns the error of the average of the property and its correlation 
+# time in steps (see levelerror).
+def error(b, j):
+    return(levelerror(b.n, levelvar(b, j)))
+
+# This function is passed a simulation object and a blocks object. It 
+# returns True if targets were given for the errors (keyword target_error)
+# and the error of every property with a target is at or below it.
+def targetsmet(sim, blk):
+    target=sim.target
+    met=False
+    for j in range(nprop):
+        if target[j] > 0.0:
+            err, tau = error(blk, j)
+            if np.isnan(err): return(False)
+            if perparticle[j]: err/=sim.N
+            if err > target[j]: return(False)
+            met=True
+    return(met)
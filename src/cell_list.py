@@ -0,0 +1,172 @@
+# cell_list is part of ljpy for Lennard Jones simulations.                  #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# cell_list.py                                                            	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It sorts the particles into a grid of cubic
+cells whose side is at least as long as the cutoff radius. A particle can
+then only interact with particles in its own cell and in the 26 cells that
+surround it, so the pair search scales as O(N) instead of O(N^2). The cells
+are stored as linked lists: head[c] is the first particle in cell c and 
+lst[i] is the next particle in the same cell as particle i (-1 ends a list).
+
+MC moves one particle at a time, so it keeps a cell list (mccells) for the 
+whole simulation instead of building one for each calculation. Its lists are
+linked in both directions so a particle that moves to another cell is taken 
+out of its old cell and put in its new cell without a rebuild.
+"""
+
+# Import relevant libraries
+import numpy as np
+import numba as nb
+from numba import njit
+from src.jit_cache import cacheable
+
+# The 13 neighboring cells in the "forward" half of the shell around a cell.
+# Looping over a cell, itself, and these 13 cells visits every pair of 
+# neighboring cells exactly once.
+half_shell=np.array([[ 1, 0, 0], [ 1, 1, 0], [ 0, 1, 0], [-1, 1, 0],
+                     [ 1, 0, 1], [ 1, 1, 1], [ 0, 1, 1], [-1, 1, 1],
+                     [-1, 0, 1], [-1,-1, 1], [ 0,-1, 1], [ 1,-1, 1],
+                     [ 0, 0, 1]], dtype=np.int64)
+
+# This function is passed the box length and the minimum side of a cell.
+# It returns the number of cells along each side of the box.
+@njit(cache=True)
+def cells_per_side(length, rmin):
+    return(np.int64(np.floor(length/rmin)))
+
+# This function is passed the number of cells per side and the x, y, and z
+# coordinates of a point in the box. It returns the index of the cell that
+# contains the point.
+@njit(cache=True)
+def cell_index(ncell, length, x, y, z):
+    ix=np.int64(x/length*ncell)%ncell
+    iy=np.int64(y/length*ncell)%ncell
+    iz=np.int64(z/length*ncell)%ncell
+    return((iz*ncell+iy)*ncell+ix)
+
+# This function is passed the number of cells per side and the x, y, and z
+# indices of a cell, which may lie outside the box by one cell. It returns 
+# the index of the periodic image of that cell.
+@njit(cache=True)
+def cell_wrap(ncell, ix, iy, iz):
+    ix=(ix+ncell)%ncell
+    iy=(iy+ncell)%ncell
+    iz=(iz+ncell)%ncell
+    return((iz*ncell+iy)*ncell+ix)
+
+# This function is passed a simulation object, a particles object,
+# and the number of cells per side. It returns the head and linked-list
+# arrays that place every site in its cell.
+@njit(cache=True)
+def build_cells(sim, atom, ncell):
+    head=np.full(ncell*ncell*ncell, -1, dtype=np.int64)
+    lst=np.full(sim.N, -1, dtype=np.int64)
+    for i in range(sim.N):
+        c=cell_index(ncell, sim.length, atom.r[i,0], atom.r[i,1], 
+                     atom.r[i,2])
+        lst[i]=head[c]
+        head[c]=i
+    return(head, lst)
+
+mc_spec = [('ncell',nb.int64), ('head',nb.int64[:]), ('nxt',nb.int64[:]), \
+           ('prv',nb.int64[:]), ('cell',nb.int64[:])]
+
+# The class for the cell list of MC
+@cacheable
+@nb.experimental.jitclass(mc_spec)
+class mccells(object):
+    def __init__(self, N, ncell):
+        # ncell is the number of cells per side (0 if the list is not used)
+        # head[c] is the first particle in cell c
+        # nxt[i] is the next particle in the same cell as particle i
+        # prv[i] is the previous particle in the same cell as particle i
+        # cell[i] is the cell that holds particle i
+        self.ncell=ncell
+        self.head=np.full(ncell*ncell*ncell, -1, dtype=np.int64)
+        self.nxt=np.full(N, -1, dtype=np.int64)
+        self.prv=np.full(N, -1, dtype=np.int64)
+        self.cell=np.zeros(N, dtype=np.int64)
+        
+        return
+
+# This function is passed a simulation object, a particles object, and
+# an MC cell list. It places every site in its cell.
+@njit(cache=True)
+def build_mccells(sim, atom, cl):
+    cl.head[:]=-1
+    for i in range(sim.N):
+        c=cell_index(cl.ncell, sim.length, atom.r[i,0], atom.r[i,1], 
+                     atom.r[i,2])
+        cl.cell[i]=c
+        cl.prv[i]=-1
+        cl.nxt[i]=cl.head[c]
+        if cl.head[c] >= 0: cl.prv[cl.head[c]]=i
+        cl.head[c]=i
+
+# This function is passed a simulation object, a particles object, an MC
+# cell list, and the number of cells per side. It changes the number of 
+# cells of the list, which NPT MC needs when the box gains or loses a cell 
+# per side, and places every site in its cell. The list is not used if 
+# there are less than 3 cells per side.
+@njit(cache=True)
+def resize_mccells(sim, atom, cl, ncell):
+    if ncell < 3:
+        cl.ncell=0
+        return
+    cl.ncell=ncell
+    cl.head=np.full(ncell*ncell*ncell, -1, dtype=np.int64)
+    if cl.nxt.shape[0] != sim.N:
+        cl.nxt=np.full(sim.N, -1, dtype=np.int64)
+        cl.prv=np.full(sim.N, -1, dtype=np.int64)
+        cl.cell=np.zeros(sim.N, dtype=np.int64)
+    build_mccells(sim, atom, cl)
+
+# This function is passed an MC cell list, the index of a site, and the
+# index of the cell that now contains the site. It moves the site from its
+# old cell to the new cell.
+@njit(cache=True)
+def move_mccells(cl, i, c):
+    # Variables
+    head=cl.head
+    nxt=cl.nxt
+    prv=cl.prv
+    old=cl.cell[i]
+    if c == old: return
+    
+    # Take the site out of its old cell
+    if prv[i] >= 0: nxt[prv[i]]=nxt[i]
+    else: head[old]=nxt[i]
+    if nxt[i] >= 0: prv[nxt[i]]=prv[i]
+    
+    # Put the site at the front of its new cell
+    prv[i]=-1
+    nxt[i]=head[c]
+    if head[c] >= 0: prv[head[c]]=i
+    head[c]=i
+    cl.cell[i]=c
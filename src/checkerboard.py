@@ -0,0 +1,267 @@
+# checkerboard is part of ljpy for Lennard Jones simulations.               #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# checkerboard.py                                                         	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It performs MC sweeps in parallel (keyword 
+checkerboard) by splitting the box into a checkerboard of cells. 
+
+The box is split into nc cells per side, where nc is even and the cells are
+at least as wide as the cutoff radius. The cells are given one of 8 colours
+by whether their x, y, and z indices are even or odd. Two cells of the same
+colour are separated by a cell of another colour, so a particle in one can
+not interact with a particle in the other. The cells of one colour are 
+handed to the threads and each thread moves the particles in its cells 
+while the particles of the other colours stay fixed. A move that would take
+a particle out of its cell is rejected, which keeps the cells independent 
+and keeps detailed balance, since the reverse move would be rejected too.
+These moves are counted apart from the tried moves, so the acceptance ratio
+that sets the maximum displacement is that of the moves inside the cells.
+
+Each sweep shifts the whole grid of cells by a random vector so the 
+particles can cross the walls of the cells between sweeps, and visits the 
+colours in a random order. The particles of a cell are moved as many times 
+as there are particles in the cell, so a sweep is N moves.
+
+The random numbers are drawn from the counter-based generator of src/rng.py.
+Each cell has its own counters, built from the index of the cell, the step,
+and the stage, so the results are the same for any number of threads and a 
+restarted simulation draws the same numbers as one that never stopped. The
+energy and virial of the system are updated with the changes from all the
+cells after each colour, and the properties are accumulated after every 
+sweep with a weight of N.
+"""
+
+# Import relevant libraries
+import numpy as np
+from numba import njit, prange
+from src.rng import seedkey, uniforms
+from src.atomic_pe import pair_energy
+from src.cell_list import cell_wrap, cells_per_side, build_mccells
+from src.scale_delta import scale_delta
+from src.blocking import add, ipe, ike, iT, iP, ivirial, irho
+
+# This function is passed the box length and the cutoff radius. It returns
+# the number of cells per side of the checkerboard (0 if the box holds 
+# fewer than 4 cells per side).
+@njit(cache=True)
+def board_cells(length, rc):
+    nc=cells_per_side(length, rc)
+    nc-=nc%2
+    if nc < 4: return(0)
+    return(nc)
+
+# This function is passed a coordinate, the shift of the grid along its 
+# axis, the box length, the width of a cell, and the number of cells per 
+# side. It returns the index of the cell along the axis.
+@njit(cache=True)
+def board_index(x, shift, L, w, nc):
+    s=x - shift
+    if s < 0.0: s+=L
+    return(min(np.int64(s/w), nc-1))
+
+# This function is passed a simulation object, a particles object, the 
+# number of cells per side, the width of a cell, the shift of the grid, the
+# arrays of the first particle of each cell and of the particles sorted by
+# cell, the colour, the two words of the key and the last two words of the
+# counter, and the arrays for the change in energy and virial, the number
+# of accepted moves, and the number of moves leaving the cell of each cell
+# of the colour. It moves the particles in the cells of the colour in 
+# parallel.
+@njit(parallel=True, cache=True)
+def colour_pass(sim, atom, nc, w, shift, start, members, colour, k0, k1,
+                c2, c3, dpe, dvir, nacc, nout):
+    # Variables
+    r=atom.r
+    tab=sim.tab
+    L=sim.length
+    h=nc//2
+    cx=colour & 1
+    cy=(colour >> 1) & 1
+    cz=(colour >> 2) & 1
+    
+    for t in prange(h*h*h):
+        ix=2*(t%h) + cx
+        iy=2*((t//h)%h) + cy
+        iz=2*(t//(h*h)) + cz
+        c=(iz*nc + iy)*nc + ix
+        n=start[c+1] - start[c]
+        de=0.0
+        dw=0.0
+        acc=0
+        out=0
+        for m in range(n):
+            # Draw the particle, the displacement, and the number for the
+            # Metropolis criterion
+            u0, u1 = uniforms(3*m, c, c2, c3, k0, k1)
+            u2, u3 = uniforms(3*m+1, c, c2, c3, k0, k1)
+            u4, u5 = uniforms(3*m+2, c, c2, c3, k0, k1)
+            p=members[start[c] + min(np.int64(u0*n), n-1)]
+            xnew=r[p,0] + (2.0*u1 - 1.0)*sim.dt
+            ynew=r[p,1] + (2.0*u2 - 1.0)*sim.dt
+            znew=r[p,2] + (2.0*u3 - 1.0)*sim.dt
+            if xnew < 0.0: xnew+=L
+            elif xnew >= L: xnew-=L
+            if ynew < 0.0: ynew+=L
+            elif ynew >= L: ynew-=L
+            if znew < 0.0: znew+=L
+            elif znew >= L: znew-=L
+            
+            # Reject the move if it leaves the cell
+            if board_index(xnew, shift[0], L, w, nc) != ix or \
+               board_index(ynew, shift[1], L, w, nc) != iy or \
+               board_index(znew, shift[2], L, w, nc) != iz:
+                out+=1
+                continue
+            
+            # Energy and virial of the particle at the old and new 
+            # positions with the particles in the 27 cells around its cell
+            uold=0.0
+            unew=0.0
+            wold=0.0
+            wnew=0.0
+            for oz in range(-1, 2):
+                for oy in range(-1, 2):
+                    for ox in range(-1, 2):
+                        cn=cell_wrap(nc, ix+ox, iy+oy, iz+oz)
+                        for k in range(start[cn], start[cn+1]):
+                            j=members[k]
+                            if j != p:
+                                u, wj = pair_energy(sim, tab, r, j, r[p,0],
+                                                    r[p,1], r[p,2])
+                                uold+=u
+                                wold+=wj
+                                u, wj = pair_energy(sim, tab, r, j, xnew,
+                                                    ynew, znew)
+                                unew+=u
+                                wnew+=wj
+            
+            # Accept or reject the move
+            if u4 < np.exp(-(unew - uold)/sim.T):
+                r[p,0]=xnew
+                r[p,1]=ynew
+                r[p,2]=znew
+                de+=unew - uold
+                dw+=wnew - wold
+                acc+=1
+        dpe[t]=de
+        dvir[t]=dw
+        nacc[t]=acc
+        nout[t]=out
+
+# This function is passed a simulation object, a particles object, an MC
+# cell list, the instantaneous and average property objects, a blocks 
+# object for the errors, the number of the first sweep, the number of 
+# sweeps to perform, the stage (0 for equilibration and 1 for production), 
+# and the frequency to scale the maximum displacement. It performs the 
+# sweeps on the checkerboard and accumulates the properties after every 
+# sweep. One sample is added to the blocks after every sweep. The MC cell
+# list is rebuilt at the end since the particles have moved.
+@njit(cache=True)
+def boardsweeps(sim, atom, cl, iprop, aprop, blk, first, nsweeps, stage,
+                freq_scale_delta):
+    # Variables
+    x=blk.x
+    r=atom.r
+    L=sim.length
+    nc=board_cells(L, sim.rc)
+    w=L/nc
+    ncells=nc*nc*nc
+    h=nc//2
+    k0, k1 = seedkey(sim.seed)
+    
+    # Arrays for the cells and for the changes of each cell of a colour
+    cellof=np.zeros(sim.N, dtype=np.int64)
+    start=np.zeros(ncells+1, dtype=np.int64)
+    members=np.zeros(sim.N, dtype=np.int64)
+    shift=np.zeros(3)
+    order=np.zeros(8, dtype=np.int64)
+    dpe=np.zeros(h*h*h)
+    dvir=np.zeros(h*h*h)
+    nacc=np.zeros(h*h*h, dtype=np.int64)
+    nout=np.zeros(h*h*h, dtype=np.int64)
+    
+    for i in range(first, first+nsweeps):
+        # Shift the grid and shuffle the colours with the counters of the
+        # cell after the last one
+        u0, u1 = uniforms(0, ncells, i, stage, k0, k1)
+        u2, u3 = uniforms(1, ncells, i, stage, k0, k1)
+        shift[0]=u0*w
+        shift[1]=u1*w
+        shift[2]=u2*w
+        order[:]=np.arange(8)
+        for k in range(7, 0, -1):
+            v0, v1 = uniforms(2+k, ncells, i, stage, k0, k1)
+            j=min(np.int64(v0*(k+1)), k)
+            order[k], order[j] = order[j], order[k]
+        
+        # Sort the particles by cell
+        start[:]=0
+        for p in range(sim.N):
+            c=(board_index(r[p,2], shift[2], L, w, nc)*nc + 
+               board_index(r[p,1], shift[1], L, w, nc))*nc + \
+               board_index(r[p,0], shift[0], L, w, nc)
+            cellof[p]=c
+            start[c+1]+=1
+        for c in range(ncells): start[c+1]+=start[c]
+        fill=start[:ncells].copy()
+        for p in range(sim.N):
+            members[fill[cellof[p]]]=p
+            fill[cellof[p]]+=1
+        
+        # Move the particles one colour at a time. The moves that leave 
+        # their cell are not counted as tried.
+        for k in range(8):
+            colour_pass(sim, atom, nc, w, shift, start, members, order[k],
+                        k0, k1, i, stage, dpe, dvir, nacc, nout)
+            iprop.pe+=dpe.sum()
+            iprop.virial+=dvir.sum()
+            iprop.naccept+=nacc.sum()
+            iprop.ntry-=nout.sum()
+            iprop.nleave+=nout.sum()
+        iprop.ntry+=sim.N
+        iprop.pe2=iprop.pe*iprop.pe
+        
+        # Accumulate the properties for the sweep with the weight of N moves
+        aprop.pe+=sim.N*iprop.pe
+        aprop.pe2+=sim.N*iprop.pe2
+        aprop.virial+=sim.N*iprop.virial
+        
+        # Add the sample for the sweep to the blocks
+        x[ipe]=iprop.pe
+        x[ike]=0.0
+        x[iT]=sim.T
+        x[iP]=sim.rho*sim.T + 1.0/3.0/sim.length**3.0*iprop.virial + \
+              sim.ptail
+        x[ivirial]=iprop.virial
+        x[irho]=sim.rho
+        add(blk)
+        
+        # Scale delta to obtain desired acceptance of moves
+        if i%freq_scale_delta == 0: scale_delta(sim,iprop,aprop)
+    
+    if cl.ncell >= 3: build_mccells(sim, atom, cl)
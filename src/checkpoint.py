@@ -0,0 +1,234 @@
+# checkpoint is part of ljpy for Lennard Jones simulations.                 #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# checkpoint.py                                                           	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It writes and reads binary checkpoints that hold
+everything needed to continue a simulation exactly where it stopped: the 
+positions, velocities, forces, and displacements of the sites, the 
+instantaneous and average property objects, the blocks for the errors, the
+rdf histogram, the neighbor or cell list, the maximum displacement of MC 
+(which is tuned during the run), the box of NPT MC, the streams of random 
+numbers, the size of the movie file, the number of rows of the time series,
+the samples of the equilibration detector, the number of samples for 
+histogram reweighting, and the averages of the Widom insertions. A 
+simulation that is restarted from a checkpoint gives the same results, to 
+the last bit, as one that was never stopped.
+
+A checkpoint is a numpy .npz file. It is written to a temporary file that 
+then replaces the old checkpoint, so a job that is stopped while writing
+still leaves the last complete checkpoint behind.
+"""
+
+# Import relevant libraries
+import os, sys
+import numpy as np
+from src.ljpyclasses import particle_spec, prop_spec
+from src.rng import rng_spec
+from src.dhist import spec as hist_spec
+from src.neighbor_list import spec as nlist_spec
+from src.cell_list import mc_spec
+from src.blocking import spec as blocks_spec
+
+# This function is passed a list object, which is either a neighbor list
+# (md) or an MC cell list. It returns the spec of its class.
+def listspec(lst):
+    if hasattr(lst, "point"): return(nlist_spec)
+    return(mc_spec)
+
+# This function is passed a dictionary, a prefix, a jitclass object, and
+# the spec of its class. It copies every field of the object into the 
+# dictionary with the prefix added to the name of the field.
+def getfields(state, prefix, obj, spec):
+    for name, t in spec:
+        state[prefix + name]=getattr(obj, name)
+
+# This function is passed a checkpoint, a prefix, a jitclass object, and 
+# the spec of its class. It sets every field of the object from the 
+# checkpoint.
+def setfields(state, prefix, obj, spec):
+    for name, t in spec:
+        value=state[prefix + name]
+        if value.ndim == 0: value=value.item()
+        setattr(obj, name, value)
+
+# This function is passed a simulation object, a particles object, the
+# instantaneous and average property objects, the blocks object for the 
+# errors, the rdf histogram, the number of times the rdf was accumulated,
+# the neighbor list (md) or cell list (mc), the stage of the simulation 
+# ("eq" or "pr"), the number of steps completed in the stage, the movie 
+# writer (None if there is no movie), the writer of the instantaneous
+# properties, the equilibration detector, the writer of the samples for
+# reweighting (None if there are no samples), the sampler of the Widom
+# insertions (None if there are no insertions), and the stream of random 
+# numbers of the moves (None for MD). It writes the checkpoint 
+# file. The buffers of the writers are written first so the checkpoint can
+# record the size of the movie and the output file, the number of rows of 
+# the time series, and the number of samples.
+def savecheckpoint(sim, atom, iprop, aprop, blk, rdfh, rdfcalls, lst, stage,
+                   step, movie=None, output=None, detector=None, 
+                   samples=None, widom=None, rng=None):
+    state={}
+    state["moviebytes"]=movie.flush() if movie is not None else -1
+    state["seriesrows"]=output.flush() if output is not None else -1
+    state["outputbytes"]=output.size() if output is not None else -1
+    state["rwsamples"]=samples.flush() if samples is not None else -1
+    if detector is not None:
+        state["eqsamples"]=np.array(detector.samples, dtype=np.float64)
+        state["eqnlast"]=detector.nlast
+        state["eqt0"]=detector.t0
+    state["method"]=sim.method
+    state["N"]=sim.N
+    state["dt"]=sim.dt
+    state["box"]=np.array([sim.length, sim.rho, sim.rc, sim.utail, sim.ptail,
+                           sim.dv])
+    state["ncell"]=sim.ncell
+    state["eq"]=sim.eq
+    state["stage"]=stage
+    state["step"]=step
+    state["rdfcalls"]=rdfcalls
+    getfields(state, "atom_", atom, particle_spec)
+    getfields(state, "iprop_", iprop, prop_spec)
+    getfields(state, "aprop_", aprop, prop_spec)
+    getfields(state, "blk_", blk, blocks_spec)
+    getfields(state, "rdfh_", rdfh, hist_spec)
+    getfields(state, "list_", lst, listspec(lst))
+    if widom is not None: 
+        getfields(state, "widom_", widom.blk, blocks_spec)
+        getfields(state, "widomrng_", widom.rng, rng_spec)
+    if rng is not None: getfields(state, "rng_", rng, rng_spec)
+    
+    # Write to a temporary file and then replace the old checkpoint
+    tmp=sim.checkpointfile + ".tmp"
+    with open(tmp, "wb") as fp: np.savez(fp, **state)
+    os.replace(tmp, sim.checkpointfile)
+
+# This function is passed a checkpoint and a simulation object. The files
+# written up to the checkpoint are continued by the restarted simulation, 
+# so it checks that they exist under the names of the input file and are 
+# not shorter than when the checkpoint was written.
+def checkfiles(state, sim):
+    files=[(sim.outputfile, restartoutput(state))]
+    if sim.seriesfile and restartseries(state) is not None:
+        files.append((sim.seriesfile, 0))
+    if sim.movie and restartmovie(state) is not None:
+        files.append((sim.moviefile, restartmovie(state)))
+    if sim.reweight and str(state["stage"]) == "pr" and \
+       restartsamples(state) is not None:
+        files.append((sim.rwfile, 0))
+    for name, size in files:
+        if size is None: continue
+        if not os.path.isfile(name) or os.path.getsize(name) < size:
+            sys.exit("The restart file \"" + sim.restartfile + "\" continues " 
+                     "the file \"" + name + "\", which does not exist or is " +
+                     "shorter than when the checkpoint was written.\n")
+
+# This function is passed a simulation object and a particles object. It
+# reads the checkpoint named by the restart keyword, checks that it belongs
+# to the same kind of simulation and that the files it continues exist, and
+# restores the sites. It returns the checkpoint, which is passed to 
+# restorecheckpoint by the driver.
+def loadcheckpoint(sim, atom):
+    if not os.path.isfile(sim.restartfile):
+        sys.exit("The restart file \"" + sim.restartfile + "\" does not " +
+                 "exist.\n")
+    state=dict(np.load(sim.restartfile))
+    if str(state["method"]) != sim.method or int(state["N"]) != sim.N:
+        sys.exit("The restart file \"" + sim.restartfile + "\" is for a " +
+                 "different simulation (sim " + str(state["method"]) + 
+                 ", N " + str(state["N"]) + ").\n")
+    checkfiles(state, sim)
+    setfields(state, "atom_", atom, particle_spec)
+    return(state)
+
+# This function is passed a checkpoint from loadcheckpoint. It returns the
+# size of the output file when the checkpoint was written, or None if the 
+# checkpoint does not record it and the output file should be started over.
+def restartoutput(state):
+    if "outputbytes" not in state or state["outputbytes"] < 0: return(None)
+    return(int(state["outputbytes"]))
+
+# This function is passed a checkpoint from loadcheckpoint. It returns the
+# size of the movie file when the checkpoint was written, or None if no 
+# movie was being written and the movie should be started over.
+def restartmovie(state):
+    if "moviebytes" not in state or state["moviebytes"] < 0: return(None)
+    return(int(state["moviebytes"]))
+
+# This function is passed a checkpoint from loadcheckpoint. It returns the
+# number of rows of the time series (.npy) file when the checkpoint was 
+# written, or None if the time series should be started over.
+def restartseries(state):
+    if "seriesrows" not in state or state["seriesrows"] < 0: return(None)
+    return(int(state["seriesrows"]))
+
+# This function is passed a checkpoint from loadcheckpoint. It returns the
+# number of samples in the reweighting (.npz) file when the checkpoint was
+# written, or None if the samples should be started over.
+def restartsamples(state):
+    if "rwsamples" not in state or state["rwsamples"] < 0: return(None)
+    return(int(state["rwsamples"]))
+
+# This function is passed a checkpoint from loadcheckpoint. It returns the
+# samples, the number of samples at the last detection, and the 
+# equilibration point of the equilibration detector.
+def restartdetector(state):
+    if "eqsamples" not in state: return(None, 0, -1)
+    return(state["eqsamples"], int(state["eqnlast"]), int(state["eqt0"]))
+
+# This function is passed a checkpoint from loadcheckpoint and the sampler
+# of the Widom insertions. It restores the averages of the frames inserted 
+# before the checkpoint and the stream of random numbers of the ghosts.
+def restartwidom(state, widom):
+    if "widom_n" in state: 
+        setfields(state, "widom_", widom.blk, blocks_spec)
+        setfields(state, "widomrng_", widom.rng, rng_spec)
+
+# This function is passed a checkpoint from loadcheckpoint, a simulation
+# object, the instantaneous and average property objects, the blocks object
+# for the errors, the rdf histogram, the neighbor list (md) or cell list
+# (mc), and the stream of random numbers of the moves (None for MD). It 
+# restores the objects, the maximum displacement of MC, the box
+# and the number of cells (which change in NPT MC), and the number of 
+# equilibration steps performed (for the production stage) and 
+# returns the stage of the simulation, the number of steps completed in the
+# stage, and the number of times the rdf was accumulated.
+def restorecheckpoint(state, sim, iprop, aprop, blk, rdfh, lst, rng=None):
+    sim.dt=state["dt"].item()
+    if "box" in state:
+        sim.length, sim.rho, sim.rc, sim.utail, sim.ptail, sim.dv = \
+            (float(x) for x in state["box"])
+        sim.rc2=sim.rc*sim.rc
+        sim.ncell=int(state["ncell"])
+    if str(state["stage"]) == "pr": sim.eq=int(state["eq"])
+    setfields(state, "iprop_", iprop, prop_spec)
+    setfields(state, "aprop_", aprop, prop_spec)
+    setfields(state, "blk_", blk, blocks_spec)
+    setfields(state, "rdfh_", rdfh, hist_spec)
+    setfields(state, "list_", lst, listspec(lst))
+    if rng is not None: setfields(state, "rng_", rng, rng_spec)
+    return(str(state["stage"]), int(state["step"]), int(state["rdfcalls"]))
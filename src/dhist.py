@@ -32,11 +32,13 @@ the gsl_histogram library.
 """
 import numpy as np
 import numba as nb
+from src.jit_cache import cacheable
 spec = [('xmin',nb.float64), ('xmax',nb.float64),  \
         ('N', nb.int64), ('bin_width',nb.float64), \
         ('range',nb.float64[:]), ('mrange',nb.float64[:]), ('bin',nb.float64[:])]
             
 # The class for each site in the system
+@cacheable
 @nb.experimental.jitclass(spec)
 class hist(object):   
     def __init__(self, xmin, xmax, N):
@@ -66,14 +68,14 @@ class hist(object):
             print("{:>10}\t{:13.6f}\t{:13.6f}\n".format(i+1, \
                   self.mrange[i], self.bin[i]))
 
-@nb.njit
+@nb.njit(cache=True)
 def accumulate(h, x, weight):
     if x >= h.xmin and x < h.xmax:
         index = int((x - h.xmin) / h.bin_width)
         h.bin[index] += weight
         return(0)
 
-@nb.njit
+@nb.njit(cache=True)
 def increment(h, x):
     accumulate(h, x, 1.0)
     return(0)
@@ -0,0 +1,115 @@
+# equilibration is part of ljpy for Lennard Jones simulations.              #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# equilibration.py                                                        	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It detects when a simulation is equilibrated so
+the production steps can start without waiting for all the equilibration
+steps (keyword autoeq).
+
+The potential energy is sampled during the equilibration steps. For each 
+step t0 that could end the equilibration, the statistical inefficiency g 
+of the samples after t0 is found from their autocorrelation function, and
+the number of uncorrelated samples after t0 is (number of samples)/g. The 
+equilibration point is the t0 that gives the most uncorrelated samples
+(Chodera, J. Chem. Theory Comput. 12, 1799, 2016). Samples taken before the
+system is equilibrated drift, which makes g large, so they are left out.
+
+The system is taken to be equilibrated once the equilibration point is in 
+the first quarter of the samples, so at least three times as many samples 
+were taken after it as before it, at least minneff uncorrelated samples 
+follow it, and the averages of the first and second halves of the samples 
+that follow it agree within twice their error. The detection is repeated 
+each time the number of samples grows by a fraction, so its cost stays 
+small compared to the simulation. The equilibration steps still end at
+esteps if the system is not found to be equilibrated by then.
+"""
+
+# Import relevant libraries
+import numpy as np
+
+minsamples=100  # samples needed before the detection is tried
+minneff=20.0    # uncorrelated samples needed after the equilibration point
+ncandidate=50   # number of steps tried as the equilibration point
+growth=0.05     # fraction the samples grow by between detections
+
+# This function is passed a series of samples. It returns the statistical
+# inefficiency of the series, which is 1 for uncorrelated samples. The
+# autocorrelation function is summed until it first drops to zero.
+def inefficiency(a):
+    n=len(a)
+    d=a - a.mean()
+    var=d.var()
+    if var == 0.0: return(1.0)
+    f=np.fft.rfft(d, 2*n)
+    c=np.fft.irfft(f*np.conj(f))[:n]/np.arange(n, 0, -1)/var
+    t=np.arange(1, n)
+    stop=np.nonzero((c[1:] <= 0.0) & (t > 3))[0]
+    if len(stop): t=t[:stop[0]]
+    g=1.0 + 2.0*np.sum(c[t]*(1.0 - t/n))
+    return(max(g, 1.0))
+
+# The class that detects the end of the equilibration
+class eqdetector:
+    # This function is passed a simulation object, and the samples, the
+    # number of samples at the last detection, and the equilibration point
+    # saved in a checkpoint (None, 0, and -1 to start without samples).
+    def __init__(self, sim, samples=None, nlast=0, t0=-1):
+        # interval is the number of steps between samples
+        # samples holds the potential energy of each sample
+        # nlast is the number of samples at the last detection
+        # t0 is the step of the equilibration point once it is detected
+        self.interval=sim.autoeq
+        self.samples=[] if samples is None else list(samples)
+        self.nlast=nlast
+        self.t0=t0
+    
+    # This function is passed the potential energy. It adds the sample and
+    # returns True if the system is equilibrated.
+    def sample(self, pe):
+        self.samples.append(pe)
+        n=len(self.samples)
+        if n < minsamples or n < (1.0 + growth)*self.nlast: return(False)
+        self.nlast=n
+        a=np.array(self.samples)
+        best=0.0
+        k0=0
+        for k in np.unique(np.linspace(0, n - minsamples//2, 
+                                       ncandidate).astype(int)):
+            neff=(n - k)/inefficiency(a[k:])
+            if neff > best: best, k0 = neff, k
+        if k0 > n//4 or best < minneff: return(False)
+        
+        # Check that the samples after the equilibration point do not drift
+        # by comparing the averages of their two halves
+        a=a[k0:]
+        h=len(a)//2
+        g=inefficiency(a)
+        err=np.sqrt(g*(a[:h].var()/h + a[h:].var()/(len(a) - h)))
+        if abs(a[:h].mean() - a[h:].mean()) > 2.0*err: return(False)
+        self.t0=k0*self.interval
+        return(True)
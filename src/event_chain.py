@@ -0,0 +1,257 @@
+# event_chain is part of ljpy for Lennard Jones simulations.                #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# event_chain.py                                                          	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It performs the steps of event-chain Monte 
+Carlo (keyword eventchain), which never rejects a move (Bernard, Krauth, and
+Wilson, Phys. Rev. E 80, 056704, 2009; Michel, Kapfer, and Krauth, J. Chem.
+Phys. 140, 054116, 2014). 
+
+A chain starts with a random particle, which moves in a straight line along
++x, +y, or +z. Each pair of the moving particle and another particle has its
+own budget of energy, -T ln(u) with u a uniform random number, and the 
+particle moves until the increases of the energy of one pair along the path
+use up the budget of that pair (the factorized Metropolis filter). The 
+other particle of that pair then moves in the same direction (a lift), and 
+so on until the chain has moved the particles a total length of dt (the dt
+keyword). A step is three chains, one along each axis.
+
+The point at which a pair uses up its budget is found exactly. Along the 
+path the distance of the pair falls to the closest approach and then grows
+again. The energy of the truncated Lennard Jones potential rises while the 
+distance falls below the minimum at 2^(1/6), rises while the distance grows
+from the minimum to the cutoff, and rises by -u(rc) when the pair leaves 
+the cutoff. The energy is inverted in closed form on each branch, since 
+u = 4(x^2 - x) with x = r^-6.
+
+The cell list is used to find the pairs. A particle is moved at most to the
+edge of its cell before the pairs are found again, so every particle that 
+can come within the cutoff is in the 27 cells around it. Without the cell
+list, a particle is moved at most L/2 - rc at a time so the nearest image 
+of each pair does not change.
+
+The energy and virial of the system are recalculated after each step and
+the properties are accumulated with a weight of N, so the averages and the
+output are formed by the same code as sweeps of N single particle moves.
+"""
+
+# Import relevant libraries
+import numpy as np
+from numba import njit
+from src.forces import forces
+from src.cell_list import cell_wrap, move_mccells
+from src.blocking import add, ipe, ike, iT, iP, ivirial, irho
+from src.rng import draw, randint
+
+# The square of the distance of the minimum of the Lennard Jones potential
+rmin2=2.0**(1.0/3.0)
+
+# This function is passed the square of a distance. It returns the energy
+# of the Lennard Jones potential at the distance.
+@njit(cache=True)
+def lj(r2):
+    x=1.0/(r2*r2*r2)
+    return(4.0*(x*x - x))
+
+# This function is passed an energy and True for the repulsive branch 
+# (r < 2^(1/6)) or False for the attractive branch. It returns the square 
+# of the distance at which the Lennard Jones potential has the energy.
+@njit(cache=True)
+def ljinverse(u, repulsive):
+    if repulsive: x=0.5*(1.0 + np.sqrt(1.0 + u))
+    else: x=0.5*(1.0 - np.sqrt(max(1.0 + u, 0.0)))
+    return(x**(-1.0/3.0))
+
+# This function is passed the x, y, and z components of the vector from 
+# the moving particle to another particle, the axis of the motion, the 
+# temperature, the square of the cutoff radius, the energy of the pair at 
+# the cutoff, and a stream of random numbers. It returns the distance the 
+# moving particle travels before the pair uses up its budget of energy 
+# (infinite if it never does).
+@njit(cache=True)
+def pairevent(dx, dy, dz, k, T, rc2, uc, rng):
+    # Square of the distance, component along the motion, and square of the
+    # distance at the closest approach
+    d2=dx*dx + dy*dy + dz*dz
+    if k == 0: de=dx
+    elif k == 1: de=dy
+    else: de=dz
+    b2=d2 - de*de
+    
+    # Pairs that never come within the cutoff or are outside it and moving
+    # apart never raise the energy
+    if b2 >= rc2 or (de <= 0.0 and d2 >= rc2): return(np.inf)
+    estar=-T*np.log(1.0 - draw(rng))
+    
+    # The pair comes closer. The energy rises below the minimum.
+    if de > 0.0:
+        ra2=min(d2, rmin2)
+        if b2 < ra2:
+            ua=lj(ra2)
+            du=lj(b2) - ua if b2 > 0.0 else np.inf
+            if estar < du:
+                r2=ljinverse(ua + estar, True)
+                return(de - np.sqrt(max(r2 - b2, 0.0)))
+            estar-=du
+        rb2=max(b2, rmin2)
+    else:
+        rb2=max(d2, rmin2)
+    
+    # The pair moves apart. The energy rises above the minimum.
+    if rb2 < rc2:
+        ub=lj(rb2)
+        du=uc - ub
+        if estar < du:
+            r2=ljinverse(ub + estar, False)
+            return(de + np.sqrt(max(r2 - b2, 0.0)))
+        estar-=du
+    
+    # The energy rises to zero when the pair leaves the cutoff
+    if estar < -uc: return(de + np.sqrt(rc2 - b2))
+    return(np.inf)
+
+# This function is passed a simulation object, a particles object, an MC
+# cell list, a stream of random numbers, and the axis of the motion (0, 1,
+# or 2 for x, y, or z). It 
+# performs a chain of length sim.dt and returns the number of lifts.
+@njit(cache=True)
+def chain(sim, atom, cl, rng, k):
+    # Variables
+    r=atom.r
+    L=sim.length
+    hL=0.5*L
+    nc=cl.ncell
+    head=cl.head
+    nxt=cl.nxt
+    cell=cl.cell
+    uc=lj(sim.rc2)
+    w=L/nc if nc >= 3 else L
+    stride=nc**k if nc >= 3 else 1
+    
+    i=randint(rng, 0, sim.N-1)
+    rem=sim.dt
+    nlift=0
+    while rem > 0.0:
+        # Find the farthest the particle can move before the pairs are found
+        # again
+        if nc >= 3:
+            c=cell[i]
+            ck=(c//stride)%nc
+            smax=min(rem, max((ck + 1)*w - r[i,k], 0.0))
+        else:
+            smax=min(rem, hL - sim.rc)
+        
+        # Find the first pair to use up its budget
+        best=np.inf
+        jbest=-1
+        if nc >= 3:
+            ix=c%nc
+            iy=(c//nc)%nc
+            iz=c//(nc*nc)
+            for oz in range(-1, 2):
+                for oy in range(-1, 2):
+                    for ox in range(-1, 2):
+                        j=head[cell_wrap(nc, ix+ox, iy+oy, iz+oz)]
+                        while j >= 0:
+                            if j != i:
+                                s=pairevent(image(r[j,0]-r[i,0], L, hL),
+                                            image(r[j,1]-r[i,1], L, hL),
+                                            image(r[j,2]-r[i,2], L, hL),
+                                            k, sim.T, sim.rc2, uc, rng)
+                                if s < best:
+                                    best=s
+                                    jbest=j
+                            j=nxt[j]
+        else:
+            for j in range(sim.N):
+                if j != i:
+                    s=pairevent(image(r[j,0]-r[i,0], L, hL),
+                                image(r[j,1]-r[i,1], L, hL),
+                                image(r[j,2]-r[i,2], L, hL),
+                                k, sim.T, sim.rc2, uc, rng)
+                    if s < best:
+                        best=s
+                        jbest=j
+        
+        # Move the particle to the event and lift, or to the edge of its 
+        # cell and put it in the next cell
+        if best < smax:
+            r[i,k]+=best
+            rem-=best
+            if r[i,k] >= L: r[i,k]-=L
+            i=jbest
+            nlift+=1
+        else:
+            r[i,k]+=smax
+            rem-=smax
+            if r[i,k] >= L: r[i,k]-=L
+            if nc >= 3 and rem > 0.0:
+                move_mccells(cl, i, c + (((ck + 1)%nc) - ck)*stride)
+    
+    return(nlift)
+
+# This function is passed the component of the vector between a pair, the
+# box length, and half the box length. It returns the component of the 
+# nearest image.
+@njit(cache=True)
+def image(d, L, hL):
+    if d > hL: return(d - L)
+    if d < -hL: return(d + L)
+    return(d)
+
+# This function is passed a simulation object, a particles object, an MC
+# cell list, a stream of random numbers, the instantaneous and average 
+# property objects, a blocks object for the errors, the number of the first
+# step, and the number of steps to perform. It performs the steps of 
+# event-chain MC and accumulates the properties after every step. One 
+# sample is added to the blocks after every step.
+@njit(cache=True)
+def chainsteps(sim, atom, cl, rng, iprop, aprop, blk, first, nsteps):
+    x=blk.x
+    for i in range(first, first+nsteps):
+        # A chain along each axis
+        for k in range(3):
+            aprop.naccept+=chain(sim, atom, cl, rng, k)
+            aprop.ntry+=1
+        iprop.pe, iprop.virial = forces(sim, atom)
+        iprop.pe2=iprop.pe*iprop.pe
+        
+        # Accumulate the properties for the step with the weight of a sweep
+        aprop.pe+=sim.N*iprop.pe
+        aprop.pe2+=sim.N*iprop.pe2
+        aprop.virial+=sim.N*iprop.virial
+        
+        # Add the sample for the step to the blocks
+        x[ipe]=iprop.pe
+        x[ike]=0.0
+        x[iT]=sim.T
+        x[iP]=sim.rho*sim.T + 1.0/3.0/sim.length**3.0*iprop.virial + \
+              sim.ptail
+        x[ivirial]=iprop.virial
+        x[irho]=sim.rho
+        add(blk)
@@ -33,11 +33,31 @@ in the output file.
 
 # Import relevant libraries
 from src.rdf import rdf_finalize
+from src.blocking import error, mean, ipe, ike, iT, iP, ivirial, irho
+import numpy as np
 import src.dhist as dh
 
-def finalizefile(sim, atom, aprop, rdfh, rdfcalls):
+# This function is passed the output file, the label and value of an 
+# average, a blocks object, the index of the property in the blocks, and 
+# the factor that converts the property in the blocks to the units of the
+# average. It writes the average with its error and correlation time.
+def writeaverage(fp, label, value, blk, j, scale):
+    err, tau = error(blk, j)
+    if np.isnan(err):
+        fp.write("{:<24}{:10.6f}    +/- too few steps\n".format(label, value))
+    else:
+        fp.write("{:<24}{:10.6f}    +/- {:10.6f}    Corr. Time: {:10.2f}\n" \
+                 .format(label, value, err*scale, tau))
+
+# This function is passed a simulation object, a particles object, the 
+# average property object, the blocks object for the errors, the rdf 
+# histogram, the number of times the rdf was accumulated, the number of 
+# production steps performed (fewer than sim.pr if the target errors were 
+# reached), the neighbor list (md with the verlet neighbor keyword), and the
+# sampler of the Widom insertions. It writes the end of the output file.
+def finalizefile(sim, atom, aprop, blk, rdfh, rdfcalls, pr, nl=None, 
+                 widom=None):
     # Variables
-    pr=sim.pr
     N=sim.N
     
     # Calculate simple averages
@@ -59,13 +79,22 @@ def finalizefile(sim, atom, aprop, rdfh, rdfcalls):
     P = sim.rho*T + 1.0/3.0/sim.length**3.0*virial + sim.ptail
     if sim.method == "mc": cv=(pe2 - pe*pe)/(T*T)/N + 3.0/2.0  # nvt expression
     else: cv = 3.0/2.0/(1 - 2.0/3.0*(pe2 - pe*pe)/N/(T*T))     # nve expression
+    upe=pe/N + sim.utail
+    
+    # The box changes in NPT MC, so the pressure, density, and potential 
+    # energy (with its tail correction) are the averages of the samples of 
+    # the sweeps. The heat capacity above is not the one at constant 
+    # pressure and is not reported.
+    if sim.npt and pr > 0:
+        P=mean(blk, iP)
+        rho=mean(blk, irho)
+        upe=mean(blk, ipe)/N
    
     # Calculate the diffusivity from the MSD
     # This is zero for mc simulations
     Dmsd = 0.0
-    for i in range(N):
-        Dmsd+=atom[i].dx*atom[i].dx + atom[i].dy*atom[i].dy + \
-              atom[i].dz*atom[i].dz
+    for dx, dy, dz in atom.d:
+        Dmsd+=dx*dx + dy*dy + dz*dz
     Dmsd=Dmsd/pr/N/6.0/sim.dt
     
     # Write the data to file
@@ -74,17 +103,13 @@ def finalizefile(sim, atom, aprop, rdfh, rdfcalls):
     fp.write("\n    ***FINAL POSITIONS, XYZ Format***\n")
     fp.write(str(N) + "\nYou can copy these coordinates to a file to " +
              "open in a viewer.\n")
-    for i in range(N):
-        fp.write("C\t{:13.6f}\t{:13.6f}\t{:13.6f}\n".format(atom[i].x, \
-                                                            atom[i].y, \
-                                                            atom[i].z))
+    for x, y, z in atom.r:
+        fp.write("C\t{:13.6f}\t{:13.6f}\t{:13.6f}\n".format(x, y, z))
 
     if sim.method == "md":
         fp.write("\n         ***FINAL VELOCITIES***\n");
-        for i in range(N):
-            fp.write("\t{:13.6f}\t{:13.6f}\t{:13.6f}\n".format(atom[i].vx, \
-                                                               atom[i].vy, \
-                                                               atom[i].vz))
+        for vx, vy, vz in atom.v:
+            fp.write("\t{:13.6f}\t{:13.6f}\t{:13.6f}\n".format(vx, vy, vz))
 
     if sim.rdf:
         fp.write("\n***Radial Distribution Function***\n\n");
@@ -92,23 +117,77 @@ def finalizefile(sim, atom, aprop, rdfh, rdfcalls):
         dh.write(rdfh, fp)
 
 
-    if sim.pr > 0:
+    if pr > 0:
         fp.write("\n***Simulation Averages***\n\n")
-        fp.write("Temperature:            {:10.6f}\n".format(T))
-        fp.write("Pressure:               {:10.6f}\n".format(P))
-        fp.write("Heat Capacity:          {:10.6f}\n".format(cv))
-        fp.write("Potential Energy:       {:10.6f}\n".format(pe/N + sim.utail))
+        if pr < sim.pr:
+            fp.write("The target errors were reached after {} of {} " \
+                     "production steps.\n\n".format(pr, sim.pr))
+        if sim.method == "md":
+            writeaverage(fp, "Temperature:", T, blk, iT, 1.0)
+        else:
+            fp.write("Temperature:            {:10.6f}\n".format(T))
+        writeaverage(fp, "Pressure:", P, blk, iP, 1.0)
+        if sim.npt:
+            writeaverage(fp, "Density:", rho, blk, irho, 1.0)
+        else:
+            fp.write("Heat Capacity:          {:10.6f}\n".format(cv))
+        writeaverage(fp, "Potential Energy:", upe, blk, ipe, 1.0/N)
+        writeaverage(fp, "Virial:", virial/N, blk, ivirial, 1.0/N)
         if sim.method == "md":
-            fp.write("Kinetic Energy:         {:10.6f}\n".format(ke/N))
+            writeaverage(fp, "Kinetic Energy:", ke/N, blk, ike, 1.0/N)
             fp.write("Total Energy:           {:10.6f}\n".format((ke+pe) \
                                                                  /N+sim.utail))
             fp.write("Diffusivity             {:10.6f}\n".format(Dmsd))
+        if widom is not None and widom.blk.n[0] > 0:
+            mu, err, tau = widom.mu(sim)
+            label="Excess Chem. Potential:"
+            if np.isinf(mu):
+                fp.write("{:<24}{:>10}    every ghost overlapped a " \
+                         "particle\n".format(label, "inf"))
+            elif np.isnan(err):
+                fp.write("{:<24}{:10.6f}    +/- too few frames\n" \
+                         .format(label, mu))
+            else:
+                fp.write("{:<24}{:10.6f}    +/- {:10.6f}    Corr. Time: " \
+                         "{:10.2f}\n".format(label, mu, err, tau*sim.widom))
+            fp.write("Widom Insertions:       {:10d}\n" \
+                     .format(widom.blk.n[0]*sim.ninsert))
+        if nl is not None:
+            # Statistics of the neighbor list during production to help
+            # choose the skin
+            fp.write("Neighbor List Builds:   {:10d}\n".format(nl.nbuild))
+            fp.write("Steps per Build:        {:10.2f}\n" \
+                     .format(pr/nl.nbuild))
+            fp.write("Neighbors per Atom:     {:10.2f}\n" \
+                     .format(2.0*nl.npairs_total/nl.nbuild/N))
         if sim.method == "mc":
-            if aprop.ntry != 0:
-                fp.write("MC Moves Accepted:      {:10.6f}\n" \
+            if aprop.ntry != 0 and sim.eventchain:
+                fp.write("Lifts per Chain:        {:10.2f}\n" \
                          .format(aprop.naccept/aprop.ntry))
-                fp.write("Final Max Displacment:  {:10.6f}\n" \
+                fp.write("Chain Length:           {:10.6f}\n" \
                          .format(sim.dt))
+            elif aprop.ntry != 0:
+                fp.write("MC Moves Accepted:      {:10.6f}\n" \
+                         .format(aprop.naccept/aprop.ntry))
+                if sim.hybrid:
+                    fp.write("Final Time Step:        {:10.6f}\n" \
+                             .format(sim.dt))
+                else:
+                    fp.write("Final Max Displacment:  {:10.6f}\n" \
+                             .format(sim.dt))
+                if sim.checkerboard:
+                    # The fraction of all the moves that left their cell,
+                    # which are not in the moves accepted
+                    fp.write("Moves Leaving Cell:     {:10.6f}\n" \
+                             .format(aprop.nleave/(aprop.ntry+aprop.nleave)))
+            if aprop.nvtry != 0:
+                fp.write("Volume Moves Accepted:  {:10.6f}\n" \
+                         .format(aprop.nvaccept/aprop.nvtry))
+                fp.write("Final Max ln(V) Change: {:10.6f}\n" \
+                         .format(sim.dv))
+            fp.write("Max. Energy Drift:      {:10.3e}\n".format(aprop.drift))
+        fp.write("\nThe errors are one standard error of the average " +
+                 "found by blocking.\nThe correlation times are in steps.\n")
     else:
         fp.write("\nNo productions steps were specified, so simulation " +
                  "averages were not calculated.\n\n")
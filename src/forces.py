@@ -29,27 +29,107 @@
 """
 This module is part of ljpy. This function calculates the energies and forces
 between each Lennard Jones particle. It returns the potential energy
-and virial for the state of the list of particles passed.
+and virial for the state of the list of particles passed. The pairs of 
+particles are found by looping over all pairs, with a cell list, or with a
+Verlet neighbor list, as selected by the neighbor keyword in the input file.
+
+When more than one thread is requested, the parallel versions of the loops
+are used. The outer loop is split across the threads and each thread adds
+its forces, energy, and virial to its own private accumulators, which are
+summed at the end. This avoids two threads writing to the same site.
 """
 
 # Import relevant libraries
 import numpy as np
-from numba import njit
+from numba import njit, prange
+from src.cell_list import build_cells, cell_wrap, half_shell
+from src.potential import pair_potential
+
+# This function is passed a simulation object, the potential table, the
+# array of positions, the array that accumulates the forces, and the indices
+# of two sites. It adds 
+# the force between the pair to both sites and returns the potential energy
+# and virial of the pair.
+@njit(cache=True)
+def pair_force(sim, tab, r, f, i, j):
+    # Variables
+    hL=sim.length*0.5   # half the box length
+    
+    # Calculate the distance between sites i and j
+    dx=r[i,0]-r[j,0]
+    dy=r[i,1]-r[j,1]
+    dz=r[i,2]-r[j,2]
+    
+    # Minimum image convention
+    if np.abs(dx)>hL:
+        if dx < 0.0: dx=dx+sim.length
+        else: dx=dx-sim.length
+    if np.abs(dy)>hL:
+        if dy < 0.0: dy=dy+sim.length
+        else: dy=dy-sim.length
+    if np.abs(dz)>hL:
+        if dz < 0.0: dz=dz+sim.length
+        else: dz=dz-sim.length
+    
+    dr2=dx*dx+dy*dy+dz*dz
+    
+    # Calculate the energy and force for the pair
+    if dr2 < sim.rc2: # apply cutoff
+        u, fr = pair_potential(sim, tab, dr2)
+        
+        # components of forces
+        f[i,0]=f[i,0]+fr*dx
+        f[i,1]=f[i,1]+fr*dy
+        f[i,2]=f[i,2]+fr*dz
+        f[j,0]=f[j,0]-fr*dx
+        f[j,1]=f[j,1]-fr*dy
+        f[j,2]=f[j,2]-fr*dz   
+        
+        # potential energy and virial
+        return(u, dr2*fr)
+    
+    return(0.0, 0.0)
 
-# This function is passed a simulation object and a list of site object.
+# This function is passed a simulation object and a particles object.
 # It returns the potential energy of the system and also assigns the 
 # forces on each site. 
-@njit
+@njit(cache=True)
 def forces(sim,atom):
+    # Use the cell list if it was requested and the box holds at least
+    # three cells per side. Otherwise, fall back to looping over all pairs.
+    # The cell list is also used for single calls when a Verlet neighbor 
+    # list was requested (see forces_nlist).
+    if sim.neighbor != "allpairs" and sim.ncell >= 3:
+        if sim.nthreads > 1: return(forces_cell_parallel(sim, atom))
+    elif sim.nthreads > 1: return(forces_allpairs_parallel(sim, atom))
+    return(forces_serial(sim, atom))
+
+# This function is passed a simulation object and a particles object.
+# It returns the potential energy of the system and also assigns the 
+# forces on each site, always with one thread. No parallel loop is 
+# compiled into it, so it can run before the threads of numba are started.
+@njit(cache=True)
+def forces_serial(sim,atom):
+    if sim.neighbor != "allpairs" and sim.ncell >= 3:
+        return(forces_cell(sim, atom))
+    return(forces_allpairs(sim, atom))
+
+# This function is passed a simulation object and a particles object.
+# It calculates the forces by looping over all pairs of sites.
+@njit(cache=True)
+def forces_allpairs(sim,atom):
     # Variables
-    hL=np.float64(sim.length*0.5)   # half the box length
     N=np.int64(sim.N)
     
+    r=atom.r    # positions
+    tab=sim.tab # potential table
+    f=atom.f    # forces
+    
     # Zero out the force accumulators for each particle
     for i in range(sim.N):
-        atom[i].fx=0.0
-        atom[i].fy=0.0
-        atom[i].fz=0.0
+        f[i,0]=0.0
+        f[i,1]=0.0
+        f[i,2]=0.0
     
     # Zero out the system accumulators
     virial=0.0  # virial portion of pressure
@@ -58,42 +138,228 @@ def forces(sim,atom):
     # Calculate the forces by looping over all pairs of sites
     for i in range(N-1):
         for j in range(i+1, N):
-            # Calculate the distance between sites i and j
-            dx=atom[i].x-atom[j].x
-            dy=atom[i].y-atom[j].y
-            dz=atom[i].z-atom[j].z
-            
-            # Minimum image convention
-            if np.abs(dx)>hL:
-                if dx < 0.0: dx=dx+sim.length
-                else: dx=dx-sim.length
-            if np.abs(dy)>hL:
-                if dy < 0.0: dy=dy+sim.length
-                else: dy=dy-sim.length
-            if np.abs(dz)>hL:
-                if dz < 0.0: dz=dz+sim.length
-                else: dz=dz-sim.length
-            
-            dr2=dx*dx+dy*dy+dz*dz
-            
-            # Calculate the energy and force for the pair
-            if dr2 < sim.rc2: # apply cutoff
-                d2=1.0/dr2
-                d4=d2*d2
-                d8=d4*d4
-                d14=d8*d4*d2
-                fr=48.0*(d14-0.5*d8)
-                
-                # components of forces
-                atom[i].fx=atom[i].fx+fr*dx
-                atom[i].fy=atom[i].fy+fr*dy
-                atom[i].fz=atom[i].fz+fr*dz
-                atom[j].fx=atom[j].fx-fr*dx
-                atom[j].fy=atom[j].fy-fr*dy
-                atom[j].fz=atom[j].fz-fr*dz   
+            u, w = pair_force(sim, tab, r, f, i, j)
+            pe=pe+u
+            virial=virial+w
+
+    return(np.float64(pe), np.float64(virial))
+
+# This function is passed a simulation object and a particles object.
+# It calculates the forces by sorting the sites into cells and only
+# looping over pairs of sites in the same or neighboring cells.
+@njit(cache=True)
+def forces_cell(sim,atom):
+    # Variables
+    nc=sim.ncell
+    
+    r=atom.r    # positions
+    tab=sim.tab # potential table
+    f=atom.f    # forces
+    
+    # Zero out the force accumulators for each particle
+    for i in range(sim.N):
+        f[i,0]=0.0
+        f[i,1]=0.0
+        f[i,2]=0.0
+    
+    # Zero out the system accumulators
+    virial=0.0  # virial portion of pressure
+    pe=0.0      # potential energy
+    
+    # Place each site in its cell
+    head, lst = build_cells(sim, atom, nc)
+    
+    # Loop around the cells
+    for iz in range(nc):
+        for iy in range(nc):
+            for ix in range(nc):
+                c=(iz*nc+iy)*nc+ix
+                i=head[c]
+                while i >= 0:
+                    # Pairs within the same cell
+                    j=lst[i]
+                    while j >= 0:
+                        u, w = pair_force(sim, tab, r, f, i, j)
+                        pe=pe+u
+                        virial=virial+w
+                        j=lst[j]
+                    
+                    # Pairs with the forward half of the neighboring cells
+                    for k in range(13):
+                        cn=cell_wrap(nc, ix+half_shell[k,0], 
+                                     iy+half_shell[k,1], iz+half_shell[k,2])
+                        j=head[cn]
+                        while j >= 0:
+                            u, w = pair_force(sim, tab, r, f, i, j)
+                            pe=pe+u
+                            virial=virial+w
+                            j=lst[j]
+                    i=lst[i]
+
+    return(np.float64(pe), np.float64(virial))
+
+# This function is passed a simulation object, a particles object, and
+# a neighbor list. It calculates the forces by looping over the pairs in 
+# the neighbor list. The list must be up to date (see update_nlist).
+@njit(cache=True)
+def forces_nlist(sim,atom,nl):
+    if sim.nthreads > 1: return(forces_nlist_parallel(sim, atom, nl))
+    
+    r=atom.r    # positions
+    tab=sim.tab # potential table
+    f=atom.f    # forces
+    
+    # Zero out the force accumulators for each particle
+    for i in range(sim.N):
+        f[i,0]=0.0
+        f[i,1]=0.0
+        f[i,2]=0.0
+    
+    # Zero out the system accumulators
+    virial=0.0  # virial portion of pressure
+    pe=0.0      # potential energy
+    
+    # Calculate the forces by looping over the pairs in the list
+    point=nl.point
+    nlst=nl.list
+    for i in range(sim.N):
+        for k in range(point[i], point[i+1]):
+            u, w = pair_force(sim, tab, r, f, i, nlst[k])
+            pe=pe+u
+            virial=virial+w
+
+    return(np.float64(pe), np.float64(virial))
+
+# This function is passed a particles object and the private force, energy,
+# and virial accumulators of each thread. It sums the accumulators of the
+# threads, assigns the forces on each site, and returns the potential energy
+# and virial of the system.
+@njit(parallel=True, cache=True)
+def reduce_threads(atom, fbuf, pebuf, virbuf):
+    nt=fbuf.shape[0]
+    f=atom.f
+    for i in prange(atom.N):
+        for k in range(3):
+            fsum=0.0
+            for t in range(nt):
+                fsum=fsum+fbuf[t,i,k]
+            f[i,k]=fsum
+    
+    return(np.float64(np.sum(pebuf)), np.float64(np.sum(virbuf)))
+
+# This function is the parallel version of forces_allpairs. Thread t 
+# handles the sites t, t+nt, t+2nt, ... in the outer loop, which gives each
+# thread about the same number of pairs.
+@njit(parallel=True, cache=True)
+def forces_allpairs_parallel(sim,atom):
+    # Variables
+    N=np.int64(sim.N)
+    nt=sim.nthreads
+    r=atom.r
+    tab=sim.tab # potential table
+    
+    # Private accumulators for each thread
+    fbuf=np.zeros((nt, N, 3))
+    pebuf=np.zeros(nt)
+    virbuf=np.zeros(nt)
+    
+    # Calculate the forces by looping over all pairs of sites
+    for t in prange(nt):
+        f=fbuf[t]
+        pe=0.0
+        virial=0.0
+        for i in range(t, N-1, nt):
+            for j in range(i+1, N):
+                u, w = pair_force(sim, tab, r, f, i, j)
+                pe=pe+u
+                virial=virial+w
+        pebuf[t]=pe
+        virbuf[t]=virial
+    
+    return(reduce_threads(atom, fbuf, pebuf, virbuf))
+
+# This function is the parallel version of forces_cell. Thread t handles
+# the cells t, t+nt, t+2nt, ... in the outer loop.
+@njit(parallel=True, cache=True)
+def forces_cell_parallel(sim,atom):
+    # Variables
+    N=np.int64(sim.N)
+    nc=sim.ncell
+    nt=sim.nthreads
+    r=atom.r
+    tab=sim.tab # potential table
+    
+    # Private accumulators for each thread
+    fbuf=np.zeros((nt, N, 3))
+    pebuf=np.zeros(nt)
+    virbuf=np.zeros(nt)
+    
+    # Place each site in its cell
+    head, lst = build_cells(sim, atom, nc)
+    
+    # Loop around the cells
+    for t in prange(nt):
+        f=fbuf[t]
+        pe=0.0
+        virial=0.0
+        for c in range(t, nc*nc*nc, nt):
+            ix=c%nc
+            iy=(c//nc)%nc
+            iz=c//(nc*nc)
+            i=head[c]
+            while i >= 0:
+                # Pairs within the same cell
+                j=lst[i]
+                while j >= 0:
+                    u, w = pair_force(sim, tab, r, f, i, j)
+                    pe=pe+u
+                    virial=virial+w
+                    j=lst[j]
                 
-                # virial and potential energy
-                virial=virial+dr2*fr
-                pe=pe+4.0*(d14-d8)*dr2
+                # Pairs with the forward half of the neighboring cells
+                for k in range(13):
+                    cn=cell_wrap(nc, ix+half_shell[k,0], 
+                                 iy+half_shell[k,1], iz+half_shell[k,2])
+                    j=head[cn]
+                    while j >= 0:
+                        u, w = pair_force(sim, tab, r, f, i, j)
+                        pe=pe+u
+                        virial=virial+w
+                        j=lst[j]
+                i=lst[i]
+        pebuf[t]=pe
+        virbuf[t]=virial
+    
+    return(reduce_threads(atom, fbuf, pebuf, virbuf))
 
-    return(np.float64(pe), np.float64(virial))
\ No newline at end of file
+# This function is the parallel version of forces_nlist. Thread t handles
+# the sites t, t+nt, t+2nt, ... in the outer loop.
+@njit(parallel=True, cache=True)
+def forces_nlist_parallel(sim,atom,nl):
+    # Variables
+    N=np.int64(sim.N)
+    nt=sim.nthreads
+    r=atom.r
+    tab=sim.tab # potential table
+    point=nl.point
+    nlst=nl.list
+    
+    # Private accumulators for each thread
+    fbuf=np.zeros((nt, N, 3))
+    pebuf=np.zeros(nt)
+    virbuf=np.zeros(nt)
+    
+    # Calculate the forces by looping over the pairs in the list
+    for t in prange(nt):
+        f=fbuf[t]
+        pe=0.0
+        virial=0.0
+        for i in range(t, N, nt):
+            for k in range(point[i], point[i+1]):
+                u, w = pair_force(sim, tab, r, f, i, nlst[k])
+                pe=pe+u
+                virial=virial+w
+        pebuf[t]=pe
+        virbuf[t]=virial
+    
+    return(reduce_threads(atom, fbuf, pebuf, virbuf))
\ No newline at end of file
@@ -0,0 +1,140 @@
+# hybrid is part of ljpy for Lennard Jones simulations.                     #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# hybrid.py                                                               	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It performs the steps of Hybrid Monte Carlo 
+(keyword hybrid), which moves all the particles at once instead of one at a
+time (Duane et al., Phys. Lett. B 195, 216, 1987). A step draws velocities 
+from the Maxwell-Boltzmann distribution at the temperature of the 
+simulation, integrates the equations of motion for a number of time steps 
+with the velocity Verlet functions of MD, and accepts or rejects the new 
+positions with the Metropolis criterion on the change of the total energy.
+Velocity Verlet is time reversible and keeps volume in phase space, so the
+steps sample the canonical ensemble exactly, whatever the size of the time
+step. The time step only sets how often a step is accepted, and it is tuned
+toward an acceptance of 70% the way the maximum displacement of single 
+particle MC is tuned.
+
+Each step costs as much as the number of time steps of MD, but it moves 
+every particle along the forces, so the samples decorrelate in far fewer 
+steps than sweeps of single particle moves at liquid densities.
+
+The properties are accumulated after each step with a weight of N, so the
+averages and the output are formed by the same code as sweeps of N single
+particle moves.
+"""
+
+# Import relevant libraries
+import numpy as np
+from numba import njit
+from src.verlet import verlet1, verlet2
+from src.forces import forces
+from src.scale_delta import scale_dt
+from src.blocking import add, ipe, ike, iT, iP, ivirial, irho
+from src.rng import uniform, gauss
+
+# Number of steps between changes of the time step
+freq_scale_dt=10
+
+# This function is passed a simulation object, a particles object, a 
+# stream of random numbers, the instantaneous property object, and arrays 
+# to save the positions and forces in. It performs one step of Hybrid MC 
+# and returns True if the new positions are accepted and False if they are
+# rejected.
+@njit(cache=True)
+def hmcstep(sim, atom, rng, iprop, r0, f0):
+    # Variables
+    v=atom.v
+    sd=np.sqrt(sim.T)
+    iprop.ntry+=1
+    
+    # Save the positions and forces to restore them if the step is rejected
+    r0[:,:]=atom.r
+    f0[:,:]=atom.f
+    
+    # Draw the velocities from the Maxwell-Boltzmann distribution
+    ke0=0.0
+    for i in range(sim.N):
+        v[i,0]=gauss(rng, 0.0, sd)
+        v[i,1]=gauss(rng, 0.0, sd)
+        v[i,2]=gauss(rng, 0.0, sd)
+        ke0+=0.5*(v[i,0]*v[i,0] + v[i,1]*v[i,1] + v[i,2]*v[i,2])
+    
+    # Integrate the equations of motion
+    pe=iprop.pe
+    virial=iprop.virial
+    ke=ke0
+    for k in range(sim.hybrid):
+        verlet1(sim, atom)
+        pe, virial = forces(sim, atom)
+        ke=verlet2(sim, atom)
+    
+    # Accept/Reject the new positions
+    dh=pe + ke - iprop.pe - ke0
+    if uniform(rng, 0, 1) < np.exp(-dh/sim.T): # accept
+        iprop.naccept+=1
+        iprop.pe=pe
+        iprop.virial=virial
+        iprop.pe2=pe*pe
+        return(True)
+    else: #reject
+        atom.r[:,:]=r0
+        atom.f[:,:]=f0
+        return(False)
+
+# This function is passed a simulation object, a particles object, a 
+# stream of random numbers, the instantaneous and average property objects,
+# a blocks object for the errors, the number of the first step, and the 
+# number of steps to perform. It performs the steps of Hybrid MC and 
+# accumulates the properties after every step. One sample is added to the
+# blocks after every step.
+@njit(cache=True)
+def hmcsteps(sim, atom, rng, iprop, aprop, blk, first, nsteps):
+    x=blk.x
+    r0=np.empty_like(atom.r)
+    f0=np.empty_like(atom.f)
+    for i in range(first, first+nsteps):
+        hmcstep(sim, atom, rng, iprop, r0, f0)
+        
+        # Accumulate the properties for the step with the weight of a sweep
+        aprop.pe+=sim.N*iprop.pe
+        aprop.pe2+=sim.N*iprop.pe2
+        aprop.virial+=sim.N*iprop.virial
+        
+        # Add the sample for the step to the blocks
+        x[ipe]=iprop.pe
+        x[ike]=0.0
+        x[iT]=sim.T
+        x[iP]=sim.rho*sim.T + 1.0/3.0/sim.length**3.0*iprop.virial + \
+              sim.ptail
+        x[ivirial]=iprop.virial
+        x[irho]=sim.rho
+        add(blk)
+        
+        # Scale the time step to obtain the desired acceptance of steps
+        if i%freq_scale_dt == 0: scale_dt(sim,iprop,aprop)
@@ -29,28 +29,38 @@
 """
 This module is part of ljpy. It writes the initial parts of the output file
 such as the simulations parameters, the initial positions, and the
-initial velocities 
+initial velocities. A restarted simulation continues the output file 
+written up to the checkpoint instead.
 """
 
 # Import relevant libraries
-from src.forces import forces
+from src.forces import forces, forces_serial
 from src.kinetic import ke_and_T
+from src.blocking import names
+from src.checkpoint import restartoutput
 
-def initializefiles(sim,atom):
+# This function is passed a simulation object, a particles object, and the
+# checkpoint to restart from (None to start from the beginning).
+def initializefiles(sim,atom,chk=None):
     
-    # Initialize the movie files.
-    if sim.movie:
-        # Initilaize the .trr file.
-        fi=open(sim.moviefile,"w")
+    # A restarted simulation keeps the output file as it was when the 
+    # checkpoint was written and adds its rows after it. The rows written 
+    # after the checkpoint are removed.
+    keep=restartoutput(chk) if chk is not None else None
+    if keep is not None:
+        fi=open(sim.outputfile,"r+b")
+        fi.truncate(keep)
         fi.close()
-        
+        return
+    
+    # Initialize the movie files. The .trr file is written by the 
+    # drivers (see trr.py).
+    if sim.movie:
         # Write the .xyz file needed for loading the .trr file.
         fi=open(sim.moviefile.split(".")[0]+".xyz","w")
         fi.write(str(sim.N)+"\nLoad this file in VMD before the .trr file\n")
-        for i in range(sim.N):
-            fi.write("C\t{:13.6f}\t{:13.6f}\t{:13.6f}\n".format(atom[i].x, \
-                                                                atom[i].y, \
-                                                                atom[i].z))
+        for x, y, z in atom.r:
+            fi.write("C\t{:13.6f}\t{:13.6f}\t{:13.6f}\n".format(x, y, z))
         fi.close()
         
     # Write the header output file including the simulation parameters,
@@ -91,12 +101,50 @@ def initializefiles(sim,atom):
         fi.write("coord       " + sim.icoord + "\n")
     if sim.ivel != None:
         fi.write("vel         " + sim.ivel + "\n")
-#    if sim.moviefile != None:
-#        fi.write("movie       " + sim.moviefile + "  " + str(sim.movie) + "\n")
+    if sim.movie:
+        fi.write("movie       " + sim.moviefile + "  " + str(sim.movie) + "\n")
     if sim.rdf != 0:
         fi.write("rdf         " + str(sim.rdfmin) + "  " +
                  str(sim.rdfmax) + "  " + str(sim.rdfN) +"  " +
                  str(sim.rdf) + "\n")
+    fi.write("threads     " + str(sim.nthreads) + "\n")
+    if sim.neighbor == "verlet":
+        fi.write("neighbor    " + sim.neighbor + "  " + str(sim.skin) + "\n")
+    else:
+        fi.write("neighbor    " + sim.neighbor + "\n")
+    if sim.potential == "mie":
+        fi.write("potential   " + sim.potential + "  " + str(sim.mie_n) + 
+                 "  " + str(sim.mie_m) + "\n")
+    else:
+        fi.write("potential   " + sim.potential + "\n")
+    if sim.table: fi.write("table       " + str(sim.table) + "\n")
+    if sim.checkpoint:
+        fi.write("checkpoint  " + str(sim.checkpoint) + "  " + 
+                 sim.checkpointfile + "\n")
+    if sim.seriesfile:
+        fi.write("timeseries  " + sim.seriesfile + "\n")
+    if sim.autoeq: fi.write("autoeq      " + str(sim.autoeq) + "\n")
+    if sim.npt:
+        fi.write("npt         " + str(sim.pressure) + "  " + str(sim.dv) + 
+                 "\n")
+    if sim.hybrid: fi.write("hybrid      " + str(sim.hybrid) + "\n")
+    if sim.eventchain: fi.write("eventchain\n")
+    if sim.checkerboard: fi.write("checkerboard\n")
+    if sim.widom:
+        fi.write("widom       " + str(sim.widom) + "  " + str(sim.ninsert) + 
+                 "\n")
+    if sim.reweight:
+        fi.write("reweight    " + str(sim.reweight) + "  " + sim.rwfile + "\n")
+    if sim.target.any():
+        fi.write("target_error")
+        for name, value in zip(names, sim.target):
+            if value > 0.0: fi.write("  " + name + "  " + str(value))
+        fi.write("\n")
+    if sim.swap:
+        fi.write("tempering   " + str(sim.swap) + "  " + 
+                 "  ".join(str(T) for T in sim.ladder) + "\n")
+    if sim.restartfile:
+        fi.write("restart     " + sim.restartfile + "\n")
     fi.write("\n")
 
     fi.write("    ***Calculated Parameters***\n")
@@ -104,21 +152,26 @@ def initializefiles(sim,atom):
     fi.write("Half Box Length:            {:.8f}\n".format(sim.length/2.0))
     fi.write("Energy Tail Correction:    {:.8f}\n".format(sim.utail))
     fi.write("Pressure Tail Correction:  {:.8f}\n".format(sim.ptail))
+    if sim.neighbor == "cell":
+        fi.write("Cells per Side:             {}\n".format(sim.ncell))
+        if sim.ncell < 3:
+            fi.write("The box is too small for three cells per side, so " +
+                     "all pairs are looped over.\n")
+    if sim.potential == "wca":
+        fi.write("The cutoff of the WCA potential is 2^(1/6).\n")
+    if sim.table:
+        fi.write("Table Spacing in r^2:       {:.8e}\n".format(1.0/sim.tabinv))
 
     fi.write("\n    ***INITIAL POSITIONS, XYZ Format***\n")
     fi.write(str(sim.N) + "\nYou can copy these coordinates to a file to " +
              "open in a viewer.\n")
-    for i in range(sim.N):
-        fi.write("C\t{:13.6f}\t{:13.6f}\t{:13.6f}\n".format(atom[i].x, \
-                                                            atom[i].y, \
-                                                            atom[i].z))
+    for x, y, z in atom.r:
+        fi.write("C\t{:13.6f}\t{:13.6f}\t{:13.6f}\n".format(x, y, z))
 
     if sim.method == "md":
         fi.write("\n         ***INITIAL VELOCITIES***\n");
-        for i in range(sim.N):
-            fi.write("\t{:13.6f}\t{:13.6f}\t{:13.6f}\n".format(atom[i].vx, \
-                                                               atom[i].vy, \
-                                                               atom[i].vz))
+        for vx, vy, vz in atom.v:
+            fi.write("\t{:13.6f}\t{:13.6f}\t{:13.6f}\n".format(vx, vy, vz))
         fi.write("\n\nIteration                T              T Ave.       " +
                  "       P              P Ave.            KE               " +
                  "PE               TE\n\n")
@@ -129,6 +182,24 @@ def initializefiles(sim,atom):
         fi.write("{:<13}    {:13.6f}    {:13.6f}    {:13.6f}    {:13.6f}    " \
              "{:13.6f}    {:13.6f}    {:13.6f}\n".format(0, T, T, P, P, ke/sim.N, \
                      pe/sim.N + sim.utail, (ke + pe)/sim.N + sim.utail))
+    elif sim.swap:
+        # The energy of the replica at each temperature. All the replicas 
+        # start from the same positions. The energy is found with one thread
+        # because the threads of numba are not started until the workers 
+        # of the replicas are forked (see src/simulate.py).
+        fi.write("\n\nIteration    " + "".join("{:>17}".format( 
+                 "PE T={:.4g}".format(T)) for T in sim.ladder) + "\n\n")
+        pe, virial = forces_serial(sim, atom)
+        fi.write("{:<13}".format(0) + "    {:13.6f}".format(pe/sim.N + 
+                 sim.utail)*len(sim.ladder) + "\n")
+    elif sim.npt:
+        fi.write("\n\nIteration                P              P Ave. " +
+                       "            Rho               PE\n\n")
+        # Determine the initial properties (Iteration 0) and write to file.
+        pe, virial = forces(sim, atom)
+        P=sim.rho*sim.T + 1.0/3.0/sim.length**3.0*virial + sim.ptail
+        fi.write("{:<13}    {:13.6f}    {:13.6f}    {:13.6f}    {:13.6f}\n" \
+                 .format(0, P, P, sim.rho, pe/sim.N + sim.utail))
     else: 
         fi.write("\n\nIteration                P              P Ave. " +
                        "             PE\n\n")
@@ -36,18 +36,16 @@ lattice.
 # Import relevant libraries
 import sys, os
 import numpy as np
-from src.ljpyclasses import site
-from numba.typed import List
-from numba import njit
+from src.ljpyclasses import particles
 
 # This function is passed a simulation object from the main program
-# It returns a list of objects of type sites which is all the atoms (sites)
+# It returns a particles object which holds all the atoms (sites)
 # in the system.
-#@njit()
 def initializepositions(sim):
-    # initialize the atom list
-    atom=List() # This line "declares" the list for numba.
-    #atom=[] # This line is regular python.
+    # initialize the particles object. Velocities are only stored for md
+    # and Hybrid MC.
+    atom=particles(sim.N, sim.method == "md" or sim.hybrid > 0)
+    r=atom.r # the positions as a numpy array (no copy is made)
     
     # If the input file specificies "generate", then place the 
     # specified number of particles on a lattice.
@@ -70,26 +68,25 @@ def initializepositions(sim):
                 for xdir in range(nlin):
                     for i in range(4):
                         if particle == sim.N: return(atom)
-                        atom.append(site())
                         if case == 0:
-                            atom[particle].x=0.0+xdir*a
-                            atom[particle].y=0.0+ydir*a
-                            atom[particle].z=0.0+zdir*a
+                            r[particle,0]=0.0+xdir*a
+                            r[particle,1]=0.0+ydir*a
+                            r[particle,2]=0.0+zdir*a
                             case=1
                         elif case == 1:
-                            atom[particle].x=0.0+xdir*a
-                            atom[particle].y=0.5*a+ydir*a
-                            atom[particle].z=0.5*a+zdir*a
+                            r[particle,0]=0.0+xdir*a
+                            r[particle,1]=0.5*a+ydir*a
+                            r[particle,2]=0.5*a+zdir*a
                             case=2
                         elif case == 2:
-                            atom[particle].x=0.5*a+xdir*a
-                            atom[particle].y=0.0+ydir*a
-                            atom[particle].z=0.5*a+zdir*a
+                            r[particle,0]=0.5*a+xdir*a
+                            r[particle,1]=0.0+ydir*a
+                            r[particle,2]=0.5*a+zdir*a
                             case=3
                         else:
-                            atom[particle].x=0.5*a+xdir*a
-                            atom[particle].y=0.5*a+ydir*a
-                            atom[particle].z=0.0+zdir*a
+                            r[particle,0]=0.5*a+xdir*a
+                            r[particle,1]=0.5*a+ydir*a
+                            r[particle,2]=0.0+zdir*a
                             case=0
                         particle=particle + 1
     # If a file with coordinates is supplied, read the positions.
@@ -103,15 +100,16 @@ def initializepositions(sim):
         # Open the file with the 
         fp=open(sim.icoord)
         
-        # Define a counter for the number of particles
+        # Define a counter for the number of particles and a list
+        # to hold the coordinates
         particle = 0
+        xyzlist = []
 
-        # Loop around the lines in the file and assign the positions
+        # Loop around the lines in the file and read the positions
         while True:
             line=fp.readline()
             # break if there is a blank line or the end of file
             if not line: break
-            atom.append(site())
             xyz = line.split()
             if len(xyz) != 3:
                 sys.exit("There is a problem with the coordinates for " +
@@ -119,9 +117,8 @@ def initializepositions(sim):
                          "\"\n")
             else:
                 try:
-                    atom[particle].x = np.float64(xyz[0])
-                    atom[particle].y = np.float64(xyz[1])
-                    atom[particle].z = np.float64(xyz[2])
+                    xyzlist.append([np.float64(xyz[0]), np.float64(xyz[1]), 
+                                    np.float64(xyz[2])])
                 except ValueError:
                     sys.exit("There is a problem with the coordinates for " +
                              "atom " + str(particle+1) + " in \"" + 
@@ -136,6 +133,9 @@ def initializepositions(sim):
                      "in \"" + sim.icoord + "\" is not equal to the number " +
                      "of atoms " + "(" + str(sim.N) + ") in \"" + 
                      sim.inputfile + "\"\n")
+        
+        # Assign the positions
+        r[:,:]=xyzlist
     
     return(atom)
                 
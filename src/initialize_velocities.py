@@ -35,25 +35,27 @@ to the desired temperature of the simulation.
 """
 
 # Import relevant libraries
-import sys, os, random
+import sys, os
 import numpy as np
 from src.momentum_correct import zeromomentum
 from src.kinetic import temperature
 from src.scale_velocities import scalevelocities
+from src.rng import stream, draws, ivel
 
 
-# This function is passed a simulation object and a list of site objects
+# This function is passed a simulation object and a particles object
 # from the main program. It sets the velocities of each particle in the
-# site object.
+# particles object.
 def initializevelocities(sim,atom):
+    v=atom.v # the velocities as a numpy array (no copy is made)
+    
     # If the input file specificies "generate" or the vel keywork is
     # omitted, then randomly generate the velocities
     if sim.ivel == "generate" or sim.ivel == "":
-        # Loop around the sites and assign random velocities from -1.0 to 1.0  
-        for i in range(sim.N):
-            atom[i].vx=random.uniform(-1, 1)
-            atom[i].vy=random.uniform(-1, 1)
-            atom[i].vz=random.uniform(-1, 1)
+        # Assign random velocities from -1.0 to 1.0 to the sites with the
+        # numbers of the stream of the velocities, drawn all at once
+        rng=stream(sim.seed, ivel, 3*sim.N)
+        v[:,:]=2.0*draws(rng, 3*sim.N).reshape(sim.N, 3) - 1.0
             
         # Zero out the linear momentum
         momentum_flag=zeromomentum(atom)
@@ -77,10 +79,12 @@ def initializevelocities(sim,atom):
         # Open the file with the 
         fp=open(sim.ivel)
         
-        # Define a counter for the number of particles
+        # Define a counter for the number of particles and a list
+        # to hold the velocities
         particle = 0
+        xyzlist = []
 
-        # Loop around the lines in the file and assign the velocities
+        # Loop around the lines in the file and read the velocities
         while True:
             line=fp.readline()
             # break if there is a blank line or the end of file
@@ -92,9 +96,8 @@ def initializevelocities(sim,atom):
                          "\"\n")
             else:
                 try:
-                    atom[particle].vx = np.float64(xyz[0])
-                    atom[particle].vy = np.float64(xyz[1])
-                    atom[particle].vz = np.float64(xyz[2])
+                    xyzlist.append([np.float64(xyz[0]), np.float64(xyz[1]), 
+                                    np.float64(xyz[2])])
                 except ValueError:
                     sys.exit("There is a problem with the velocities for " +
                              "atom " + str(particle+1) + " in \"" + 
@@ -108,4 +111,7 @@ def initializevelocities(sim,atom):
             sys.exit("The number of velocities (" + str(particle) + ") " + 
                      "in \"" + sim.ivel + "\" is not equal to the number " +
                      "of atoms " + "(" + str(sim.N) + ") in \"" + 
-                     sim.inputfile + "\"\n")
\ No newline at end of file
+                     sim.inputfile + "\"\n")
+        
+        # Assign the velocities
+        v[:,:]=xyzlist
\ No newline at end of file
@@ -0,0 +1,170 @@
+# jit_cache is part of ljpy for Lennard Jones simulations.                  #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# jit_cache.py                                                            	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It manages the on-disk cache of the compiled
+kernels. Every kernel is compiled with cache=True, so numba saves the machine
+code in a directory of src/__pycache__ (or of NUMBA_CACHE_DIR if it is set)
+the first time a kernel is used and later runs load it from disk instead of
+compiling it again.
+
+Two things are needed for this to work.
+
+    1.  numba names the type of a jitclass with the id of the class, which
+        changes every time python starts, so a kernel that is passed a 
+        jitclass would never be found in the cache. The cacheable decorator
+        removes the id from the name. The name still holds the name of the
+        class and all its fields, so it only changes when the class does.
+        This changes a field of a numba type, which numba does not document,
+        so cacheable checks the result. If a later version of numba names 
+        the types another way, it warns that the kernels will be compiled in
+        every run instead of failing silently. Two classes with the same 
+        name and fields would share cached code, so this is an error.
+    2.  numba only checks the file that holds a kernel to decide if the 
+        cached code is stale, but the kernels call kernels in other files.
+        checkcache names the directory of the cache after a hash of all the
+        source files of ljpy, so a change to any of them starts a new cache.
+        Runs of the same source share the directory and never delete its 
+        files, so simulations can run at the same time (a sweep or jobs on
+        a cluster) and numba writes each file in one step. The directories
+        of older sources are removed when a new one is made. checkcache is
+        called when the src package is imported because numba chooses the
+        directory when a kernel is defined.
+
+The time spent compiling is measured with a compiletimer so a run can report
+whether it started cold (kernels compiled) or warm (kernels loaded). Only the
+kernels are cached. numba compiles the constructors of the classes and a 
+small function for every field of a class that is used from python in every
+run and can not save them, so a warm start still spends several seconds 
+compiling. The timer reports this time separately.
+"""
+
+# Import relevant libraries
+import os, glob, hashlib, shutil, time, warnings
+from numba.core import config, event
+from numba.core.caching import NullCache
+
+srcdir=os.path.dirname(os.path.abspath(__file__))
+cachedir=config.CACHE_DIR or os.path.join(srcdir, "__pycache__")
+
+# The classes made cacheable by the name of their type
+cacheables={}
+
+# This function is passed a jitclass. It removes the id of the class from
+# the name of its type so that kernels passed the class can be cached.
+# It returns the class.
+def cacheable(cls):
+    ct=cls.class_type
+    hexid="{:x}".format(id(ct))
+    ct.name=ct.name.replace("#" + hexid, "")
+    # The key of the type of an instance is what numba compares when it 
+    # looks up a kernel in the cache
+    if hexid in str(ct.instance_type.key):
+        warnings.warn("numba names the type of the class " + ct.class_name +
+                      " in a way ljpy does not expect, so the kernels that "
+                      "are passed it will be compiled in every run.")
+    elif cacheables.setdefault(ct.name, cls) is not cls:
+        raise TypeError("Two classes named " + ct.class_name + " have the " +
+                        "same fields and can not both be cached.")
+    return(cls)
+
+# This function returns a hash of all the source files of ljpy.
+def sourcestamp():
+    h=hashlib.sha1()
+    for name in sorted(glob.glob(os.path.join(srcdir, "*.py"))):
+        with open(name, "rb") as fp: h.update(fp.read())
+    return(h.hexdigest())
+
+# This function is passed the directory of the cache of the current source
+# files. It removes the caches of all other sources and the files of the
+# cache used before the directories were named after the source.
+def clearcache(keep):
+    for name in glob.glob(os.path.join(cachedir, "ljpy_kernels_*")):
+        if os.path.abspath(name) != os.path.abspath(keep):
+            shutil.rmtree(name, ignore_errors=True)
+    old=glob.glob(os.path.join(srcdir, "__pycache__", "*.nb[ic]"))
+    for name in old + [os.path.join(srcdir, "__pycache__", 
+                                    "ljpy_kernels.stamp")]:
+        try: os.remove(name)
+        except OSError: pass
+
+# This function points numba to the directory of the cache of the current
+# source files, which is made if it does not exist yet. It returns the
+# directory.
+def checkcache():
+    kerneldir=os.path.join(cachedir, "ljpy_kernels_" + sourcestamp()[:16])
+    if not os.path.isdir(kerneldir):
+        os.makedirs(kerneldir, exist_ok=True)
+        clearcache(kerneldir)
+    config.CACHE_DIR=kerneldir
+    return(kerneldir)
+
+# The class that measures the time numba spends compiling. Only the outermost
+# compile is timed because compiling a kernel also compiles the kernels it
+# calls. Kernels loaded from the cache are not compiled and are not counted.
+# The time is split between the cacheable kernels and the functions numba
+# can not cache, which are the constructors and fields of the classes.
+class compiletimer(event.Listener):
+    def __init__(self):
+        # depth is the number of compiles in progress
+        # duration is the total time spent compiling
+        # classes is the time spent compiling functions that can not be cached
+        # nkernels is the number of cacheable kernels that were compiled
+        self.depth=0
+        self.duration=0.0
+        self.classes=0.0
+        self.nkernels=0
+        event.register("numba:compile", self)
+
+    def on_start(self, ev):
+        cached=not isinstance(ev.data["dispatcher"]._cache, NullCache)
+        if self.depth == 0: self.t0, self.outer = time.perf_counter(), cached
+        self.depth+=1
+        if cached: self.nkernels+=1
+
+    def on_end(self, ev):
+        self.depth-=1
+        if self.depth == 0: 
+            dt=time.perf_counter()-self.t0
+            self.duration+=dt
+            if not self.outer: self.classes+=dt
+
+    # This function stops the timer.
+    def stop(self):
+        event.unregister("numba:compile", self)
+
+    # This function returns True if no kernels had to be compiled, which 
+    # means they were all loaded from the cache (a warm start). The 
+    # functions of the classes are compiled in a warm start too.
+    def warm(self):
+        return(self.nkernels == 0)
+
+    # This function returns the time spent compiling the kernels, which is
+    # zero for a warm start.
+    def kernels(self):
+        return(self.duration - self.classes)
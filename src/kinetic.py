@@ -32,37 +32,42 @@ kinetic energy of the system, one returns the temperature of the system, and
 one returns both the kinetic energy and the temperature.
 """
 
-# This function is passed a list of site objects.
+# Import relevant libraries
+from numba import njit
+
+# This function is passed a particles object.
 # It returns the kinetic energy of the system.
+@njit(cache=True)
 def kinetic_energy(atom):
-    # Determine the number of particles
-    N=len(atom)
+    v=atom.v
     
     # Zero out the accumulator for the energy
     ke=0.0
-    # Loop around the farticls to calculate the kinetic energy
-    for i in range(N):
-        v2=atom[i].vx*atom[i].vx + atom[i].vy*atom[i].vy + \
-           atom[i].vz*atom[i].vz
+    # Loop around the particles to calculate the kinetic energy
+    # The dimensionless mass is equal to 1.
+    for i in range(atom.N):
+        v2=v[i,0]*v[i,0] + v[i,1]*v[i,1] + v[i,2]*v[i,2]
         ke=ke+0.5*v2
     
     return(ke)
 
-# This function is passed the a list of site objects.
+# This function is passed a particles object.
 # It returns the temperature of the system.
+@njit(cache=True)
 def temperature(atom):
     # Determine the number of particles
-    N=len(atom)
+    N=atom.N
     # Calculate the temperature from the kinetic energy
     T=2.0/3.0/N*kinetic_energy(atom)
     return(T)
 
-# This function is passed the a list of site objects.
+# This function is passed a particles object.
 # It returns a tuple with the kinetic energy and the temperature of
 # the system.
+@njit(cache=True)
 def ke_and_T(atom):
     # Determine the number of particles
-    N=len(atom)
+    N=atom.N
     # Calculate the kinetic energy of the system.
     ke=kinetic_energy(atom)
     # Calculate the temperature from the kinetic energy
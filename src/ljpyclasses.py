@@ -30,8 +30,10 @@
 This module is part of ljpy. It defines the classes needed for simulations. 
 Three classes are defined.
 
-    site:       a class that holds the information for each site (atom) in the 
-                system such as x,y,z, position, x,y,z velocities, etc.
+    particles:  a class that holds the information for all the sites (atoms)
+                in the system such as the x,y,z positions, x,y,z velocities,
+                etc. Each quantity is stored as one contiguous array with 
+                one row per site.
     simualtion: a class that holds the information for the simulation as read
                 from the input file such as number of particles, temperature
                 density, etc.
@@ -40,12 +42,12 @@ Three classes are defined.
 """
 # The code below is the use numba to speed up the calculation
 # of the loops.
+import numpy as np
 import numba as nb
-site_spec = [('x',nb.float64),  ('y',nb.float64), ('z',nb.float64),                    \
-             ('vx',nb.float64), ('vy',nb.float64), ('vz',nb.float64),                  \
-             ('fx',nb.float64), ('fy',nb.float64), ('fz',nb.float64),                  \
-             ('dx',nb.float64), ('dy',nb.float64), ('dz',nb.float64),                  \
-             ('dr2',nb.float64), ('pe',nb.float64)]
+from src.jit_cache import cacheable
+from src.blocking import nprop
+particle_spec = [('N',nb.int64), ('r',nb.float64[:,:]), ('v',nb.float64[:,:]),        \
+                 ('f',nb.float64[:,:]), ('d',nb.float64[:,:])]
 
 sim_spec = [('method',nb.types.unicode_type), ('T',nb.float64),                        \
             ('rho', nb.float64), ('N',nb.int64), ('eq',nb.int64),                      \
@@ -57,33 +59,45 @@ sim_spec = [('method',nb.types.unicode_type), ('T',nb.float64),
             ('moviefile',nb.types.unicode_type), ('utail',nb.float64),                 \
             ('ptail',nb.float64), ('seed',nb.int64),                                   \
             ('seedkeyvalue',nb.types.unicode_type), ('rdfmin',nb.float64),             \
-            ('rdfmax',nb.float64), ('rdfN',nb.int64), ('rdf',nb.int64)]
+            ('rdfmax',nb.float64), ('rdfN',nb.int64), ('rdf',nb.int64),                \
+            ('neighbor',nb.types.unicode_type), ('ncell',nb.int64),                    \
+            ('skin',nb.float64), ('nthreads',nb.int64),                                \
+            ('potential',nb.types.unicode_type), ('mie_n',nb.float64),                 \
+            ('mie_m',nb.float64), ('table',nb.int64), ('tabinv',nb.float64),           \
+            ('tab',nb.float64[:,:]), ('checkpoint',nb.int64),                          \
+            ('checkpointfile',nb.types.unicode_type),                                  \
+            ('restartfile',nb.types.unicode_type),                                     \
+            ('seriesfile',nb.types.unicode_type), ('target',nb.float64[:]),            \
+            ('autoeq',nb.int64), ('ladder',nb.float64[:]), ('swap',nb.int64),          \
+            ('reweight',nb.int64), ('rwfile',nb.types.unicode_type),                   \
+            ('npt',nb.int64), ('pressure',nb.float64), ('dv',nb.float64),              \
+            ('widom',nb.int64), ('ninsert',nb.int64),                                  \
+            ('hybrid',nb.int64), ('eventchain',nb.int64),                              \
+            ('checkerboard',nb.int64)]
 
 prop_spec = [('ke',nb.float64),  ('pe',nb.float64), ('pe2',nb.float64),                \
              ('T',nb.float64), ('virial',nb.float64), ('naccept',nb.int64),            \
-             ('ntry',nb.int64), ('Nhist',nb.int64)]
+             ('ntry',nb.int64), ('Nhist',nb.int64), ('drift',nb.float64),              \
+             ('nvaccept',nb.int64), ('nvtry',nb.int64), ('nleave',nb.int64)]
 
 
-# The class for each site in the system
-@nb.experimental.jitclass(site_spec)
-class site:
-    def __init__(self):
-        self.x=0.0      # x position
-        self.y=0.0      # y position
-        self.z=0.0      # z position
-        self.vx=0.0     # x velocity
-        self.vy=0.0     # y velocity
-        self.vz=0.0     # z velocity
-        self.fx=0.0     # x force
-        self.fy=0.0     # y force
-        self.fz=0.0     # z force
-        self.dx=0.0     # x displacement for diffusion (MD)
-        self.dy=0.0     # y displacement for diffusion (MD)
-        self.dz=0.0     # z displayement for diffusion (MD)   
-        self.dr2=0.0    # MSD accumulator for diffusion (MD)
-        self.pe=0.0     # potential energy of site (MC)
+# The class for all the sites in the system. Row i of each array belongs
+# to site i and the columns are the x, y, and z components. Only the arrays
+# needed by the simulation method are allocated; the others have no rows.
+# The arrays can be used directly as numpy arrays without a copy.
+@cacheable
+@nb.experimental.jitclass(particle_spec)
+class particles:
+    def __init__(self, N, md):
+        nmd=N if md else 0              # rows for arrays only used in MD
+        self.N=N                        # number of sites
+        self.r=np.zeros((N,3))          # positions
+        self.v=np.zeros((nmd,3))        # velocities (MD)
+        self.f=np.zeros((N,3))          # forces
+        self.d=np.zeros((nmd,3))        # displacements for diffusion (MD)
 
 # The class to hold the simulation information
+@cacheable
 @nb.experimental.jitclass(sim_spec)
 class simulation:
     def __init__(self):
@@ -113,8 +127,37 @@ class simulation:
         self.rdfmax=0.0         # maximum r value for rdf
         self.rdfN=0             # number of bins for rdf
         self.rdf=0              # frequency to accumulate the rdf
+        self.neighbor=''      # method to find pairs (allpairs, cell, verlet)
+        self.ncell=0            # number of cells per side for cell list
+        self.skin=0.0           # skin of the verlet neighbor list
+        self.nthreads=1         # number of threads for the pair loops
+        self.potential=''     # pair potential (lj, wca, lj-sf, mie)
+        self.mie_n=12.0         # repulsive exponent of the mie potential
+        self.mie_m=6.0          # attractive exponent of the mie potential
+        self.table=0            # number of points in the potential table
+        self.tabinv=0.0         # inverse of the r^2 spacing of the table
+        self.tab=np.zeros((0,2)) # energy and force/r at each table point
+        self.checkpoint=0       # interval for writing checkpoints
+        self.checkpointfile='' # name of checkpoint file
+        self.restartfile=''   # name of checkpoint file to restart from
+        self.seriesfile=''    # name of .npy file for the output time series
+        self.target=np.zeros(nprop) # target errors to end production early
+        self.autoeq=0           # interval for samples to detect equilibration
+        self.ladder=np.zeros(0) # temperatures of parallel tempering replicas
+        self.swap=0             # interval for parallel tempering swaps
+        self.reweight=0         # interval for samples for reweighting (MC)
+        self.rwfile=''        # name of .npz file for the reweighting samples
+        self.npt=0              # 1 for constant pressure MC and 0 otherwise
+        self.pressure=0.0       # pressure of NPT MC [P*]
+        self.dv=0.0             # max change of ln(volume) for NPT MC
+        self.widom=0            # interval for Widom insertions
+        self.ninsert=0          # number of ghosts inserted per frame
+        self.hybrid=0           # number of time steps of a Hybrid MC step
+        self.eventchain=0       # 1 for event-chain MC and 0 otherwise
+        self.checkerboard=0     # 1 for parallel MC sweeps on a checkerboard
 
 # The class to hold the simulation properties
+@cacheable
 @nb.experimental.jitclass(prop_spec)
 class props:
     def __init__(self):
@@ -125,4 +168,8 @@ class props:
         self.virial=0.0         # virial for pressure
         self.naccept=0          # number of mc moves accepted
         self.ntry=0             # number of mc moves tried
-        self.Nhist=0            # number of times accumulated
\ No newline at end of file
+        self.Nhist=0            # number of times accumulated
+        self.drift=0.0          # largest drift of running pe per site (MC)
+        self.nvaccept=0         # number of volume moves accepted (NPT MC)
+        self.nvtry=0            # number of volume moves tried (NPT MC)
+        self.nleave=0           # number of moves leaving a checkerboard cell
\ No newline at end of file
@@ -32,12 +32,13 @@ see if the linear momentrum of the box is zero. Thd second adjusts the
 velocities to ensure that the linear momentum is zero.
 """
 
-# This function is passed a list of site objects.
+# This function is passed a particles object.
 # It returns 0 if the linear momentum is zero (or close to zero)
 # It returns 1 if the linear momentum is not zero
 def checkmomentum(atom):
     # Determine the number of particles
-    N=len(atom)
+    N=atom.N
+    v=atom.v # the velocities as a numpy array
     
     # Zero out the momentum counters
     vcumx=0.0
@@ -48,20 +49,21 @@ def checkmomentum(atom):
     # The dimensionless mass is equal to 1, so the momentum of each 
     # atom is equal to its velocity.
     for i in range(N):
-        vcumx=vcumx+atom[i].vx
-        vcumy=vcumy+atom[i].vy
-        vcumz=vcumz+atom[i].vz
+        vcumx=vcumx+v[i,0]
+        vcumy=vcumy+v[i,1]
+        vcumz=vcumz+v[i,2]
     if(vcumx+vcumy+vcumz)< 10.0**-10.0: return(0)
     else: return(1)
 
 
-# This function is passed a list of site objectss.
+# This function is passed a particles object.
 # It attemps to zero out the linear momentum.
 # It returns 0 if the linear momentum is zero (or close to zero)
 # It returns 1 if the linear momentum is not zero    
 def zeromomentum(atom):
     # Determine the number of particles
-    N=len(atom)
+    N=atom.N
+    v=atom.v # the velocities as a numpy array
     
     # Zero out the momentum counters
     vcumx=0.0
@@ -72,17 +74,17 @@ def zeromomentum(atom):
     # The dimensionless mass is equal to 1, so the momentum of each 
     # atom is equal to its velocity.
     for i in range(N):
-        vcumx=vcumx+atom[i].vx
-        vcumy=vcumy+atom[i].vy
-        vcumz=vcumz+atom[i].vz
+        vcumx=vcumx+v[i,0]
+        vcumy=vcumy+v[i,1]
+        vcumz=vcumz+v[i,2]
     vcumx=vcumx/N
     vcumy=vcumy/N
     vcumz=vcumz/N
     
     for i in range(N):
-        atom[i].vx=atom[i].vx-vcumx    
-        atom[i].vy=atom[i].vy-vcumy
-        atom[i].vz=atom[i].vz-vcumz
+        v[i,0]=v[i,0]-vcumx    
+        v[i,1]=v[i,1]-vcumy
+        v[i,2]=v[i,2]-vcumz
         
     return(checkmomentum(atom))
     
\ No newline at end of file
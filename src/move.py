@@ -30,38 +30,60 @@
 This module is part of ljpy. It has a function that generates a random
 displacement on a random particle, calculates the new energy, and accepts
 or rejects the new position according to the Metropolis criterion.  It is
-the main propogation subroutine for an MC simulation.    
+the main propogation subroutine for an MC simulation. It also has a function
+that performs many MC sweeps in compiled code so that the driver is only
+returned to when output is needed.
+
+Only the energy and virial of the moved particle are calculated for a move.
+When a move is accepted, the change is added to the running totals of the
+energy and virial of the system held in the instantaneous property object,
+so the system is never recalculated from scratch during a move.
+
+NPT MC (keyword npt) also changes the volume once per sweep. The change is
+a random walk in ln(V), and all the positions and the box are scaled by the
+same factor s while the cutoff radius stays the value of the input file. 
+The trial is accepted in two stages (delayed acceptance, Christen and Fox,
+J. Comput. Graph. Stat. 14, 795, 2005). The first stage uses an estimate of
+the energy of the trial volume from the sums of the r^-12 and r^-6 terms, 
+which are found from the running energy and virial and are scaled by s^-12
+and s^-6, so it costs a few operations. Most trials are rejected by it. The
+estimate misses the pairs that cross the cutoff, so a trial that passes is
+recalculated for all the pairs and accepted with the Metropolis factor of 
+the difference between the exact and estimated changes of the enthalpy. 
+The product of the two stages keeps detailed balance for the exact energy.
+The cell list is rebuilt when the box gains or loses a cell per side.
 """
 
 # Import relevant libraries
-import random
 import numpy as np
-from src.atomic_pe import atomic_pe
+from src.atomic_pe import atomic_pe_move
+from src.cell_list import cell_index, move_mccells, cells_per_side, \
+                          resize_mccells
 from src.forces import forces
+from src.scale_delta import scale_delta, scale_dv
+from src.potential import lj_tails
+from src.blocking import add, ipe, ike, iT, iP, ivirial, irho
+from src.rng import uniform, randint
 from numba import njit
 
-# This function accepts a simulation object, a list of site objects, the
-# current state of the random number generator, and a property object.
+# Number of sweeps (volume moves) between changes of the maximum change of
+# the volume of NPT MC
+freq_scale_dv=10
+
+# This function accepts a simulation object, a particles object, an MC cell
+# list, a stream of random numbers, and a property object.
 # It returns True if the move is accepted. It returns False if the move is
 # rejected.
-@njit
-def move(sim, atom, iprop):
-    # Set the state of the random number generator
-    
+@njit(cache=True)
+def move(sim, atom, cl, rng, iprop):
     # Select a random particle
     iprop.ntry+=1
-    particle=random.randint(0, sim.N-1)
-    
-    # Save the current (old) position of the system in case
-    # the move is not accepted 
-    xold=atom[particle].x
-    yold=atom[particle].y
-    zold=atom[particle].z
+    particle=randint(rng, 0, sim.N-1)
                            
     # Propose a new move                        
-    xnew=atom[particle].x + random.uniform(-1, 1)*sim.dt
-    ynew=atom[particle].y + random.uniform(-1, 1)*sim.dt
-    znew=atom[particle].z + random.uniform(-1, 1)*sim.dt
+    xnew=atom.r[particle,0] + uniform(rng, -1, 1)*sim.dt
+    ynew=atom.r[particle,1] + uniform(rng, -1, 1)*sim.dt
+    znew=atom.r[particle,2] + uniform(rng, -1, 1)*sim.dt
 
     # Apply periodic boundary conditions
     if xnew<0.0: 
@@ -79,29 +101,147 @@ def move(sim, atom, iprop):
     elif znew > sim.length:
         znew-=sim.length
     
-    # Calculate the energy of the proposed move
-    atom[particle].x=xnew
-    atom[particle].y=ynew
-    atom[particle].z=znew
-    penew=atomic_pe(sim, atom, particle)
+    # Calculate the energy and virial of the particle at the old
+    # and proposed positions
+    peold, penew, wold, wnew = atomic_pe_move(sim, atom, cl, particle, 
+                                              xnew, ynew, znew)
     
     # Calculate the different in energy between the 
     # proposed and old state of the system
-    de=penew-atom[particle].pe
+    de=penew-peold
     
     # Accept/Reject the move
-    if random.uniform(0,1) < np.exp(-de/sim.T): # accept
+    if uniform(rng, 0, 1) < np.exp(-de/sim.T): # accept
         iprop.naccept+=1
-        iprop.pe, iprop.virial=forces(sim, atom)
+        atom.r[particle,0]=xnew
+        atom.r[particle,1]=ynew
+        atom.r[particle,2]=znew
+        # move the particle to its new cell
+        if cl.ncell >= 3:
+            move_mccells(cl, particle, cell_index(cl.ncell, sim.length, 
+                                                  xnew, ynew, znew))
+        # update the running totals of the system
+        iprop.pe+=de
+        iprop.virial+=wnew-wold
         iprop.pe2=iprop.pe*iprop.pe
-        atom[particle].pe=penew # set "current" site pe to new pe 
         return(True)
     else: #reject
-        # revert the positions to the "old" or previous state
-        atom[particle].x=xold
-        atom[particle].y=yold
-        atom[particle].z=zold
+        # the positions were not changed, so nothing needs to be reverted
         return(False)
+
+# This function is passed a particles object, the number of sites, the box
+# length, and a factor. It scales the positions by the factor and puts back 
+# in the box a site that rounding put on its far wall.
+@njit(cache=True)
+def scale_positions(atom, N, length, s):
+    r=atom.r
+    for i in range(N):
+        for k in range(3):
+            r[i,k]*=s
+            if r[i,k] >= length: r[i,k]-=length
+
+# This function accepts a simulation object, a particles object, an MC cell
+# list, a stream of random numbers, and a property object. It proposes a 
+# change of the volume of NPT MC and accepts or rejects it in two stages,
+# first with the scaled sums of the r^-12 and r^-6 terms and then with the 
+# energy of all the pairs, by the Metropolis criterion of the 
+# isothermal-isobaric ensemble. It returns True if the move is accepted. It
+# returns False if the move is rejected.
+@njit(cache=True)
+def volume(sim, atom, cl, rng, iprop):
+    # Propose a new volume and the factor that scales the lengths
+    iprop.nvtry+=1
+    dlnv=uniform(rng, -1, 1)*sim.dv
+    s=np.exp(dlnv/3.0)
+    xi1=uniform(rng, 0, 1)
+    xi2=uniform(rng, 0, 1)
     
+    # The cutoff radius must stay less than half the box length
+    if sim.rc >= 0.5*sim.length*s: return(False)
     
-    
\ No newline at end of file
+    # The tail corrections and the pV term change with the volume
+    lold=sim.length
+    V=lold**3.0
+    rhonew=sim.rho/(s*s*s)
+    utail, ptail = lj_tails(rhonew, sim.rc)
+    dhbox=sim.N*(utail - sim.utail) + sim.pressure*V*(np.exp(dlnv) - 1.0)
+    
+    # First stage: the energy of the trial volume estimated from the sums of
+    # the r^-12 and r^-6 terms, since u=4(r^-12 - r^-6) and the virial of
+    # a pair is 48r^-12 - 24r^-6
+    s12=(iprop.virial - 6.0*iprop.pe)/24.0
+    s6=s12 - 0.25*iprop.pe
+    s2=s*s
+    s6new=s6/(s2*s2*s2)
+    peapprox=4.0*(s12/(s2*s2*s2*s2*s2*s2) - s6new)
+    dhapprox=peapprox - iprop.pe + dhbox
+    if not xi1 < np.exp(-dhapprox/sim.T + (sim.N + 1)*dlnv): return(False)
+    
+    # Second stage: scale the positions and the box and calculate the 
+    # energy and virial of the trial volume for all the pairs
+    ncold=sim.ncell
+    sim.length=lold*s
+    scale_positions(atom, sim.N, sim.length, s)
+    sim.ncell=cells_per_side(sim.length, sim.rc)
+    penew, wnew = forces(sim, atom)
+    dh=penew - iprop.pe + dhbox
+    
+    # Accept/Reject the move with the error of the estimate
+    if xi2 < np.exp(-(dh - dhapprox)/sim.T): # accept
+        iprop.nvaccept+=1
+        sim.rho=rhonew
+        sim.utail=utail
+        sim.ptail=ptail
+        iprop.pe=penew
+        iprop.virial=wnew
+        iprop.pe2=penew*penew
+        # The cells scale with the box unless it gained or lost a cell
+        if sim.neighbor == "cell" and sim.ncell != ncold:
+            resize_mccells(sim, atom, cl, sim.ncell)
+        return(True)
+    else: #reject
+        sim.length=lold
+        scale_positions(atom, sim.N, lold, 1.0/s)
+        sim.ncell=ncold
+        return(False)
+
+# This function is passed a simulation object, a particles object, an MC
+# cell list, a stream of random numbers, the instantaneous and average 
+# property objects, a blocks object for the errors, the number of the first
+# sweep, the number of sweeps to 
+# perform, and the frequency to scale the maximum displacement. Each sweep 
+# proposes sim.N moves and accumulates the properties after every move. One
+# sample is added to the blocks after every sweep. A sweep of NPT MC ends 
+# with a volume move, and the sample of its energy includes the tail 
+# correction, which changes with the volume.
+@njit(cache=True)
+def sweeps(sim, atom, cl, rng, iprop, aprop, blk, first, nsweeps, 
+           freq_scale_delta):
+    x=blk.x
+    for i in range(first, first+nsweeps):
+        for j in range(sim.N): # This loop performs sim.N moves per step
+            # Propose and accept or reject a move
+            move(sim,atom,cl,rng,iprop)
+            
+            # Accumulate the properties for the move
+            aprop.pe+=iprop.pe
+            aprop.pe2+=iprop.pe2
+            aprop.virial+=iprop.virial
+        
+        # Propose a change of the volume
+        if sim.npt: volume(sim, atom, cl, rng, iprop)
+        
+        # Add the sample for the sweep to the blocks
+        x[ipe]=iprop.pe
+        if sim.npt: x[ipe]+=sim.N*sim.utail
+        x[ike]=0.0
+        x[iT]=sim.T
+        x[iP]=sim.rho*sim.T + 1.0/3.0/sim.length**3.0*iprop.virial + \
+              sim.ptail
+        x[ivirial]=iprop.virial
+        x[irho]=sim.rho
+        add(blk)
+        
+        # Scale delta to obtain desired acceptance of moves
+        if i%freq_scale_delta == 0: scale_delta(sim,iprop,aprop)
+        if sim.npt and i%freq_scale_dv == 0: scale_dv(sim,iprop,aprop)
\ No newline at end of file
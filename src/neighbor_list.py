@@ -0,0 +1,174 @@
+# neighbor_list is part of ljpy for Lennard Jones simulations.              #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# neighbor_list.py                                                        	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It holds a Verlet neighbor list for MD. The list
+stores, for each site i, the sites j > i that are within rc + skin of i. 
+Because the sites only move a small distance each time step, the same list
+can be used for many steps. It is rebuilt only when the largest displacement
+of any site since the last build exceeds half the skin, which guarantees that
+no pair inside the cutoff is missing from the list.
+
+The list is stored in compressed form: the neighbors of site i are
+list[point[i]] to list[point[i+1]-1].
+"""
+
+# Import relevant libraries
+import numpy as np
+import numba as nb
+from src.jit_cache import cacheable
+from src.cell_list import build_cells, cell_wrap, cells_per_side
+
+spec = [('point',nb.int64[:]), ('list',nb.int64[:]), ('d0',nb.float64[:,:]), \
+        ('nbuild',nb.int64), ('npairs',nb.int64), ('npairs_total',nb.int64)]
+
+# The class for the neighbor list
+@cacheable
+@nb.experimental.jitclass(spec)
+class nlist(object):
+    def __init__(self, N):
+        # point[i] is the first entry of site i in list
+        # list holds the neighbors of all sites one after another
+        # d0 holds the displacement accumulators of each site at the last
+        # build
+        # nbuild is the number of times the list has been built
+        # npairs is the number of pairs in the current list
+        # npairs_total is the sum of npairs over all builds
+        self.point=np.zeros(N+1, dtype=np.int64)
+        self.list=np.zeros(64*N, dtype=np.int64)
+        self.d0=np.zeros((N,3))
+        self.nbuild=0
+        self.npairs=0
+        self.npairs_total=0
+        
+        return
+
+# This function is passed a simulation object, a particles object,
+# a neighbor list, the index of the next entry of the list, and the indices
+# of two sites. It appends j to the list if the pair is inside rc + skin.
+# It returns the index of the next entry of the list.
+@nb.njit(cache=True)
+def add_pair(sim, atom, nl, k, i, j):
+    # Variables
+    hL=sim.length*0.5   # half the box length
+    rl=sim.rc+sim.skin  # radius of the list
+    
+    # Calculate the distance between sites i and j
+    dx=atom.r[i,0]-atom.r[j,0]
+    dy=atom.r[i,1]-atom.r[j,1]
+    dz=atom.r[i,2]-atom.r[j,2]
+    
+    # Minimum image convention
+    if np.abs(dx)>hL:
+        if dx < 0.0: dx=dx+sim.length
+        else: dx=dx-sim.length
+    if np.abs(dy)>hL:
+        if dy < 0.0: dy=dy+sim.length
+        else: dy=dy-sim.length
+    if np.abs(dz)>hL:
+        if dz < 0.0: dz=dz+sim.length
+        else: dz=dz-sim.length
+    
+    if dx*dx+dy*dy+dz*dz < rl*rl:
+        # Double the size of the list if it is full
+        if k == len(nl.list):
+            bigger=np.zeros(2*len(nl.list), dtype=np.int64)
+            bigger[:k]=nl.list
+            nl.list=bigger
+        nl.list[k]=j
+        k+=1
+    return(k)
+
+# This function is passed a simulation object, a particles object,
+# and a neighbor list. It builds the neighbor list from the current 
+# positions. A cell list with cells of side rc + skin is used to find 
+# the pairs if the box holds at least three cells per side.
+@nb.njit(cache=True)
+def build_nlist(sim, atom, nl):
+    # Variables
+    N=np.int64(sim.N)
+    nc=cells_per_side(sim.length, sim.rc+sim.skin)
+    k=0
+    
+    if nc >= 3:
+        head, lst = build_cells(sim, atom, nc)
+        for i in range(N):
+            nl.point[i]=k
+            ix=np.int64(atom.r[i,0]/sim.length*nc)%nc
+            iy=np.int64(atom.r[i,1]/sim.length*nc)%nc
+            iz=np.int64(atom.r[i,2]/sim.length*nc)%nc
+            # Loop around the cell of site i and the 26 cells around it
+            for ox in range(-1, 2):
+                for oy in range(-1, 2):
+                    for oz in range(-1, 2):
+                        j=head[cell_wrap(nc, ix+ox, iy+oy, iz+oz)]
+                        while j >= 0:
+                            if j > i: k=add_pair(sim, atom, nl, k, i, j)
+                            j=lst[j]
+    else:
+        for i in range(N):
+            nl.point[i]=k
+            for j in range(i+1, N):
+                k=add_pair(sim, atom, nl, k, i, j)
+    nl.point[N]=k
+    
+    # Save the displacement of each site at the time of the build
+    nl.d0[:,:]=atom.d
+    
+    # Update the statistics of the list
+    nl.nbuild+=1
+    nl.npairs=k
+    nl.npairs_total+=k
+
+# This function is passed a simulation object, a particles object,
+# and a neighbor list. It rebuilds the list if any site has moved more
+# than half the skin since the last build. The displacements are found
+# from the displacement accumulators that are updated by verlet1.
+# It returns True if the list was rebuilt.
+@nb.njit(cache=True)
+def update_nlist(sim, atom, nl):
+    # Find the largest squared displacement since the last build
+    dr2max=0.0
+    for i in range(sim.N):
+        dx=atom.d[i,0]-nl.d0[i,0]
+        dy=atom.d[i,1]-nl.d0[i,1]
+        dz=atom.d[i,2]-nl.d0[i,2]
+        dr2=dx*dx+dy*dy+dz*dz
+        if dr2 > dr2max: dr2max=dr2
+    
+    # Rebuild the list if the displacement is more than half the skin
+    if 4.0*dr2max > sim.skin*sim.skin:
+        build_nlist(sim, atom, nl)
+        return(True)
+    return(False)
+
+# This function is passed a neighbor list. It resets the statistics of the
+# list, which is done at the start of the production steps.
+def reset_nlist_stats(nl):
+    nl.nbuild=0
+    nl.npairs_total=0
@@ -0,0 +1,43 @@
+# next_stop is part of ljpy for Lennard Jones simulations.                  #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# next_stop.py                                                            	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It finds how many steps the compiled MD and MC
+loops can run before control must return to the driver, for example to write
+output or accumulate the radial distribution function.
+"""
+
+# This function is passed the current step, the last step, and any number
+# of intervals (intervals that are zero are ignored). It returns the first
+# step after the current step that is a multiple of one of the intervals or
+# the last step, whichever comes first.
+def nextstop(i, last, *intervals):
+    stop=last
+    for k in intervals:
+        if k > 0: stop=min(stop, (i//k+1)*k)
+    return(stop)
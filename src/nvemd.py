@@ -31,39 +31,96 @@ This module is part of ljpy. It is the main driver for the NVE MD simulations.
 """
 
 # Import relevant libraries
-from src.forces import forces
-from src.kinetic import ke_and_T
-from src.verlet import verlet1, verlet2
+from src.neighbor_list import nlist, build_nlist, reset_nlist_stats
+from src.verlet import verletsteps
 from src.ljpyclasses import props
-from src.scale_velocities import scalevelocities
+from src.blocking import blocks, targetsmet
+from src.next_stop import nextstop
 import numpy as np
 import src.dhist as dh
 from src.rdf import rdf_accumulate
 from src.finalize_file import finalizefile
+from src.checkpoint import savecheckpoint, restorecheckpoint, \
+                           restartmovie, restartseries, \
+                           restartdetector, restartwidom
+from src.trr import trrwriter
+from src.prop_output import propwriter
+from src.equilibration import eqdetector
+from src.widom import widomsampler
 
-def nvemd(sim, atom):
+# This function is passed a simulation object, a particles object, and a
+# checkpoint to restart from (None to start from the beginning).
+def nvemd(sim, atom, chk=None):
     # Set variables
     rescale_freq=10
     
     # Create objects for the instanteous and average properties
     iprop=props()
     aprop=props()
+    
+    # Create the object for the errors of the averages
+    blk=blocks()
+    
+    # Build the Verlet neighbor list if one was requested. An empty list
+    # is passed to the compiled steps otherwise.
+    if sim.neighbor == "verlet":
+        nl=nlist(sim.N)
+        build_nlist(sim, atom, nl)
+    else:
+        nl=nlist(0)
+    
+    # Initialize the radial distribution function histogram
+    Nrdfcalls=0
+    if sim.rdf:
+        rdfh=dh.hist(sim.rdfmin, sim.rdfmax,sim.rdfN)
+    else:
+        rdfh=dh.hist(0.8, 4.0, 100) # this is the default
+    
+    # Continue from the checkpoint if the simulation is restarted
+    stage="eq"
+    i=0
+    if chk is not None:
+        stage, i, Nrdfcalls = restorecheckpoint(chk, sim, iprop, aprop, blk,
+                                                rdfh, nl)
+    
+    # Open the writer of the instantaneous properties. A restarted 
+    # simulation adds its rows to the time series written up to the 
+    # checkpoint.
+    if chk is None: output=propwriter(sim)
+    else: output=propwriter(sim, restartseries(chk))
+    
+    # Create the detector of the end of the equilibration (keyword autoeq)
+    if chk is None: detector=eqdetector(sim)
+    else: detector=eqdetector(sim, *restartdetector(chk))
+    
+    # Create the sampler of the Widom insertions (keyword widom), which 
+    # are only done during production
+    widom=None
+    if sim.widom:
+        widom=widomsampler(sim)
+        if chk is not None and stage == "pr": restartwidom(chk, widom)
+    
+    # Open the movie file and save the first frame. A restarted simulation
+    # adds its frames to the movie written up to the checkpoint.
+    movie=None
+    if sim.movie:
+        if chk is None:
+            movie=trrwriter(sim, atom)
+            movie.frame(0, 0.0, atom)
+        else:
+            movie=trrwriter(sim, atom, restartmovie(chk))
 
     # Perform equilibration steps
     # During equilibration, the velocities are rescaled periodically
     # to the set point temperature. After equilibration, during production,
-    # the velocities are no longer rescaled.
-    for i in range(1,np.int64(sim.eq+1)):
-        verlet1(sim, atom) # first half of velocity verlet algorithm
-        iprop.pe, iprop.virial = forces(sim, atom) # calculate the forces
-        verlet2(sim, atom) # second half of velocity verlet algorithm
-        iprop.ke, iprop.T = ke_and_T(atom) # kinetic and potential energy
-        
-        # Accumulate the properties
-        aprop.pe=aprop.pe + iprop.pe
-        aprop.ke=aprop.ke + iprop.ke
-        aprop.T=aprop.T + iprop.T
-        aprop.virial=aprop.virial + iprop.virial
+    # the velocities are no longer rescaled. The steps are performed in
+    # compiled code up to the next step that needs output.
+    while stage == "eq" and i < sim.eq and detector.t0 < 0:
+        nsteps=nextstop(i, sim.eq, sim.output, sim.movie,
+                        sim.checkpoint, sim.autoeq)-i
+        verletsteps(sim, atom, iprop, aprop, blk, nl, i+1, nsteps,
+                    rescale_freq, False)
+        i+=nsteps
         
         # Output instantaneous properties at the interval
         # specified in the input file.
@@ -72,51 +129,56 @@ def nvemd(sim, atom):
               sim.ptail
             Pave=sim.rho*aprop.T/i + 1.0/3.0/sim.length**3.0*aprop.virial/i + \
               sim.ptail 
-            fp=open(sim.outputfile, "a")
-            fp.write("{:<13}    {:13.6f}    {:13.6f}    {:13.6f}    {:13.6f}    " \
-                     "{:13.6f}    {:13.6f}    {:13.6f}\n" \
-                     .format(i, iprop.T, aprop.T/i, P, Pave, iprop.ke/sim.N, \
-                             iprop.pe/sim.N + sim.utail, \
-                             (iprop.ke + iprop.pe)/sim.N + sim.utail))
-            fp.close()
+            output.row(0, i, iprop.T, aprop.T/i, P, Pave, iprop.ke/sim.N,
+                       iprop.pe/sim.N + sim.utail,
+                       (iprop.ke + iprop.pe)/sim.N + sim.utail)
             print("Equilibration Step " + str(i) + "\n")
-            
-        # Rescale the velocities to achieve the temperature specified
-        # in the input file. This is only done during the equilibration
-        # steps of MD simulations.
-        if i%rescale_freq == 0: scalevelocities(sim, atom, aprop.T/i)
         
-    # Reset the accumulators for the production steps
-    aprop.pe=0.0
-    aprop.ke=0.0
-    aprop.T=0.0
-    aprop.virial=0.0
-    for i in range(sim.N):
-        atom[i].dx=0.0
-        atom[i].dy=0.0
-        atom[i].dz=0.0
+        # Sample the potential energy to detect the end of the 
+        # equilibration
+        if sim.autoeq and i%sim.autoeq == 0: detector.sample(iprop.pe)
+        
+        # Save a movie frame at the interval specified in the input file
+        if sim.movie and i%sim.movie == 0:
+            movie.frame(i, i*sim.dt, atom)
+        
+        # Write a checkpoint at the interval specified in the input file
+        if sim.checkpoint and i%sim.checkpoint == 0:
+            savecheckpoint(sim, atom, iprop, aprop, blk, rdfh, Nrdfcalls,
+                           nl, "eq", i, movie, output, detector)
     
-    # Initialize the radial distribution function histogram
-    Nrdfcalls=0
-    if sim.rdf:
-        rdfh=dh.hist(sim.rdfmin, sim.rdfmax,sim.rdfN)
-    else:
-        rdfh=dh.hist(0.8, 4.0, 100) # this is the default
+    # Reset the accumulators for the production steps
+    if stage == "eq":
+        # Report the end of the equilibration if it was detected. The 
+        # number of equilibration steps is the number performed.
+        if detector.t0 >= 0:
+            text="\nEquilibration detected at step {}. Production " \
+                 "started after step {} of {}.\n\n".format(detector.t0, i,
+                                                          sim.eq)
+            output.text(text)
+            print(text)
+            sim.eq=i
+        i=0
+        aprop.pe=0.0
+        aprop.ke=0.0
+        aprop.T=0.0
+        aprop.virial=0.0
+        blk=blocks()
+        atom.d[:,:]=0.0
+        
+        # Rebuild the neighbor list because the displacement accumulators
+        # were reset, and only count the builds during production.
+        if sim.neighbor == "verlet":
+            reset_nlist_stats(nl)
+            build_nlist(sim, atom, nl)
         
     # Perform the production steps
     # During production, accumulate all the properties.
-    for i in range(1,np.int64(sim.pr+1)):
-        verlet1(sim, atom) # first half of velocity verlet algorithm
-        iprop.pe, iprop.virial = forces(sim, atom) # calculate the forces
-        verlet2(sim, atom) # second half of velocity verlet algorithm
-        iprop.ke, iprop.T = ke_and_T(atom) # kinetic and potential energy
-        
-        # Accumulate the properties
-        aprop.pe+=iprop.pe
-        aprop.ke+=iprop.ke
-        aprop.T+=iprop.T
-        aprop.virial+=iprop.virial
-        aprop.pe2+=iprop.pe*iprop.pe
+    while i < sim.pr:
+        nsteps=nextstop(i, sim.pr, sim.output, sim.rdf, sim.movie,
+                        sim.checkpoint, sim.widom)-i
+        verletsteps(sim, atom, iprop, aprop, blk, nl, i+1, nsteps, 0, True)
+        i+=nsteps
         
         # Output instantaneous properties at the interval
         # specified in the input file.
@@ -125,13 +187,9 @@ def nvemd(sim, atom):
               sim.ptail
             Pave=sim.rho*aprop.T/i + 1.0/3.0/sim.length**3.0*aprop.virial/i + \
               sim.ptail 
-            fp=open(sim.outputfile, "a")
-            fp.write("{:<13}    {:13.6f}    {:13.6f}    {:13.6f}    {:13.6f}    " \
-                     "{:13.6f}    {:13.6f}    {:13.6f}\n" \
-                     .format(i, iprop.T, aprop.T/i, P, Pave, iprop.ke/sim.N, \
-                             iprop.pe/sim.N + sim.utail, \
-                             (iprop.ke + iprop.pe)/sim.N + sim.utail))
-            fp.close()
+            output.row(1, i, iprop.T, aprop.T/i, P, Pave, iprop.ke/sim.N,
+                       iprop.pe/sim.N + sim.utail,
+                       (iprop.ke + iprop.pe)/sim.N + sim.utail)
             print("Production Step " + str(i) + "\n")
             
         # Accumulate the radial distribution function
@@ -140,8 +198,32 @@ def nvemd(sim, atom):
                 Nrdfcalls+=1
                 rdf_accumulate(sim, atom, rdfh)
         
+        # Insert the ghosts of the Widom method
+        if sim.widom and i%sim.widom == 0: widom.frame(sim, atom, iprop.T)
+        
+        # Save a movie frame at the interval specified in the input file
+        if sim.movie and i%sim.movie == 0:
+            movie.frame(sim.eq+i, (sim.eq+i)*sim.dt, atom)
+        
+        # Write a checkpoint at the interval specified in the input file
+        if sim.checkpoint and i%sim.checkpoint == 0:
+            savecheckpoint(sim, atom, iprop, aprop, blk, rdfh, Nrdfcalls,
+                           nl, "pr", i, movie, output, detector, widom=widom)
+        
+        # End the production steps early once the errors of the averages
+        # reach the targets given in the input file
+        if i%sim.output == 0 and targetsmet(sim, blk): break
+        
+    # Write the rows and frames left in the buffers
+    output.close()
+    if movie is not None: movie.close()
+    
     # Finalize the output file
-    finalizefile(sim, atom, aprop, rdfh, Nrdfcalls)
+    if sim.neighbor == "verlet":
+        finalizefile(sim, atom, aprop, blk, rdfh, Nrdfcalls, i, nl, widom)
+    else:
+        finalizefile(sim, atom, aprop, blk, rdfh, Nrdfcalls, i, 
+                     widom=widom)
 
         
     #print("pe = %.2f virial = %.3f ke = %.2f T = %.4f" % (iprop.pe,iprop.virial,iprop.ke,iprop.T))
\ No newline at end of file
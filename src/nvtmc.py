@@ -31,17 +31,46 @@ This subroutine is the main driver for NVT MC simulations.
 """
 
 # Import relevant libraries
-from src.atomic_pe import atomic_pe
-from src.move import move
-from src.forces import forces
+from src.move import sweeps
+from src.hybrid import hmcsteps
+from src.event_chain import chainsteps
+from src.checkerboard import boardsweeps
+from src.forces import forces_serial
 from src.ljpyclasses import props
-from src.scale_delta import scale_delta
+from src.blocking import blocks, targetsmet, mean, iP
+from src.cell_list import mccells, build_mccells
+from src.next_stop import nextstop
 from src.rdf import rdf_accumulate
 from src.finalize_file import finalizefile
+from src.checkpoint import savecheckpoint, restorecheckpoint, \
+                           restartmovie, restartseries, \
+                           restartdetector, restartsamples, restartwidom
+from src.trr import trrwriter
+from src.prop_output import propwriter
+from src.equilibration import eqdetector
+from src.widom import widomsampler
+from src.reweight import samplewriter
+from src.rng import stream, imoves
 import src.dhist as dh
 import numpy as np
 
-def nvtmc(sim, atom):
+# This function is passed a simulation object, a particles object, and the
+# instantaneous and average property objects. It recalculates the energy and
+# virial of the whole system, records the largest drift of the running 
+# energy total from the recalculated value, and resets the running totals.
+# The energy is recalculated with one thread. The sum of a parallel loop 
+# depends on the number of threads in its last bits, which the reset would
+# carry into the rest of the simulation.
+def checkdrift(sim, atom, iprop, aprop):
+    pe, virial = forces_serial(sim, atom)
+    aprop.drift=max(aprop.drift, abs(iprop.pe-pe)/sim.N)
+    iprop.pe=pe
+    iprop.virial=virial
+    iprop.pe2=pe*pe
+
+# This function is passed a simulation object, a particles object, and a
+# checkpoint to restart from (None to start from the beginning).
+def nvtmc(sim, atom, chk=None):
     # Variables
     freq_scale_delta=1 # frequency to scale the maximum displacement
     
@@ -49,93 +78,215 @@ def nvtmc(sim, atom):
     iprop=props()
     aprop=props()
     
-    # Initialize the potential energy of each site
-    # These are the "old" or "current" energies needed
-    # to calculate the change in energy between the current state
-    # and a proposed state (move).
-    for i in range(sim.N):
-        atom[i].pe=atomic_pe(sim, atom, i)
-        
+    # Create the stream of random numbers of the moves. Its buffer holds the
+    # numbers of one sweep.
+    rng=stream(sim.seed, imoves, 5*sim.N + 3)
+    
+    # Create the object for the errors of the averages
+    blk=blocks()
+    
+    # Initialize the potential energy and virial of the system.
+    # These are running totals that each accepted move updates with
+    # the change in energy and virial of the moved particle. They are found
+    # with one thread so they are the same for any number of threads.
+    iprop.pe, iprop.virial = forces_serial(sim, atom)
+    iprop.pe2=iprop.pe*iprop.pe
+    
+    # Sort the particles into cells if the cell list was requested and the
+    # box holds at least 3 cells per side. An empty list is passed to the
+    # compiled sweeps otherwise, and every move visits all the particles.
+    if sim.neighbor == "cell" and sim.ncell >= 3:
+        cl=mccells(sim.N, sim.ncell)
+        build_mccells(sim, atom, cl)
+    else:
+        cl=mccells(0, 0)
+    
+    # Initialize the radial distribution function histogram
+    Nrdfcalls=0
+    if sim.rdf:
+        rdfh=dh.hist(sim.rdfmin, sim.rdfmax,sim.rdfN)
+    else:
+        rdfh=dh.hist(0.8, 4.0, 100) # this is the default
+    
+    # Continue from the checkpoint if the simulation is restarted
+    stage="eq"
+    i=0
+    if chk is not None:
+        stage, i, Nrdfcalls = restorecheckpoint(chk, sim, iprop, aprop, blk,
+                                                rdfh, cl, rng)
+    
+    # Open the writer of the instantaneous properties. A restarted 
+    # simulation adds its rows to the time series written up to the 
+    # checkpoint.
+    if chk is None: output=propwriter(sim)
+    else: output=propwriter(sim, restartseries(chk))
+    
+    # Create the detector of the end of the equilibration (keyword autoeq)
+    if chk is None: detector=eqdetector(sim)
+    else: detector=eqdetector(sim, *restartdetector(chk))
+    
+    # Create the writer of the samples for histogram reweighting (keyword 
+    # reweight). The samples are only taken during production.
+    samples=None
+    if sim.reweight:
+        if chk is None or stage == "eq": samples=samplewriter(sim)
+        else: samples=samplewriter(sim, restartsamples(chk))
+    
+    # Create the sampler of the Widom insertions (keyword widom), which 
+    # are only done during production
+    widom=None
+    if sim.widom:
+        widom=widomsampler(sim)
+        if chk is not None and stage == "pr": restartwidom(chk, widom)
+    
+    # Open the movie file and save the first frame. A restarted simulation
+    # adds its frames to the movie written up to the checkpoint.
+    movie=None
+    if sim.movie:
+        if chk is None:
+            movie=trrwriter(sim, atom)
+            movie.frame(0, 0.0, atom)
+        else:
+            movie=trrwriter(sim, atom, restartmovie(chk))
     
     # Perform the equilibration steps
-    # Each step proposes sim.N moves (one Monte Carlo "sweep").
-    for i in range(1, np.int64(sim.eq+1)):
-        for j in range(sim.N): # This loop performs sim.N moves per step
-            # Propose and accept or reject a move
-            move(sim,atom,iprop)
-            
-            # Accumulate the properties for the move
-            aprop.pe+=iprop.pe
-            aprop.pe2+=iprop.pe2
-            aprop.virial+=iprop.virial
+    # Each step proposes sim.N moves (one Monte Carlo "sweep"), one move
+    # of all the particles for Hybrid MC, or three chains for event-chain 
+    # MC. The steps are performed in compiled code up to the next step that
+    # needs output.
+    while stage == "eq" and i < sim.eq and detector.t0 < 0:
+        nsweeps=nextstop(i, sim.eq, sim.output, sim.movie,
+                        sim.checkpoint, sim.autoeq)-i
+        if sim.hybrid:
+            hmcsteps(sim, atom, rng, iprop, aprop, blk, i+1, nsweeps)
+        elif sim.eventchain:
+            chainsteps(sim, atom, cl, rng, iprop, aprop, blk, i+1, nsweeps)
+        elif sim.checkerboard:
+            boardsweeps(sim, atom, cl, iprop, aprop, blk, i+1, nsweeps, 0,
+                        freq_scale_delta)
+        else: sweeps(sim, atom, cl, rng, iprop, aprop, blk, i+1, nsweeps,
+                     freq_scale_delta)
+        i+=nsweeps
         
         # Output equilibration progress at the interval specified
         # in the input file
         if i%sim.output == 0:
+            checkdrift(sim, atom, iprop, aprop)
             P=sim.rho*sim.T + 1.0/3.0/sim.length**3.0*iprop.virial + sim.ptail
             Pave=sim.rho*sim.T + \
                  1.0/3.0/sim.length**3.0*aprop.virial/i/sim.N + sim.ptail
-            fp=open(sim.outputfile, "a")
-            fp.write("{:<13}    {:13.6f}    {:13.6f}    {:13.6f}\n" \
-                     .format(i, P, Pave, iprop.pe/sim.N + sim.utail))
-            fp.close()
+            if sim.npt:
+                output.row(0, i, P, mean(blk, iP), sim.rho, 
+                           iprop.pe/sim.N + sim.utail)
+            else:
+                output.row(0, i, P, Pave, iprop.pe/sim.N + sim.utail)
             print("Equilibration Step " + str(i) + "\n")
         
-        # Scale delta to obtain desired acceptance of moves
-        if i%freq_scale_delta == 0: scale_delta(sim,iprop,aprop)
+        # Sample the potential energy to detect the end of the 
+        # equilibration
+        if sim.autoeq and i%sim.autoeq == 0: detector.sample(iprop.pe)
         
-    # Reset accumulators for production steps
-    iprop.ntry=0
-    iprop.naccept=0
-    aprop.ntry=0
-    aprop.naccept=0
-    aprop.pe=0.0
-    aprop.pe2=0.0
-    aprop.virial=0.0
+        # Save a movie frame at the interval specified in the input file
+        if sim.movie and i%sim.movie == 0:
+            movie.frame(i, i, atom)
         
-    # Initialize the radial distribution function histogram
-    Nrdfcalls=0
-    if sim.rdf:
-        rdfh=dh.hist(sim.rdfmin, sim.rdfmax,sim.rdfN)
-    else:
-        rdfh=dh.hist(0.8, 4.0, 100) # this is the default
+        # Write a checkpoint at the interval specified in the input file
+        if sim.checkpoint and i%sim.checkpoint == 0:
+            savecheckpoint(sim, atom, iprop, aprop, blk, rdfh, Nrdfcalls,
+                           cl, "eq", i, movie, output, detector, rng=rng)
+        
+    # Reset accumulators for production steps
+    if stage == "eq":
+        # Report the end of the equilibration if it was detected. The 
+        # number of equilibration steps is the number performed.
+        if detector.t0 >= 0:
+            text="\nEquilibration detected at step {}. Production " \
+                 "started after step {} of {}.\n\n".format(detector.t0, i,
+                                                          sim.eq)
+            output.text(text)
+            print(text)
+            sim.eq=i
+        i=0
+        iprop.ntry=0
+        iprop.naccept=0
+        iprop.nvtry=0
+        iprop.nvaccept=0
+        iprop.nleave=0
+        aprop.ntry=0
+        aprop.naccept=0
+        aprop.pe=0.0
+        aprop.pe2=0.0
+        aprop.virial=0.0
+        aprop.nvtry=0
+        aprop.nvaccept=0
+        aprop.nleave=0
+        blk=blocks()
     
     # Perform the production steps
     # During production, accumulate all the properties.    
-    for i in range(1, np.int64(sim.pr+1)):
-        for j in range(sim.N): # This loop performs sim.N moves per step
-            # Propose and accept or reject a move
-            move(sim,atom,iprop)
-            
-            # Accumulate the properties for the move
-            aprop.pe+=iprop.pe
-            aprop.pe2+=iprop.pe2
-            aprop.virial+=iprop.virial
+    while i < sim.pr:
+        nsweeps=nextstop(i, sim.pr, sim.output, sim.rdf, sim.movie,
+                        sim.checkpoint, sim.widom, sim.reweight)-i
+        if sim.hybrid:
+            hmcsteps(sim, atom, rng, iprop, aprop, blk, i+1, nsweeps)
+        elif sim.eventchain:
+            chainsteps(sim, atom, cl, rng, iprop, aprop, blk, i+1, nsweeps)
+        elif sim.checkerboard:
+            boardsweeps(sim, atom, cl, iprop, aprop, blk, i+1, nsweeps, 1,
+                        freq_scale_delta)
+        else: sweeps(sim, atom, cl, rng, iprop, aprop, blk, i+1, nsweeps,
+                     freq_scale_delta)
+        i+=nsweeps
         
         # Accumulate the radial distribution function
         if sim.rdf:
             if i%sim.rdf == 0:
                 Nrdfcalls+=1
                 rdf_accumulate(sim, atom, rdfh)
+        
+        # Insert the ghosts of the Widom method
+        if sim.widom and i%sim.widom == 0: widom.frame(sim, atom, sim.T)
        
         # Output production progress at the interval specified
         # in the input file
         if i%sim.output == 0:
+            checkdrift(sim, atom, iprop, aprop)
             P=sim.rho*sim.T + 1.0/3.0/sim.length**3.0*iprop.virial + sim.ptail
             Pave=sim.rho*sim.T + \
                  1.0/3.0/sim.length**3.0*aprop.virial/i/sim.N + sim.ptail
-            fp=open(sim.outputfile, "a")
-            fp.write("{:<13}    {:13.6f}    {:13.6f}    {:13.6f}\n" \
-                     .format(i, P, Pave, iprop.pe/sim.N + sim.utail))
-            fp.close()
+            if sim.npt:
+                output.row(1, i, P, mean(blk, iP), sim.rho, 
+                           iprop.pe/sim.N + sim.utail)
+            else:
+                output.row(1, i, P, Pave, iprop.pe/sim.N + sim.utail)
             print("Production Step " + str(i) + "\n")
         
-        # Scale delta to obtain desired acceptance of moves
-        if i%freq_scale_delta == 0: scale_delta(sim,iprop,aprop)
+        # Sample the potential energy and virial for histogram reweighting
+        if sim.reweight and i%sim.reweight == 0:
+            samples.sample(iprop.pe, iprop.virial)
         
+        # Save a movie frame at the interval specified in the input file
+        if sim.movie and i%sim.movie == 0:
+            movie.frame(sim.eq+i, sim.eq+i, atom)
+        
+        # Write a checkpoint at the interval specified in the input file
+        if sim.checkpoint and i%sim.checkpoint == 0:
+            savecheckpoint(sim, atom, iprop, aprop, blk, rdfh, Nrdfcalls,
+                           cl, "pr", i, movie, output, detector, samples,
+                           widom, rng)
+        
+        # End the production steps early once the errors of the averages
+        # reach the targets given in the input file
+        if i%sim.output == 0 and targetsmet(sim, blk): break
+        
+    # Write the rows and frames left in the buffers
+    output.close()
+    if movie is not None: movie.close()
+    if samples is not None: samples.flush()
+    
     # Finalize the output file after all equilibration and production    
     # steps are finished.  This calculates and write the averages to the 
     # output file.
-    finalizefile(sim, atom, aprop, rdfh, Nrdfcalls)
+    finalizefile(sim, atom, aprop, blk, rdfh, Nrdfcalls, i, widom=widom)
     
     
\ No newline at end of file
@@ -0,0 +1,150 @@
+# potential is part of ljpy for Lennard Jones simulations.                  #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# potential.py                                                            	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It has the functions that evaluate the pair
+potential. Four potentials are available, selected by the potential keyword
+in the input file.
+
+    lj:     the Lennard Jones potential truncated at the cutoff
+            u = 4(r^-12 - r^-6)
+    wca:    the Weeks-Chandler-Andersen potential, the Lennard Jones 
+            potential cut at its minimum, 2^(1/6), and shifted up by 1
+    lj-sf:  the shifted-force Lennard Jones potential, whose energy and 
+            force both go to zero at the cutoff
+            u = u_lj(r) - u_lj(rc) - (r-rc)u_lj'(rc)
+    mie:    the Mie n-m potential, of which Lennard Jones is the 12-6 case
+            u = C(r^-n - r^-m), C = n/(n-m) (n/m)^(m/(n-m))
+
+The Lennard Jones potential is calculated directly from powers of 1/r^2 
+unless the table keyword is given. The other potentials are always looked up
+in a table. The table holds the energy and the force divided by r at points
+evenly spaced in r^2 from tabr2min to the square of the cutoff and is built
+once at the start of the simulation. The values between the points are found
+by linear interpolation, so the cost of a pair is the same for every 
+potential.
+"""
+
+# Import relevant libraries
+import numpy as np
+from numba import njit
+
+# The square of the smallest distance in the table. Pairs that come closer
+# use the first interval of the table, but the energy there is so large that
+# this does not happen in practice.
+tabr2min=0.25
+
+# This function is passed a simulation object and an array of squared 
+# distances. It returns arrays of the energy and the force divided by r of
+# the potential at the distances. It is only used to build the table and to
+# check it.
+def potential(sim, r2):
+    r=np.sqrt(r2)
+    if sim.potential == "mie":
+        n=sim.mie_n
+        m=sim.mie_m
+    else:
+        n=12.0
+        m=6.0
+    C=n/(n-m)*(n/m)**(m/(n-m))
+    u=C*(r**(-n) - r**(-m))
+    fr=C*(n*r**(-n) - m*r**(-m))/r2
+    if sim.potential == "wca":
+        u=u+1.0
+    elif sim.potential == "lj-sf":
+        rc=sim.rc
+        uc=C*(rc**(-n) - rc**(-m))
+        fc=C*(n*rc**(-n) - m*rc**(-m))/rc   # force at the cutoff
+        u=u - uc + (r-rc)*fc
+        fr=fr - fc/r
+    return(u, fr)
+
+# This function is passed a simulation object. It builds the table of the
+# energy and the force divided by r if the simulation uses one.
+def build_table(sim):
+    if sim.table == 0: return
+    r2=np.linspace(tabr2min, sim.rc2, sim.table)
+    u, fr = potential(sim, r2)
+    tab=np.zeros((sim.table, 2))
+    tab[:,0]=u
+    tab[:,1]=fr
+    sim.tab=tab
+    sim.tabinv=(sim.table-1)/(sim.rc2-tabr2min)
+
+# This function is passed a simulation object. It sets the corrections to
+# the energy and pressure for the interactions beyond the cutoff. They are
+# zero for the potentials that are zero beyond the cutoff.
+def tail_corrections(sim):
+    rc=sim.rc
+    if sim.potential == "wca" or sim.potential == "lj-sf":
+        sim.utail=0.0
+        sim.ptail=0.0
+    elif sim.potential == "mie":
+        n=sim.mie_n
+        m=sim.mie_m
+        C=n/(n-m)*(n/m)**(m/(n-m))
+        sim.utail=2.0*np.pi*sim.rho*C*(rc**(3.0-n)/(n-3.0) - 
+                                       rc**(3.0-m)/(m-3.0))
+        sim.ptail=2.0/3.0*np.pi*sim.rho*sim.rho*C*(n*rc**(3.0-n)/(n-3.0) - 
+                                                   m*rc**(3.0-m)/(m-3.0))
+    else:
+        sim.utail, sim.ptail = lj_tails(sim.rho, rc)
+
+# This function is passed the density and the cutoff radius. It returns the
+# corrections to the energy and pressure of the Lennard Jones potential. It
+# is also used by NPT MC, where both change with the volume.
+@njit(cache=True)
+def lj_tails(rho, rc):
+    utail = 8.0 / 3.0*np.pi*rho*(1.0 / 3.0 * rc**(-9.0) - rc**(-3.0))
+    ptail = 16.0 / 3.0*np.pi*rho*rho*(2.0 / 3.0 * rc**(-9.0) - rc**(-3.0))
+    return(utail, ptail)
+
+# This function is passed a simulation object, the table (sim.tab), and the
+# square of the distance between a pair inside the cutoff. It returns the 
+# energy and the force divided by r of the pair. The table is passed 
+# separately so the kernels can take it from the simulation object once
+# instead of for every pair.
+@njit(cache=True)
+def pair_potential(sim, tab, dr2):
+    # Look up the pair in the table
+    if sim.table > 0:
+        x=(dr2-tabr2min)*sim.tabinv
+        k=np.int64(x)
+        if k < 0: k=0
+        elif k > sim.table-2: k=sim.table-2
+        t=x-k
+        u=tab[k,0]+t*(tab[k+1,0]-tab[k,0])
+        fr=tab[k,1]+t*(tab[k+1,1]-tab[k,1])
+        return(u, fr)
+    
+    # Calculate the Lennard Jones potential directly
+    d2=1.0/dr2
+    d4=d2*d2
+    d8=d4*d4
+    d14=d8*d4*d2
+    return(4.0*(d14-d8)*dr2, 48.0*(d14-0.5*d8))
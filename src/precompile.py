@@ -0,0 +1,97 @@
+# precompile is part of ljpy for Lennard Jones simulations.                 #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# precompile.py                                                           	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It fills the cache of compiled kernels so that
+the first real simulation does not have to compile them. The caches of older
+sources are removed and short simulations of a small system are run in a 
+temporary directory, one for each path through the kernels: MD with the cell
+and Verlet lists, MC, NPT MC, Hybrid MC, event-chain MC, the checkerboard, 
+parallel tempering, the Widom insertions, the potentials looked up in a 
+table, and the parallel loops if more than one thread is available. This 
+compiles every kernel used by a simulation that is not in the cache yet and
+saves it. It is run with the following command.
+
+  python ljpy.py precompile
+"""
+
+# Import relevant libraries
+import os, tempfile, time
+import numba as nb
+from src.jit_cache import clearcache, checkcache, compiletimer
+from src.simulate import simulate
+
+# The input files of the short simulations. A keyword of an input replaces
+# the same keyword of the common lines. Parallel tempering runs first 
+# because its workers must be forked before this process starts the threads
+# of numba (see src/simulate.py). The checkerboard needs a box at least 4 
+# cutoffs long.
+inputs = {"tempering":    ["sim mc", "dt 0.1", "neighbor cell", 
+                           "tempering 2 1.0 1.2"],
+          "md":           ["sim md", "dt 0.005", "neighbor cell", 
+                           "rdf 0.8 2.0 20 2", "widom 2 10"],
+          "md_verlet":    ["sim md", "dt 0.005", "neighbor verlet"],
+          "md_lj-sf":     ["sim md", "dt 0.005", "neighbor cell", 
+                           "potential lj-sf"],
+          "mc":           ["sim mc", "dt 0.1", "neighbor cell", 
+                           "rdf 0.8 2.0 20 2", "widom 2 10"],
+          "mc_mie":       ["sim mc", "dt 0.1", "potential mie 10 6"],
+          "mc_table":     ["sim mc", "dt 0.1", "neighbor cell", "table 1000"],
+          "npt":          ["sim mc", "dt 0.1", "neighbor cell", "npt 1.0"],
+          "hybrid":       ["sim mc", "dt 0.005", "hybrid 5"],
+          "eventchain":   ["sim mc", "dt 1.0", "neighbor cell", "eventchain"],
+          "checkerboard": ["sim mc", "dt 0.1", "neighbor cell", 
+                           "checkerboard", "rcut 1.2"]}
+threaded = {"md_threads":           inputs["md"] + ["threads 2"],
+            "md_verlet_threads":    inputs["md_verlet"] + ["threads 2"],
+            "checkerboard_threads": inputs["checkerboard"] + ["threads 2"]}
+common = ["N 108", "temp 1.0", "rho 0.8", "esteps 4", "psteps 4", "rcut 1.5",
+          "output 2", "seed -1"]
+
+# This function compiles all the kernels and saves them in the cache.
+def precompile():
+    clearcache(checkcache())
+    timer=compiletimer()
+    t0=time.perf_counter()
+    runs=dict(inputs)
+    if nb.config.NUMBA_NUM_THREADS > 1: runs.update(threaded)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, lines in runs.items():
+            keys=[line.split()[0] for line in lines]
+            lines=lines + [line for line in common 
+                           if line.split()[0] not in keys]
+            inputfile=os.path.join(tmp, name + ".input")
+            fp=open(inputfile, "w")
+            fp.write("\n".join(lines) + "\n")
+            fp.close()
+            simulate(["ljpy.py", inputfile, os.path.join(tmp, name + 
+                                                         ".output")])
+            print("Compiled the kernels for " + name + "\n")
+    timer.stop()
+    print("Compile Time: {:.2f} s of {:.2f} s\n".format(timer.duration, 
+          time.perf_counter()-t0))
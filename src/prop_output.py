@@ -0,0 +1,166 @@
+# prop_output is part of ljpy for Lennard Jones simulations.                #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# prop_output.py                                                          	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It writes the instantaneous properties that the
+drivers report at the interval of the output keyword. The output file is 
+kept open for the whole simulation and the formatted rows are collected in 
+a buffer that is written in one large write when it is full, when it has 
+not been written for a while (so the progress of a running simulation can
+still be followed), when a checkpoint is written, and at the end of the 
+simulation.
+
+If the timeseries keyword is given, each row is also saved to a numpy .npy
+file that holds a structured array with one field per column. The file can
+be read with numpy.load and a column is taken by name, for example 
+np.load("run.npy")["PE"]. The stage field is 0 for equilibration and 1 for
+production, and step is the step within the stage. The header of the file 
+is rewritten with the number of rows every time the rows are written, so 
+the file can be read while the simulation runs.
+"""
+
+# Import relevant libraries
+import os, time, struct
+import numpy as np
+
+bufsize=64*2**10    # size of the buffer of formatted rows in characters
+flushtime=10.0      # seconds after which the buffer is written anyway
+nseries=4096        # number of rows in the buffer of the .npy file
+
+# The names of the columns written by each method
+columns={"md": ("T", "Tave", "P", "Pave", "KE", "PE", "TE"),
+         "mc": ("P", "Pave", "PE"),
+         "npt": ("P", "Pave", "Rho", "PE")}
+
+# This function is passed the dtype of the rows and the number of rows. It
+# returns the header of a version 1.0 .npy file. The header always has 
+# the same length, whatever the number of rows, so it can be rewritten in 
+# place as rows are added.
+def npyheader(dtype, nrows):
+    descr=np.lib.format.dtype_to_descr(dtype)
+    text="{'descr': " + repr(descr) + ", 'fortran_order': False, 'shape': ("
+    size=len(text) + 20 + 5 + 10 + 1   # 20 digits, ",), }", magic, newline
+    size=(size + 63)//64*64
+    text=(text + str(nrows) + ",), }").ljust(size - 11) + "\n"
+    return(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(text)) + 
+           text.encode("latin1"))
+
+# The class that writes the instantaneous properties
+class propwriter:
+    # This function is passed a simulation object, the number of rows of
+    # the .npy file to keep, and the names of the columns (the columns of 
+    # the method if None). The .npy file is started over if keep is None.
+    # Otherwise, it is cut to that many rows and the rows are added to it,
+    # which is used when a simulation is restarted.
+    def __init__(self, sim, keep=None, names=None):
+        # rows holds the formatted rows that have not been written yet
+        # nchar is the number of characters in rows
+        # last is the time the rows were last written
+        if names is None: names=columns["npt" if sim.npt else sim.method]
+        self.fmt="{:<13}" + "    {:13.6f}"*len(names) + "\n"
+        self.fp=open(sim.outputfile, "a")
+        self.rows=[]
+        self.nchar=0
+        self.last=time.monotonic()
+        
+        # series holds the rows of the .npy file that have not been written
+        # nbuf is the number of rows in series
+        # nrows is the number of rows in the .npy file and in series
+        self.series=None
+        if not sim.seriesfile: return
+        dtype=np.dtype([("stage", "i1"), ("step", "i8")] + 
+                       [(name, "f8") for name in names])
+        self.series=np.zeros(nseries, dtype=dtype)
+        self.nbuf=0
+        self.hsize=len(npyheader(dtype, 0))
+        if keep is None:
+            self.sp=open(sim.seriesfile, "wb")
+            self.nrows=0
+        else:
+            self.sp=open(sim.seriesfile, "r+b")
+            self.nrows=keep
+            self.sp.truncate(self.hsize + keep*dtype.itemsize)
+        self.writeseries()
+    
+    # This function is passed the stage (0 for equilibration, 1 for
+    # production), the step, and the values of the columns. It adds the row
+    # to the buffers and writes them if they are full.
+    def row(self, stage, step, *values):
+        text=self.fmt.format(step, *values)
+        self.rows.append(text)
+        self.nchar+=len(text)
+        if self.series is not None:
+            self.series[self.nbuf]=(stage, step) + values
+            self.nbuf+=1
+            self.nrows+=1
+            if self.nbuf == nseries: self.writeseries()
+        if self.nchar >= bufsize or time.monotonic() - self.last > flushtime:
+            self.writerows()
+    
+    # This function is passed text, such as a note about the simulation. It
+    # adds the text to the output file after the rows before it. The text is
+    # not saved to the .npy file.
+    def text(self, text):
+        self.rows.append(text)
+        self.nchar+=len(text)
+    
+    # This function writes the formatted rows to the output file.
+    def writerows(self):
+        self.fp.write("".join(self.rows))
+        self.fp.flush()
+        self.rows=[]
+        self.nchar=0
+        self.last=time.monotonic()
+    
+    # This function writes the rows of the .npy file and rewrites its header.
+    def writeseries(self):
+        self.sp.seek(0, 2)
+        self.sp.write(self.series[:self.nbuf].tobytes())
+        self.nbuf=0
+        self.sp.seek(0)
+        self.sp.write(npyheader(self.series.dtype, self.nrows))
+        self.sp.flush()
+    
+    # This function writes everything in the buffers. It returns the number
+    # of rows in the .npy file (-1 if there is no .npy file).
+    def flush(self):
+        self.writerows()
+        if self.series is None: return(-1)
+        self.writeseries()
+        return(self.nrows)
+    
+    # This function returns the size of the output file in bytes, which is
+    # saved in checkpoints after the buffers are written.
+    def size(self):
+        return(os.fstat(self.fp.fileno()).st_size)
+    
+    # This function writes everything in the buffers and closes the files.
+    def close(self):
+        self.flush()
+        self.fp.close()
+        if self.series is not None: self.sp.close()
@@ -28,26 +28,36 @@
 
 """
 This module is part of ljpy. It contains functionality to calculate the 
-radial distrubtion function from the simulation.
+radial distrubtion function from the simulation. When more than one thread
+is requested, the pairs are split across the threads and each thread fills
+its own copy of the histogram.
 """
 # import relevant libraries
 import numpy as np
-import src.dhist as dh
-from numba import njit
+from numba import njit, prange
 
-@njit
+@njit(cache=True)
 def rdf_accumulate(sim, atom, h):
+    if sim.nthreads > 1:
+        rdf_accumulate_parallel(sim, atom, h)
+        return
+    
     # Variables
     hL=sim.length*0.5   # half the box length
     N=np.int64(sim.N)
+    r=atom.r            # positions
+    xmin=h.xmin
+    xmax=h.xmax
+    width=h.bin_width
+    hbin=h.bin
     
     # Loop around the atoms to calculate the distances
     for i in range(N-1):
         for j in range(i+1, N):
             # Calculate the distance between sites i and j
-            dx=atom[i].x-atom[j].x
-            dy=atom[i].y-atom[j].y
-            dz=atom[i].z-atom[j].z
+            dx=r[i,0]-r[j,0]
+            dy=r[i,1]-r[j,1]
+            dz=r[i,2]-r[j,2]
             
             # Minimum image convention
             if np.abs(dx)>hL:
@@ -63,8 +73,57 @@ def rdf_accumulate(sim, atom, h):
             dr=np.sqrt(dx*dx+dy*dy+dz*dz)
             
             # Increment the histogram for the calculated
-            # value of dr
-            dh.increment(h, dr)
+            # value of dr (see accumulate in dhist.py)
+            if dr >= xmin and dr < xmax:
+                hbin[int((dr-xmin)/width)]+=1.0
+
+# This function is the parallel version of rdf_accumulate. Thread t handles
+# the sites t, t+nt, t+2nt, ... in the outer loop.
+@njit(parallel=True, cache=True)
+def rdf_accumulate_parallel(sim, atom, h):
+    # Variables
+    hL=sim.length*0.5   # half the box length
+    N=np.int64(sim.N)
+    nt=sim.nthreads
+    r=atom.r
+    xmin=h.xmin
+    xmax=h.xmax
+    width=h.bin_width
+    
+    # Private histogram for each thread
+    hbuf=np.zeros((nt, h.N))
+    
+    # Loop around the atoms to calculate the distances
+    for t in prange(nt):
+        for i in range(t, N-1, nt):
+            for j in range(i+1, N):
+                # Calculate the distance between sites i and j
+                dx=r[i,0]-r[j,0]
+                dy=r[i,1]-r[j,1]
+                dz=r[i,2]-r[j,2]
+                
+                # Minimum image convention
+                if np.abs(dx)>hL:
+                    if dx < 0.0: dx=dx+sim.length
+                    else: dx=dx-sim.length
+                if np.abs(dy)>hL:
+                    if dy < 0.0: dy=dy+sim.length
+                    else: dy=dy-sim.length
+                if np.abs(dz)>hL:
+                    if dz < 0.0: dz=dz+sim.length
+                    else: dz=dz-sim.length
+                
+                dr=np.sqrt(dx*dx+dy*dy+dz*dz)
+                
+                # Increment the histogram of the thread
+                # (see accumulate in dhist.py)
+                if dr >= xmin and dr < xmax:
+                    hbuf[t, int((dr-xmin)/width)]+=1.0
+    
+    # Add the histograms of the threads to the rdf histogram
+    for t in range(nt):
+        for k in range(h.N):
+            h.bin[k]+=hbuf[t,k]
 
 def rdf_finalize(sim, h, Ncalls):
     # Variables
@@ -38,8 +38,13 @@ and the valid values for the keywords are given.
 """
 # Import relevant libraries
 import numpy as np
+import numba as nb
 import sys, os
 from src.ljpyclasses import simulation
+from src.cell_list import cells_per_side
+from src.potential import tail_corrections, build_table
+from src.checkerboard import board_cells
+from src.blocking import names
 #from numba import njit
 #import numba as nb
 
@@ -200,21 +205,17 @@ def readinput(args):
         sim.seed=-8293867282831
     
     # ------- movie keyword ------- #
-#    movieget=params.get('movie')
-#    if movieget: 
-#        try:  
-#            sim.movie=np.uint(params['movie'][1])
-#        except (ValueError, IndexError):
-#            sys.exit("The value for the interval of keyword \"movie\" in " +
-#                     "the input file is missing or is not a valid integer.\n")
-#        if sim.movie == 0:
-#            sys.exit("The value for the interval of keyword \"movie\" in " +
-#                     "the input file must be an integer greater than zero.\n")            
-#        try:
-#            sim.moviefile=params['movie'][0]
-#        except ValueError:
-#            sys.exit("The name for the movie file is either missing in the " +
-#                     "the input file or is not valid.\n")                
+    movieget=params.get('movie')
+    if movieget: 
+        try:  
+            sim.movie=np.ulonglong(params['movie'][1])
+        except (ValueError, IndexError):
+            sys.exit("The value for the interval of keyword \"movie\" in " +
+                     "the input file is missing or is not a valid integer.\n")
+        if sim.movie == 0:
+            sys.exit("The value for the interval of keyword \"movie\" in " +
+                     "the input file must be an integer greater than zero.\n")            
+        sim.moviefile=params['movie'][0]
 
     # -------- rdf keyword -------- #
     rdfget=params.get('rdf')
@@ -252,18 +253,340 @@ def readinput(args):
         if sim.rdf < 1:
             sys.exit("The interval for keyword \"rdf\" must be "+
                      "an integer greater than zero.")            
+    
+    # ------ neighbor keyword ----- #
+    neighborget=params.get('neighbor')
+    if neighborget:
+        if neighborget[0] == 'allpairs' or neighborget[0] == 'cell':
+            sim.neighbor=neighborget[0]
+        elif neighborget[0] == 'verlet':
+            if sim.method != "md":
+                sys.exit("The Verlet neighbor list (keyword \"neighbor\") " +
+                         "can only be used for md simulations.\n")
+            sim.neighbor=neighborget[0]
+            sim.skin=0.3 # this is the default
+            if len(neighborget) > 1:
+                try:
+                    sim.skin=np.float64(neighborget[1])
+                except ValueError:
+                    sys.exit("The skin for keyword \"neighbor\" in the " +
+                             "input file is not a valid number.\n")
+            if sim.skin <= 0.0:
+                sys.exit("The skin for keyword \"neighbor\" in the input " +
+                         "file must be greater than zero.\n")
+        else: sys.exit("The value of keyword \"neighbor\" in the input file " +
+                       "must be \"allpairs\", \"cell\", or \"verlet\".\n")
+    else:
+        sim.neighbor="allpairs"
+            
+    # ------- threads keyword ------ #
+    # If the keyword is missing, the number of threads is taken from the
+    # environment variable LJPY_NUM_THREADS. Otherwise, one thread is used.
+    threadsget=params.get('threads')
+    if threadsget: 
+        threadsval=threadsget[0]
+        threadssrc="keyword \"threads\" in the input file"
+    else: 
+        threadsval=os.environ.get('LJPY_NUM_THREADS', '1')
+        threadssrc="environment variable LJPY_NUM_THREADS"
+    try:
+        sim.nthreads=np.ulonglong(threadsval)
+    except ValueError:
+        sys.exit("The value of " + threadssrc + " is not a valid integer " +
+                 "greater than zero.\n")
+    if sim.nthreads == 0:
+        sys.exit("The value of " + threadssrc + " must be an integer " +
+                 "greater than zero.\n")
+    if sim.nthreads > nb.config.NUMBA_NUM_THREADS:
+        sys.exit("The value of " + threadssrc + " cannot be greater than " +
+                 "the number of threads available (" + 
+                 str(nb.config.NUMBA_NUM_THREADS) + ").\n")
+    
+    # ----- potential keyword ----- #
+    potentialget=params.get('potential')
+    if potentialget:
+        if potentialget[0] in ('lj', 'wca', 'lj-sf'):
+            sim.potential=potentialget[0]
+        elif potentialget[0] == 'mie':
+            sim.potential=potentialget[0]
+            try:
+                sim.mie_n=np.float64(potentialget[1])
+                sim.mie_m=np.float64(potentialget[2])
+            except (ValueError, IndexError):
+                sys.exit("The exponents n and m of the mie potential " +
+                         "(keyword \"potential\") are missing or are not " +
+                         "valid numbers.\n")
+            if not sim.mie_n > sim.mie_m > 3.0:
+                sys.exit("The exponents of the mie potential (keyword " +
+                         "\"potential\") must satisfy n > m > 3.\n")
+        else: sys.exit("The value of keyword \"potential\" in the input " +
+                       "file must be \"lj\", \"wca\", \"lj-sf\", or " +
+                       "\"mie\".\n")
+    else:
+        sim.potential="lj"
+    # The WCA potential is cut at the minimum of the Lennard Jones potential
+    if sim.potential == "wca":
+        sim.rc=2.0**(1.0/6.0)
+        sim.rc2=sim.rc*sim.rc
+    
+    # ------- table keyword ------- #
+    # The potentials other than lj are always looked up in a table.
+    tableget=params.get('table')
+    if tableget or sim.potential != "lj":
+        sim.table=100000 # this is the default
+        if tableget:
+            try:
+                sim.table=np.ulonglong(tableget[0])
+            except ValueError:
+                sys.exit("The value of keyword \"table\" in the input " +
+                         "file is not a valid integer.\n")
+            except IndexError:
+                pass
+        if sim.table < 2:
+            sys.exit("The number of points in the table (keyword " +
+                     "\"table\") must be at least 2.\n")
+    
+    # ----- checkpoint keyword ----- #
+    # The checkpoint file is named after the output file unless a name
+    # is given.
+    checkpointget=params.get('checkpoint')
+    if checkpointget:
+        try:
+            sim.checkpoint=np.ulonglong(checkpointget[0])
+        except (ValueError, IndexError):
+            sys.exit("The interval of keyword \"checkpoint\" in the input " +
+                     "file is missing or is not a valid integer.\n")
+        if sim.checkpoint == 0:
+            sys.exit("The interval of keyword \"checkpoint\" in the input " +
+                     "file must be an integer greater than zero.\n")
+        if len(checkpointget) > 1: sim.checkpointfile=checkpointget[1]
+        else: sim.checkpointfile=os.path.splitext(args[2])[0] + ".chk.npz"
+    
+    # ----- timeseries keyword ----- #
+    # The .npy file is named after the output file unless a name is given.
+    timeseriesget=params.get('timeseries')
+    if timeseriesget is not None:
+        if len(timeseriesget) > 0: sim.seriesfile=timeseriesget[0]
+        else: sim.seriesfile=os.path.splitext(args[2])[0] + ".npy"
+    
+    # -------- npt keyword -------- #
+    # The keyword is followed by the pressure and, optionally, the starting
+    # maximum change of ln(volume), which is tuned during the simulation.
+    # The density of the rho keyword is the starting density.
+    nptget=params.get('npt')
+    if nptget is not None:
+        if sim.method != "mc":
+            sys.exit("The keyword \"npt\" in the input file can only be " +
+                     "used with MC simulations.\n")
+        if sim.potential != "lj" or sim.table:
+            sys.exit("The keyword \"npt\" in the input file can only be " +
+                     "used with the lj potential without a table.\n")
+        try:
+            sim.pressure=np.float64(nptget[0])
+            sim.dv=np.float64(nptget[1]) if len(nptget) > 1 else 0.01
+        except (ValueError, IndexError):
+            sys.exit("The pressure of keyword \"npt\" in the input file " +
+                     "is missing or is not a valid number.\n")
+        if not sim.dv > 0.0:
+            sys.exit("The maximum change of ln(volume) of keyword \"npt\" " +
+                     "in the input file must be greater than zero.\n")
+        for key in ("rdf", "reweight"):
+            if key in params:
+                sys.exit("The keyword \"" + key + "\" in the input file " +
+                         "can not be used with NPT MC.\n")
+        sim.npt=1
+    
+    # ---- target_error keyword ---- #
+    # The keyword is followed by pairs of a property and the error at which
+    # the production steps end. The errors of pe, ke, and virial are per
+    # particle as in the averages of the output file.
+    targetget=params.get('target_error')
+    if targetget is not None:
+        if len(targetget) == 0 or len(targetget)%2 != 0:
+            sys.exit("The keyword \"target_error\" in the input file must " +
+                     "be followed by pairs of a property and an error.\n")
+        for name, value in zip(targetget[0::2], targetget[1::2]):
+            if name not in names or (sim.method == "mc" and 
+                                     name in ("ke", "temp")) or \
+               (name == "density" and not sim.npt):
+                sys.exit("The property \"" + name + "\" of keyword " +
+                         "\"target_error\" in the input file is not valid " +
+                         "for this simulation.\n")
+            try:
+                sim.target[names.index(name)]=np.float64(value)
+            except ValueError:
+                sys.exit("The error for \"" + name + "\" of keyword " +
+                         "\"target_error\" in the input file is not a " +
+                         "valid number.\n")
+            if not sim.target[names.index(name)] > 0.0:
+                sys.exit("The error for \"" + name + "\" of keyword " +
+                         "\"target_error\" in the input file must be " +
+                         "greater than zero.\n")
+    
+    # ------ autoeq keyword ------- #
+    # The potential energy is sampled every 10 steps unless an interval is
+    # given.
+    autoeqget=params.get('autoeq')
+    if autoeqget is not None:
+        try:
+            sim.autoeq=np.ulonglong(autoeqget[0]) if autoeqget else 10
+        except ValueError:
+            sys.exit("The interval of keyword \"autoeq\" in the input " +
+                     "file is not a valid integer.\n")
+        if sim.autoeq == 0:
+            sys.exit("The interval of keyword \"autoeq\" in the input " +
+                     "file must be an integer greater than zero.\n")
+    
+    # ----- reweight keyword ------ #
+    # The potential energy and virial are sampled every sweep unless an
+    # interval is given. The .npz file is named after the output file 
+    # unless a name is given.
+    reweightget=params.get('reweight')
+    if reweightget is not None:
+        if sim.method != "mc":
+            sys.exit("The keyword \"reweight\" in the input file can " +
+                     "only be used with MC simulations.\n")
+        try:
+            sim.reweight=np.ulonglong(reweightget[0]) if reweightget else 1
+        except ValueError:
+            sys.exit("The interval of keyword \"reweight\" in the input " +
+                     "file is not a valid integer.\n")
+        if sim.reweight == 0:
+            sys.exit("The interval of keyword \"reweight\" in the input " +
+                     "file must be an integer greater than zero.\n")
+        if len(reweightget) > 1: sim.rwfile=reweightget[1]
+        else: sim.rwfile=os.path.splitext(args[2])[0] + ".rw.npz"
+    
+    # ------- hybrid keyword ------- #
+    # The keyword is followed by the number of time steps of each step of
+    # Hybrid MC. The dt keyword is then the starting time step.
+    hybridget=params.get('hybrid')
+    if hybridget is not None:
+        if sim.method != "mc":
+            sys.exit("The keyword \"hybrid\" in the input file can only be " +
+                     "used with MC simulations.\n")
+        try:
+            sim.hybrid=np.ulonglong(hybridget[0])
+        except (ValueError, IndexError):
+            sys.exit("The number of time steps of keyword \"hybrid\" in " +
+                     "the input file is missing or is not a valid integer.\n")
+        if sim.hybrid == 0:
+            sys.exit("The number of time steps of keyword \"hybrid\" in " +
+                     "the input file must be an integer greater than zero.\n")
+        if sim.npt:
+            sys.exit("The keyword \"hybrid\" in the input file can not be " +
+                     "used with NPT MC.\n")
+    
+    # ----- eventchain keyword ----- #
+    # The dt keyword is then the length of each chain.
+    if params.get('eventchain') is not None:
+        if sim.method != "mc":
+            sys.exit("The keyword \"eventchain\" in the input file can only " +
+                     "be used with MC simulations.\n")
+        if sim.potential != "lj" or sim.table:
+            sys.exit("The keyword \"eventchain\" in the input file can only " +
+                     "be used with the lj potential without a table.\n")
+        if sim.npt or sim.hybrid:
+            sys.exit("The keyword \"eventchain\" in the input file can not " +
+                     "be used with NPT MC or Hybrid MC.\n")
+        sim.eventchain=1
+    
+    # ---- checkerboard keyword ---- #
+    # The sweeps are run on the number of threads of the threads keyword.
+    if params.get('checkerboard') is not None:
+        if sim.method != "mc":
+            sys.exit("The keyword \"checkerboard\" in the input file can " +
+                     "only be used with MC simulations.\n")
+        if sim.npt or sim.hybrid or sim.eventchain:
+            sys.exit("The keyword \"checkerboard\" in the input file can " +
+                     "not be used with NPT MC, Hybrid MC, or event-chain " +
+                     "MC.\n")
+        sim.checkerboard=1
+    
+    # ------- widom keyword -------- #
+    # The keyword is followed by the interval for the insertions and, 
+    # optionally, the number of ghosts inserted each time.
+    widomget=params.get('widom')
+    if widomget is not None:
+        try:
+            sim.widom=np.ulonglong(widomget[0])
+            sim.ninsert=np.ulonglong(widomget[1]) if len(widomget) > 1 \
+                        else 1000
+        except (ValueError, IndexError):
+            sys.exit("The interval of keyword \"widom\" in the input file " +
+                     "is missing or is not a valid integer.\n")
+        if sim.widom == 0 or sim.ninsert == 0:
+            sys.exit("The interval and the number of insertions of keyword " +
+                     "\"widom\" in the input file must be integers greater " +
+                     "than zero.\n")
+        if sim.npt:
+            sys.exit("The keyword \"widom\" in the input file can not be " +
+                     "used with NPT MC.\n")
+    
+    # ------ restart keyword ------ #
+    restartget=params.get('restart')
+    if restartget:
+        sim.restartfile=restartget[0]
+    
+    # ----- tempering keyword ----- #
+    # The keyword is followed by the interval for swaps and the increasing
+    # temperatures of the replicas, which replace the temperature of the
+    # temp keyword.
+    temperingget=params.get('tempering')
+    if temperingget:
+        if sim.method != "mc":
+            sys.exit("The keyword \"tempering\" in the input file can " +
+                     "only be used with MC simulations.\n")
+        try:
+            sim.swap=np.ulonglong(temperingget[0])
+            sim.ladder=np.array(temperingget[1:], dtype=np.float64)
+        except ValueError:
+            sys.exit("The values of keyword \"tempering\" in the input " +
+                     "file must be an integer interval for swaps " +
+                     "followed by the temperatures.\n")
+        if sim.swap == 0 or len(sim.ladder) < 2 or sim.ladder[0] <= 0.0 or \
+           np.any(np.diff(sim.ladder) <= 0.0):
+            sys.exit("The keyword \"tempering\" in the input file needs an " +
+                     "interval for swaps greater than zero and at least " +
+                     "two increasing temperatures.\n")
+        for key in ("rdf", "movie", "checkpoint", "restart", "autoeq", 
+                    "target_error", "reweight", "npt", "widom", "hybrid",
+                    "eventchain", "checkerboard"):
+            if key in params:
+                sys.exit("The keyword \"" + key + "\" in the input file " +
+                         "can not be used with parallel tempering.\n")
             
     sim.inputfile=args[1]
     sim.outputfile=args[2]
     sim.length = np.double(sim.N/sim.rho)**(1.0/3.0)
-    sim.utail = 8.0 / 3.0*np.pi*sim.rho*(1.0 / 3.0 * sim.rc**(-9.0) -
-                                         sim.rc**(-3.0))
-    sim.ptail = 16.0 / 3.0*np.pi*sim.rho*sim.rho*(2.0 / 3.0 * sim.rc**(-9.0) -
-                                                  sim.rc**(-3.0))
+    tail_corrections(sim)
+    build_table(sim)
+    sim.ncell = cells_per_side(sim.length, sim.rc)
 
     if rdfget:
         if sim.rdfmax > sim.length * 0.5:
             sys.exit("The max length of the rdf cannot be greater than half the \
             box length (L/2=%.3lf).\n" % (sim.length * 0.5))
+    
+    if sim.npt:
+        if sim.rc > sim.length * 0.5:
+            sys.exit("The cutoff cannot be greater than half the box " +
+                     "length (L/2=%.3lf) for NPT MC.\n" % (sim.length * 0.5))
+    
+    if sim.checkerboard:
+        if board_cells(sim.length, sim.rc) == 0:
+            sys.exit("The box must be at least 4 cutoff radii long " +
+                     "(L=%.3lf) for the checkerboard.\n" % sim.length)
+    
+    if sim.eventchain:
+        if sim.rc >= sim.length * 0.5:
+            sys.exit("The cutoff must be less than half the box length " +
+                     "(L/2=%.3lf) for event-chain MC.\n" % (sim.length * 0.5))
+    
+    if sim.neighbor == "verlet":
+        if sim.rc + sim.skin > sim.length * 0.5:
+            sys.exit("The cutoff plus the skin of the neighbor list cannot " +
+                     "be greater than half the box length (L/2=%.3lf).\n" % 
+                     (sim.length * 0.5))
 
     return sim
\ No newline at end of file
@@ -0,0 +1,229 @@
+# reweight is part of ljpy for Lennard Jones simulations.                   #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# reweight.py                                                             	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It records the potential energy and virial of
+MC simulations (keyword reweight) and uses them to predict the averages at
+other temperatures by histogram reweighting, so one simulation, or a few at
+different temperatures, gives a whole curve of the energy, pressure, and
+heat capacity against temperature. The prediction is written with the 
+following command.
+
+  python ljpy.py reweight <Tmin> <Tmax> <nT> <reportfile> <samplefile> ...
+
+The samples of one simulation are reweighted to temperature T with the 
+weights exp[-(1/T - 1/T0)U] (single histogram). The samples of several 
+simulations at different temperatures are combined with the multiple 
+histogram method of Ferrenberg and Swendsen (Phys. Rev. Lett. 63, 1195, 
+1989). The dimensionless free energy f_k of each simulation k is the 
+solution of
+
+    exp(-f_k) = sum over samples j of exp(-U_j/T_k) / 
+                sum over simulations m of n_m exp(f_m - U_j/T_m)
+
+and the weight of sample j at T is exp(-U_j/T)/sum_m n_m exp(f_m - U_j/T_m).
+The equations are solved with Newton's method as the minimum of a convex
+function of the f_k (Shirts and Chodera, J. Chem. Phys. 129, 124105, 2008),
+which takes a few iterations even when the energies of the simulations 
+barely overlap, where the simple iteration of the equations takes many 
+thousands. They are solved when the number of samples each simulation is
+predicted to have matches its actual number within a relative 1e-8. The 
+program stops with an error if they are not solved.
+The samples are used one by one instead of being sorted into bins, so no
+bin width has to be chosen. Correlated samples count less: each sample of 
+simulation m is weighted by 1/g_m, where g_m is the statistical inefficiency
+of the simulation, and n_m is its number of samples divided by g_m.
+
+The predictions are only good where the energies sampled at T overlap with
+those of the simulations. The report gives the effective number of samples
+at each temperature, which is small where the prediction can not be trusted.
+
+All the simulations must have the same number of particles, density, and
+potential.
+"""
+
+# Import relevant libraries
+import os, sys
+import numpy as np
+from src.equilibration import inefficiency
+
+# The class that records the samples of an MC simulation
+class samplewriter:
+    # This function is passed a simulation object and the number of 
+    # samples to keep from the sample file, which is used when a simulation
+    # is restarted. The samples are started over if it is None.
+    def __init__(self, sim, keep=None):
+        # pe and virial hold the samples of the whole system
+        # n is the number of samples
+        self.sim=sim
+        self.pe=np.zeros(1024)
+        self.virial=np.zeros(1024)
+        self.n=0
+        if keep is not None and keep > 0:
+            data=np.load(sim.rwfile)
+            self.pe=np.resize(data["pe"][:keep], max(keep, 1024))
+            self.virial=np.resize(data["virial"][:keep], max(keep, 1024))
+            self.n=keep
+    
+    # This function is passed the potential energy and virial of the 
+    # system. It adds the sample.
+    def sample(self, pe, virial):
+        if self.n == len(self.pe):
+            self.pe=np.resize(self.pe, 2*self.n)
+            self.virial=np.resize(self.virial, 2*self.n)
+        self.pe[self.n]=pe
+        self.virial[self.n]=virial
+        self.n+=1
+    
+    # This function writes the samples to the sample file and returns the
+    # number of samples. The file is replaced in one step so a stopped job
+    # leaves a complete file.
+    def flush(self):
+        sim=self.sim
+        tmp=sim.rwfile + ".tmp.npz"
+        np.savez(tmp, T=sim.T, N=sim.N, rho=sim.rho, length=sim.length,
+                 utail=sim.utail, ptail=sim.ptail, potential=sim.potential,
+                 pe=self.pe[:self.n], virial=self.virial[:self.n])
+        os.replace(tmp, sim.rwfile)
+        return(self.n)
+
+# This function is passed an array. It returns the log of the sum of the
+# exponentials of its elements along the last axis without overflow.
+def logsumexp(a):
+    amax=a.max(axis=-1, keepdims=True)
+    return(np.log(np.exp(a - amax).sum(axis=-1)) + amax[...,0])
+
+# This function is passed the energies of all the samples, the log of the
+# weight of each sample (minus the log of the statistical inefficiency of
+# its simulation), the inverse temperatures of the simulations, the 
+# effective number of samples of each simulation, and the free energies.
+# It returns the value of the convex function minimized by the free 
+# energies, its gradient and Hessian with respect to the free energies of
+# all but the first simulation (which is zero), and the log of the 
+# denominator of the weight of each sample.
+def objective(U, lng, beta, neff, f):
+    lnp=(np.log(neff) + f)[None,:] - np.outer(U, beta)
+    lnden=logsumexp(lnp)
+    F=np.dot(np.exp(lng), lnden) - np.dot(neff, f)
+    p=np.exp(lnp - lnden[:,None])   # share of sample j of each simulation
+    wp=np.exp(lng)[:,None]*p
+    grad=wp.sum(axis=0) - neff
+    hess=np.diag(wp.sum(axis=0)) - np.dot(wp.T, p)
+    return(F, grad[1:], hess[1:,1:], lnden)
+
+# This function is passed the energies of all the samples, the log of the
+# weight of each sample (minus the log of the statistical inefficiency of
+# its simulation), the inverse temperatures of the simulations, the 
+# effective number of samples of each simulation, and the first guess of
+# the free energies. It returns the dimensionless free energies of the 
+# simulations and the log of the denominator of the weight of each sample.
+# The step of Newton's method is halved until the convex function 
+# decreases.
+def freeenergies(U, lng, beta, neff, f, tol=1.0e-8, maxiter=100):
+    f=f - f[0]
+    F, grad, hess, lnden = objective(U, lng, beta, neff, f)
+    for it in range(maxiter):
+        if np.all(np.abs(grad) <= tol*neff[1:]): return(f, lnden)
+        step=np.zeros(len(beta))
+        step[1:]=-np.linalg.lstsq(hess, grad, rcond=None)[0]
+        t=1.0
+        while t > 1.0e-10:
+            new=objective(U, lng, beta, neff, f + t*step)
+            if new[0] <= F + 1.0e-4*t*np.dot(grad, step[1:]): break
+            t*=0.5
+        else:
+            break
+        f=f + t*step
+        F, grad, hess, lnden = new
+    if np.all(np.abs(grad) <= tol*neff[1:]): return(f, lnden)
+    sys.exit("The free energies of the simulations for reweighting did not "
+             "converge. The energies of the simulations may not overlap.\n")
+
+# This function is passed the lowest and highest temperatures, the number
+# of temperatures, the name of the report file, and the names of the
+# sample files. It writes the predicted averages at each temperature.
+def reweightreport(Tmin, Tmax, nT, reportfile, samplefiles):
+    runs=[]
+    for name in samplefiles:
+        if not os.path.isfile(name):
+            sys.exit("The sample file \"" + name + "\" does not exist.\n")
+        runs.append(dict(np.load(name)))
+    first=runs[0]
+    for run in runs[1:]:
+        if int(run["N"]) != int(first["N"]) or \
+           not np.isclose(run["rho"], first["rho"]) or \
+           str(run["potential"]) != str(first["potential"]):
+            sys.exit("The sample files are not all from simulations with " +
+                     "the same N, density, and potential.\n")
+    N=int(first["N"])
+    rho=float(first["rho"])
+    V=float(first["length"])**3.0
+    utail=float(first["utail"])
+    ptail=float(first["ptail"])
+    
+    # Combine the samples of all the simulations
+    U=np.concatenate([run["pe"] for run in runs])
+    W=np.concatenate([run["virial"] for run in runs])
+    beta=np.array([1.0/float(run["T"]) for run in runs])
+    g=np.array([inefficiency(run["pe"]) for run in runs])
+    neff=np.array([len(run["pe"]) for run in runs])/g
+    lng=np.concatenate([np.full(len(run["pe"]), -np.log(gk)) 
+                        for run, gk in zip(runs, g)])
+    # The first guess of the free energies integrates the average energy 
+    # of the simulations over 1/T, since d(f)/d(1/T) is the average energy
+    order=np.argsort(beta)
+    ubar=np.array([run["pe"].mean() for run in runs])[order]
+    f0=np.zeros(len(runs))
+    f0[order]=np.concatenate(([0.0], np.cumsum(np.diff(beta[order])*
+                                               (ubar[1:] + ubar[:-1])/2.0)))
+    f, lnden = freeenergies(U, lng, beta, neff, f0)
+    
+    fp=open(reportfile, "w")
+    fp.write("Histogram reweighting of {} simulation(s) of {} particles at "
+             "rho*={:.4f}\n\n".format(len(runs), N, rho))
+    fp.write("{:>30}  {:>10}  {:>10}  {:>12}\n".format("Sample File", "T", 
+             "Samples", "Inefficiency"))
+    for name, run, gk in zip(samplefiles, runs, g):
+        fp.write("{:>30}  {:10.6f}  {:10d}  {:12.2f}\n".format(
+                 os.path.basename(name), float(run["T"]), len(run["pe"]), gk))
+    fp.write("\n{:>10}  {:>12}  {:>12}  {:>12}  {:>12}\n".format("T", "PE", 
+             "P", "Cv", "Eff. Samples"))
+    for T in np.linspace(Tmin, Tmax, nT):
+        lnw=lng - U/T - lnden
+        w=np.exp(lnw - lnw.max())
+        w/=w.sum()
+        u=np.dot(w, U)
+        u2=np.dot(w, U*U)
+        P=rho*T + np.dot(w, W)/3.0/V + ptail
+        cv=(u2 - u*u)/(T*T)/N + 3.0/2.0
+        fp.write("{:10.6f}  {:12.6f}  {:12.6f}  {:12.6f}  {:12.1f}\n".format(
+                 T, u/N + utail, P, cv, 1.0/np.sum(w*w)))
+    fp.write("\nThe effective number of samples is (sum w)^2/sum w^2 of the "
+             "weights of the\nsamples. The predictions are not reliable "
+             "where it is small.\n")
+    fp.close()
@@ -0,0 +1,182 @@
+# rng is part of ljpy for Lennard Jones simulations.                        #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# rng.py                                                                  	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It has the random number generators of ljpy.
+They are built on a counter-based generator, Philox4x32-10 (Salmon, Moraes,
+Dror, and Shaw, "Parallel random numbers: as easy as 1, 2, 3," SC11, 2011).
+The generator has no state that is updated by a draw. The random numbers 
+are a function of a key, which comes from the seed keyword, and a counter of
+four 32-bit words, so any thread can draw the numbers of any counter in any
+order and always get the same numbers.
+
+The simulations draw their numbers from streams. A stream has a number that
+tells it apart from the other streams made from the same seed, and each 
+part of a simulation that needs random numbers has its own stream:
+
+    imoves:     the MC moves, volume moves, Hybrid MC steps, and event chains
+    ivel:       the initial velocities of MD
+    iwidom:     the ghosts of the Widom insertions
+    iswap:      the swaps of parallel tempering
+    ireplica+k: the moves of replica k of parallel tempering
+
+So adding, for example, Widom insertions to a simulation does not change 
+its trajectory. A stream fills a buffer with many numbers at once (the 
+numbers of a sweep for the MC moves) and hands them out one at a time, so
+a draw in the compiled functions is a read from an array. The state of a
+stream is a few integers and the buffer, which are saved in checkpoints.
+
+The counter of the numbers of a stream is (n_lo, n_hi, stream, 2), where n 
+is the number of the pair of numbers in the stream. The parallel sweeps of
+the checkerboard build their own counters, with a last word of 0 or 1, so
+they never draw the numbers of a stream.
+
+The 32-bit words are held in 64-bit integers. The product of two words can
+exceed the largest signed integer, but its bits are the same as those of 
+the unsigned product, which is all that is needed for the high and low 
+words.
+"""
+
+# Import relevant libraries
+import numpy as np
+import numba as nb
+from numba import njit
+from src.jit_cache import cacheable
+
+# Numbers of the streams
+imoves=0    # MC moves, volume moves, Hybrid MC steps, and event chains
+ivel=1      # initial velocities of MD
+iwidom=2    # ghosts of the Widom insertions
+iswap=3     # swaps of parallel tempering
+ireplica=4  # moves of replica k of parallel tempering (ireplica+k)
+
+# Constants of Philox4x32
+mask=0xFFFFFFFF
+philox_m0=0xD2511F53
+philox_m1=0xCD9E8D57
+philox_w0=0x9E3779B9
+philox_w1=0xBB67AE85
+
+rng_spec = [('k0',nb.int64), ('k1',nb.int64), ('id',nb.int64), 
+            ('n',nb.int64), ('buf',nb.float64[:]), ('pos',nb.int64)]
+
+# The class for a stream of random numbers
+@cacheable
+@nb.experimental.jitclass(rng_spec)
+class stream(object):
+    def __init__(self, seed, id, size):
+        # k0 and k1 are the words of the key made from the seed
+        # id is the number of the stream
+        # n is the number of pairs of numbers drawn into the buffer so far
+        # buf holds the numbers and pos is the next one to hand out
+        self.k0, self.k1 = seedkey(seed)
+        self.id=id
+        self.n=0
+        self.buf=np.zeros(size + size%2)
+        self.pos=size + size%2
+        
+        return
+
+# This function is passed a seed. It returns the two 32-bit words of the 
+# key of the generator.
+@njit(cache=True)
+def seedkey(seed):
+    return(seed & mask, (seed >> 32) & mask)
+
+# This function is passed the four 32-bit words of a counter and the two 
+# words of a key. It returns the four 32-bit random words of the counter.
+@njit(cache=True)
+def philox(c0, c1, c2, c3, k0, k1):
+    for i in range(10):
+        p0=philox_m0*c0
+        p1=philox_m1*c2
+        hi0=(p0 >> 32) & mask
+        hi1=(p1 >> 32) & mask
+        c0, c1, c2, c3 = (hi1 ^ c1 ^ k0), (p1 & mask), (hi0 ^ c3 ^ k1), \
+                         (p0 & mask)
+        k0=(k0 + philox_w0) & mask
+        k1=(k1 + philox_w1) & mask
+    return(c0, c1, c2, c3)
+
+# This function is passed the four 32-bit words of a counter and the two 
+# words of a key. It returns two random numbers uniform on [0,1) with 53 
+# random bits each.
+@njit(cache=True)
+def uniforms(c0, c1, c2, c3, k0, k1):
+    x0, x1, x2, x3 = philox(c0, c1, c2, c3, k0, k1)
+    u0=((x0 >> 5)*67108864.0 + (x1 >> 6))*(1.0/9007199254740992.0)
+    u1=((x2 >> 5)*67108864.0 + (x3 >> 6))*(1.0/9007199254740992.0)
+    return(u0, u1)
+
+# This function is passed a stream. It fills its buffer with the next 
+# numbers of the stream.
+@njit(cache=True)
+def refill(rng):
+    buf=rng.buf
+    for b in range(0, len(buf), 2):
+        buf[b], buf[b+1] = uniforms(rng.n & mask, rng.n >> 32, rng.id, 2,
+                                    rng.k0, rng.k1)
+        rng.n+=1
+    rng.pos=0
+
+# This function is passed a stream. It returns the next random number of the
+# stream, which is uniform on [0,1).
+@njit(cache=True)
+def draw(rng):
+    if rng.pos == len(rng.buf): refill(rng)
+    u=rng.buf[rng.pos]
+    rng.pos+=1
+    return(u)
+
+# This function is passed a stream and the ends of a range. It returns a 
+# random number uniform on the range.
+@njit(cache=True)
+def uniform(rng, a, b):
+    return(a + (b - a)*draw(rng))
+
+# This function is passed a stream and two integers. It returns a random
+# integer from a to b, including both.
+@njit(cache=True)
+def randint(rng, a, b):
+    return(a + min(np.int64(draw(rng)*(b - a + 1)), b - a))
+
+# This function is passed a stream, a mean, and a standard deviation. It
+# returns a random number from the normal distribution by the Box-Muller
+# transform.
+@njit(cache=True)
+def gauss(rng, mu, sigma):
+    u=1.0 - draw(rng)
+    return(mu + sigma*np.sqrt(-2.0*np.log(u))*np.cos(2.0*np.pi*draw(rng)))
+
+# This function is passed a stream and a number of random numbers. It 
+# returns an array of the next numbers of the stream.
+@njit(cache=True)
+def draws(rng, n):
+    x=np.empty(n)
+    for k in range(n): x[k]=draw(rng)
+    return(x)
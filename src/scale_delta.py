@@ -28,16 +28,19 @@
 
 """
 This module is part of ljpy. It adjusts the maximum displacement for the MC
-simulation to obtain an acceptance ratio of 30%.
+simulation to obtain an acceptance ratio of 30%. It also adjusts the maximum
+change of the volume of NPT MC in the same way and the time step of Hybrid 
+MC to obtain an acceptance ratio of 70%.
 """
 # Import relevant libraries
 import numpy as np
+from numba import njit
 
 # This function takes a simulation object, and two props objects--one
 # for the instantaneous properties and one for the average properties--
 # and tries to scale the maximum displacement to acheive a 30% 
 # acceptance ratio.
-
+@njit(cache=True)
 def scale_delta(sim,iprop,aprop):
     # Set the desired acceptance ratio
     dratio=0.3
@@ -53,6 +56,57 @@ def scale_delta(sim,iprop,aprop):
             if ratio < dratio: sim.dt*=0.95
             if ratio > dratio: sim.dt*=1.05
     
+    aprop.naccept+=iprop.naccept
+    aprop.ntry+=iprop.ntry
+    aprop.nleave+=iprop.nleave
+    iprop.naccept=0
+    iprop.ntry=0
+    iprop.nleave=0
+
+# This function takes a simulation object, and two props objects--one
+# for the instantaneous properties and one for the average properties--
+# and tries to scale the maximum change of ln(volume) to acheive a 30% 
+# acceptance ratio of the volume moves.
+@njit(cache=True)
+def scale_dv(sim,iprop,aprop):
+    # Set the desired acceptance ratio
+    dratio=0.3
+    
+    # Calculate the acceptance ratio since the last time 
+    # scale_dv was called
+    ratio=np.double(iprop.nvaccept)/np.double(iprop.nvtry)
+    
+    # Increase the maximum change if the ratio is lower than
+    # the desired value or decrease the ratio if it is higher
+    if sim.dv < 1.0: # set a max on the change
+        if ratio < dratio-0.02 or ratio > dratio+0.02:
+            if ratio < dratio: sim.dv*=0.95
+            if ratio > dratio: sim.dv*=1.05
+    
+    aprop.nvaccept+=iprop.nvaccept
+    aprop.nvtry+=iprop.nvtry
+    iprop.nvaccept=0
+    iprop.nvtry=0
+
+# This function takes a simulation object, and two props objects--one
+# for the instantaneous properties and one for the average properties--
+# and tries to scale the time step to acheive a 70% acceptance ratio of the
+# steps.
+@njit(cache=True)
+def scale_dt(sim,iprop,aprop):
+    # Set the desired acceptance ratio
+    dratio=0.7
+    
+    # Calculate the acceptance ratio since the last time 
+    # scale_dt was called
+    ratio=np.double(iprop.naccept)/np.double(iprop.ntry)
+    
+    # Increase the time step if the ratio is higher than the desired value
+    # or decrease it if it is lower
+    if ratio < dratio-0.02 or ratio > dratio+0.02:
+        if ratio < dratio: sim.dt*=0.95
+        if ratio > dratio: sim.dt*=1.05
+    
     aprop.naccept+=iprop.naccept
     aprop.ntry+=iprop.ntry
     iprop.naccept=0
@@ -38,13 +38,14 @@ correct NVT distribution of velocities.
 import numpy as np
 from numba import njit
 
-# This function is passed the simulation object, a list of site objects and 
+# This function is passed the simulation object, a particles object and 
 # the desired temperature.
 # It scales the velocities to the desired temperature.
-@njit
+@njit(cache=True)
 def scalevelocities(sim,atom,temp):
     scale=np.sqrt(sim.T/temp)
+    v=atom.v
     for i in range(sim.N):
-        atom[i].vx=atom[i].vx*scale;
-        atom[i].vy=atom[i].vy*scale;
-        atom[i].vz=atom[i].vz*scale;
\ No newline at end of file
+        v[i,0]=v[i,0]*scale;
+        v[i,1]=v[i,1]*scale;
+        v[i,2]=v[i,2]*scale;
\ No newline at end of file
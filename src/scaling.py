@@ -0,0 +1,163 @@
+# scaling is part of ljpy for Lennard Jones simulations.                    #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# scaling.py                                                              	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It writes a report of how the pair loops scale
+with the number of threads. The system described by an input file is set up
+and the force and rdf loops are timed for 1, 2, 4, ... threads up to the 
+number of threads available. The results of each thread count are compared
+to the serial loops. For the Lennard Jones potential, the serial force loop
+is also timed with the potential calculated directly and looked up in a 
+table. It is run with the following command.
+
+  python ljpy.py scaling <inputfile> <reportfile>
+"""
+
+# Import relevant libraries
+import time
+import numpy as np
+import numba as nb
+from datetime import datetime
+from src.read_input import readinput
+from src.initialize_positions import initializepositions
+from src.forces import forces, forces_nlist
+from src.neighbor_list import nlist, build_nlist
+from src.rdf import rdf_accumulate
+from src.potential import build_table
+import src.dhist as dh
+
+# This function is passed the maximum number of threads.
+# It returns the list of thread counts to time.
+def threadcounts(nmax):
+    counts=[]
+    n=1
+    while n < nmax:
+        counts.append(n)
+        n*=2
+    counts.append(nmax)
+    return(counts)
+
+# This function is passed a function and its arguments and the number of
+# repeats. It returns the shortest time of one call.
+def timecall(func, args, nrep):
+    func(*args) # the first call compiles the function
+    best=np.inf
+    for k in range(nrep):
+        t0=time.perf_counter()
+        func(*args)
+        best=min(best, time.perf_counter()-t0)
+    return(best)
+
+# This function is passed the name of the input file, the name of the
+# report file, and the number of times each loop is repeated. It writes
+# the scaling report.
+def scalingreport(inputfile, reportfile, nrep=5):
+    # Set up the system described by the input file
+    sim=readinput(["ljpy.py", inputfile, reportfile])
+    atom=initializepositions(sim)
+    
+    # Start the threads of numba before the first kernel runs (see 
+    # src/simulate.py)
+    nb.set_num_threads(1)
+    
+    # The histogram of the rdf loop
+    if sim.rdf: rdfh=dh.hist(sim.rdfmin, sim.rdfmax, sim.rdfN)
+    else: rdfh=dh.hist(0.8, 0.5*sim.length, 100)
+    
+    # The force loop that the simulation would use
+    if sim.neighbor == "verlet":
+        nl=nlist(sim.N)
+        build_nlist(sim, atom, nl)
+        fcall, fargs = forces_nlist, (sim, atom, nl)
+    else:
+        fcall, fargs = forces, (sim, atom)
+    
+    # The serial results to compare against
+    sim.nthreads=1
+    pe0, virial0 = fcall(*fargs)
+    f0=atom.f.copy()
+    
+    # Time the loops for each number of threads
+    rows=[]
+    for n in threadcounts(nb.config.NUMBA_NUM_THREADS):
+        nb.set_num_threads(n)
+        sim.nthreads=n
+        tf=timecall(fcall, fargs, nrep)
+        tr=timecall(rdf_accumulate, (sim, atom, rdfh), nrep)
+        pe, virial = fcall(*fargs)
+        dpe=abs(pe-pe0)/abs(pe0)
+        dvir=abs(virial-virial0)/abs(virial0)
+        df=np.max(np.abs(atom.f-f0))
+        rows.append((n, tf, tr, dpe, dvir, df))
+        print("Timed " + str(n) + " threads\n")
+    
+    # Time the serial force loop with the potential calculated directly 
+    # and looked up in the table
+    if sim.potential == "lj":
+        ntable=sim.table if sim.table else 100000
+        sim.nthreads=1
+        sim.table=0
+        pe0, virial0 = fcall(*fargs)
+        f0=atom.f.copy()
+        tdirect=timecall(fcall, fargs, nrep)
+        sim.table=ntable
+        build_table(sim)
+        pe, virial = fcall(*fargs)
+        ttable=timecall(fcall, fargs, nrep)
+        tabrow=(tdirect, ttable, abs(pe-pe0)/abs(pe0), 
+                abs(virial-virial0)/abs(virial0), np.max(np.abs(atom.f-f0)))
+        print("Timed the potential table\n")
+    
+    # Write the report
+    fp=open(reportfile, "w")
+    fp.write("Thread scaling of the pair loops for " + str(sim.N) + 
+             " LJ Particles at rho*={:.4f}\n\n".format(sim.rho))
+    fp.write("Input File:         " + inputfile + "\n")
+    fp.write("Neighbor Method:    " + sim.neighbor + "\n")
+    fp.write("Threads Available:  " + str(nb.config.NUMBA_NUM_THREADS) + "\n")
+    fp.write("Threading Layer:    " + nb.threading_layer() + "\n")
+    fp.write("Date:               " + str(datetime.now()) + "\n\n")
+    fp.write("Times are the shortest of {} calls.\n".format(nrep))
+    fp.write("Differences are relative to the serial loop.\n\n")
+    fp.write("Threads     Forces (s)   Speedup  Efficiency     RDF (s)   " +
+             "Speedup     PE Diff.     Vir. Diff.   Max Force Diff.\n\n")
+    for n, tf, tr, dpe, dvir, df in rows:
+        fp.write("{:<7}  {:13.6f}  {:8.2f}  {:10.2f}  {:10.6f}  {:8.2f}  "
+                 "{:11.3e}  {:13.3e}  {:16.3e}\n".format(n, tf, 
+                 rows[0][1]/tf, rows[0][1]/tf/n, tr, rows[0][2]/tr, 
+                 dpe, dvir, df))
+    if sim.potential == "lj":
+        fp.write("\nSerial force loop with the potential calculated directly" +
+                 " and looked up\nin a table of {} points.\n".format(ntable) +
+                 "Differences are relative to the direct calculation.\n\n")
+        fp.write("Direct (s)      Table (s)   Speedup     PE Diff.     " +
+                 "Vir. Diff.   Max Force Diff.\n\n")
+        fp.write("{:10.6f}  {:13.6f}  {:8.2f}  {:11.3e}  {:13.3e}  "
+                 "{:16.3e}\n".format(tabrow[0], tabrow[1], 
+                 tabrow[0]/tabrow[1], tabrow[2], tabrow[3], tabrow[4]))
+    fp.close()
@@ -0,0 +1,93 @@
+# simulate is part of ljpy for Lennard Jones simulations.                   #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# simulate.py                                                             	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It runs one simulation from its input file: it
+reads the input file, sets the seed and the threads, initializes or restores
+the sites and the output file, and calls the driver of the method (NVE MD, 
+NVT or NPT MC, or parallel tempering MC). It is used by ljpy.py for a 
+single simulation and by the workers of a sweep (see src/sweep.py) for each
+state point, so both run a simulation in the same way.
+"""
+
+# Import relevant libraries
+import time
+from numba import set_num_threads
+from src.read_input import readinput
+from src.initialize_positions import initializepositions
+from src.initialize_files import initializefiles
+from src.initialize_velocities import initializevelocities
+from src.nvemd import nvemd
+from src.nvtmc import nvtmc
+from src.tempering import ptmc
+from src.checkpoint import loadcheckpoint
+
+# This function is passed the command line arguments (the program, the 
+# input file, and the output file) and the number of the point of a sweep
+# (None for a single simulation). It runs the simulation and returns the
+# simulation object.
+def simulate(args, index=None):
+    # Read the input file and store the simulation parameters to an object
+    sim=readinput(args)
+    
+    # Set the number of threads used by the parallel loops. This also starts
+    # the threads of numba, which must be running before a kernel loaded 
+    # from the cache calls a parallel loop, even with one thread. Parallel
+    # tempering starts them in each of its workers instead, since a process
+    # that forks after starting them (with the TBB threading layer) hangs 
+    # when it exits.
+    if not sim.swap: set_num_threads(sim.nthreads)
+    
+    # Use the seed specified in the input file. Otherwise, get the seed 
+    # from the system clock. Points of a sweep started in the same second 
+    # get different seeds.
+    # Note: Every part of the simulation that uses random numbers makes its
+    # own stream from the seed (see src/rng.py), so a given seed value 
+    # always gives the same sequence of random numbers to each part.
+    if sim.seedkeyvalue == "generate":
+        if index is None: sim.seed=-1*int(time.time())
+        else: sim.seed=-1*(int(time.time())*1000 + index)
+    
+    # Initialize or read in positions and, for an md simulation, velocities
+    atom=initializepositions(sim)
+    if sim.method == "md": initializevelocities(sim, atom)
+    
+    # Restore the sites from a checkpoint if the simulation is restarted. 
+    # The rest of the state is restored by the driver.
+    chk=None
+    if sim.restartfile: chk=loadcheckpoint(sim, atom)
+    
+    # Initialize the output files. A restarted simulation continues them.
+    initializefiles(sim, atom, chk)
+    print("Initialization Complete\n")
+    
+    # Call the driver for the md, mc, or parallel tempering mc simulation
+    if sim.method == "md": nvemd(sim, atom, chk)
+    elif sim.swap: ptmc(sim, atom)
+    else: nvtmc(sim, atom, chk)
+    return(sim)
@@ -0,0 +1,274 @@
+# sweep is part of ljpy for Lennard Jones simulations.                      #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# sweep.py                                                                	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It runs a sweep over many state points, for 
+example a grid of temperatures and densities, on a pool of worker processes
+and collects the averages of every point into one summary table. It is run
+with the following command.
+
+  python ljpy.py sweep <baseinputfile> <manifestfile> <summaryfile>
+
+The base input file is a normal input file. The manifest lists the keywords
+that change from point to point, one keyword per line followed by its 
+values or by "range start stop step" (stop is included). A keyword that
+takes several values, such as npt or neighbor, has its alternatives 
+separated by "|", and each alternative is all the values of the keyword.
+Every combination of the values is run. A line that starts with "point" 
+adds a set of keywords and values that go together, and the sets are 
+combined with the other lines. The keywords of a point are separated by 
+";", or, if each has one value, can be given as pairs of a keyword and a 
+value. The "workers" line sets the number of worker processes, which is 
+otherwise the number of processors divided by the threads of each point.
+For example,
+
+    workers 4
+    temp    range 0.8 1.2 0.1
+    npt     0.5 0.05 | 1.0 0.05 | 2.0 0.05
+    point   N 500 esteps 2000
+    point   N 864; esteps 4000; neighbor cell
+
+runs 30 points. The input, output, and log files of the points are written
+to a directory named after the summary file. A point that fails is marked
+in the summary and does not stop the other points. The points are run in 
+the same way as ljpy.py runs a simulation (see src/simulate.py), so a 
+point with the tempering keyword runs parallel tempering. Its averages at
+each temperature are only in its output file.
+
+Each worker loads the compiled kernels from the cache once and runs many
+points, so only the first point of a worker pays for the functions that
+can not be cached. The workers are started by forking the main process, 
+and the points are run one at a time in the main process where fork is not
+available.
+"""
+
+# Import relevant libraries
+import os, sys, time, itertools, traceback
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+import numpy as np
+from src.read_input import readinput
+from src.simulate import simulate
+
+# The averages in the summary and the labels of their lines in the output
+# file
+averages = [("T", "Temperature:"), ("P", "Pressure:"), 
+            ("PE", "Potential Energy:"), ("KE", "Kinetic Energy:"),
+            ("TE", "Total Energy:"), ("Cv", "Heat Capacity:"),
+            ("D", "Diffusivity"), ("Rho", "Density:"),
+            ("mu", "Excess Chem. Potential:")]
+
+# This function is passed the name of the manifest file. It returns the 
+# number of workers (0 if not given) and a list of the points, where each 
+# point is a list of (keyword, value) pairs. The value holds all the values
+# of the keyword separated by spaces.
+def readmanifest(manifestfile):
+    if not os.path.isfile(manifestfile):
+        sys.exit("The manifest file \"" + manifestfile + "\" does not " +
+                 "exist.\n")
+    workers=0
+    sets=[]     # the alternatives of each line of the manifest
+    points=[]   # the sets of the point lines
+    fp=open(manifestfile)
+    for line in fp:
+        text=line.split('#',1)[0]
+        words=text.split()
+        if not words: continue
+        key, values = words[0], words[1:]
+        if not values:
+            sys.exit("The keyword \"" + key + "\" in the manifest file " +
+                     "has no values.\n")
+        rest=text.split(None, 1)[1]
+        if key == "workers":
+            workers=int(values[0])
+        elif key == "point":
+            if ";" in rest:
+                parts=[part.split() for part in rest.split(";")]
+                if any(len(part) < 2 for part in parts):
+                    sys.exit("Each keyword of a point line in the manifest " +
+                             "file separated by \";\" must have values.\n")
+                points.append([(part[0], " ".join(part[1:])) 
+                               for part in parts])
+            else:
+                if len(values)%2 != 0:
+                    sys.exit("A point line in the manifest file must have " +
+                             "pairs of a keyword and a value, or keywords " +
+                             "and their values separated by \";\".\n")
+                points.append(list(zip(values[0::2], values[1::2])))
+        elif "|" in rest:
+            alternatives=[" ".join(a.split()) for a in rest.split("|")]
+            if "" in alternatives:
+                sys.exit("An alternative of keyword \"" + key + "\" in the " +
+                         "manifest file has no values.\n")
+            sets.append([[(key, a)] for a in alternatives])
+        elif values[0] == "range":
+            try:
+                start, stop, step = (float(v) for v in values[1:4])
+            except ValueError:
+                sys.exit("The range of keyword \"" + key + "\" in the " +
+                         "manifest file must be start, stop, and step.\n")
+            n=int(np.floor((stop - start)/step + 1.0e-9)) + 1
+            sets.append([[(key, "{:.10g}".format(start + k*step))] 
+                         for k in range(n)])
+        else:
+            sets.append([[(key, v)] for v in values])
+    fp.close()
+    if points: sets.append(points)
+    return(workers, [sum(combo, []) for combo in itertools.product(*sets)])
+
+# This function is passed the lines of the base input file and the 
+# (keyword, value) pairs of a point. It returns the text of the input file
+# of the point, where the keywords of the point replace those of the base.
+def pointinput(base, pairs):
+    keys=set(key for key, value in pairs)
+    lines=[line for line in base 
+           if line.split('#',1)[0].split()[:1] not in [[key] for key in keys]]
+    lines+=[key + " " + value + "\n" for key, value in pairs]
+    return("".join(lines))
+
+# This function is passed the input file, the output file, and the log 
+# file of a point, and the number of the point. It runs the point in a 
+# worker and returns the number of the point, the wall time, and the error
+# message (None if the point finished). What the simulation prints is 
+# written to the log file.
+def runpoint(inputfile, outputfile, logfile, index):
+    start=time.perf_counter()
+    error=None
+    with open(logfile, "w") as log, redirect_stdout(log):
+        try:
+            simulate(["ljpy.py", inputfile, outputfile], index)
+        except SystemExit as err:
+            error=str(err).strip()
+        except Exception as err:
+            traceback.print_exc(file=log)
+            error=type(err).__name__ + ": " + str(err).strip()
+    return(index, time.perf_counter() - start, error)
+
+# This function is passed the output file of a point. It returns a 
+# dictionary of the averages and their errors read from the output file.
+def readaverages(outputfile):
+    values={}
+    if not os.path.isfile(outputfile): return(values)
+    fp=open(outputfile)
+    text=fp.read()
+    fp.close()
+    if "***Simulation Averages***" not in text: return(values)
+    for line in text.split("***Simulation Averages***")[1].splitlines():
+        for name, label in averages:
+            if line.startswith(label):
+                words=line[len(label):].split()
+                values[name]=float(words[0])
+                # The error is missing if the run was too short for it
+                if len(words) > 2 and words[1] == "+/-":
+                    try: values[name + "_err"]=float(words[2])
+                    except ValueError: pass
+    return(values)
+
+# This function is passed the base input file, the manifest file, and the
+# summary file. It runs every point of the sweep and writes the summary.
+def sweep(baseinputfile, manifestfile, summaryfile):
+    # Read the base input file, which is checked by reading it as the input
+    # of a simulation, and the manifest
+    base=readinput(["ljpy.py", baseinputfile, os.devnull])
+    fp=open(baseinputfile)
+    baselines=fp.readlines()
+    fp.close()
+    workers, points = readmanifest(manifestfile)
+    if workers <= 0: workers=max(1, (os.cpu_count() or 1)//base.nthreads)
+    workers=min(workers, len(points))
+    
+    # Write the input files of the points
+    pointdir=os.path.splitext(summaryfile)[0] + "_points"
+    os.makedirs(pointdir, exist_ok=True)
+    files=[]
+    for k, pairs in enumerate(points):
+        name=os.path.join(pointdir, "point{:04d}".format(k+1))
+        fp=open(name + ".input", "w")
+        fp.write(pointinput(baselines, pairs))
+        fp.close()
+        files.append((name + ".input", name + ".output", name + ".log", k))
+    print("Running {} points on {} workers\n".format(len(points), workers))
+    
+    # Run the points. A point whose worker dies is marked as failed.
+    results={}
+    if "fork" in mp.get_all_start_methods():
+        pool=ProcessPoolExecutor(workers, mp_context=mp.get_context("fork"))
+        futures={pool.submit(runpoint, *f): f[3] for f in files}
+        for future in futures:
+            try:
+                index, wall, error = future.result()
+            except Exception as err:
+                index, wall, error = futures[future], 0.0, \
+                                     "The worker stopped: " + str(err)
+            results[index]=(wall, error)
+            print("Point {} of {}: {}\n".format(index+1, len(points), 
+                  "finished" if error is None else "failed"))
+        pool.shutdown()
+    else:
+        for f in files:
+            index, wall, error = runpoint(*f)
+            results[index]=(wall, error)
+    
+    # Write the summary table with one row per point
+    keys=[]
+    for pairs in points:
+        for key, value in pairs:
+            if key not in keys: keys.append(key)
+    allvalues=[readaverages(f[1]) for f in files]
+    columns=[]  # the averages and errors found for at least one point
+    for name, label in averages:
+        for c in [name, name + "_err"]:
+            if any(c in values for values in allvalues): columns.append(c)
+    rows=[]
+    for k, pairs in enumerate(points):
+        wall, error = results[k]
+        values=allvalues[k]
+        setting=dict(pairs)
+        rows.append([str(k+1)] + 
+                    [setting.get(key, "-").replace(" ", ",") for key in keys] +
+                    ["{:.6f}".format(values[c]) if c in values else "-"
+                     for c in columns] +
+                    ["{:.1f}".format(wall), "ok" if error is None else 
+                     "failed"])
+    header=["point"] + keys + columns + ["wall(s)", "status"]
+    width=[max(len(row[j]) for row in rows + [header]) 
+           for j in range(len(header))]
+    fp=open(summaryfile, "w")
+    fp.write("Sweep of " + baseinputfile + " over " + manifestfile + "\n\n")
+    for row in [header] + rows:
+        fp.write("  ".join(word.rjust(w) for word, w in zip(row, width)) + 
+                 "\n")
+    failed=[k for k in range(len(points)) if results[k][1] is not None]
+    if failed:
+        fp.write("\nFailed points:\n")
+        for k in failed:
+            fp.write("{:<6} {}\n".format(k+1, results[k][1]))
+    fp.close()
+    print("{} of {} points finished. The summary is in {}\n".format(
+          len(points) - len(failed), len(points), summaryfile))
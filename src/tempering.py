@@ -0,0 +1,272 @@
+# tempering is part of ljpy for Lennard Jones simulations.                  #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# tempering.py                                                            	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It is the driver for parallel tempering 
+(replica exchange) MC simulations, which are requested with the tempering
+keyword. M replicas of the system are simulated at a ladder of M 
+temperatures. Each replica is run by its own worker process with the same
+MC sweeps as nvtmc. At the interval of the keyword, the main process tries
+to swap the temperatures of replicas at neighboring temperatures with the 
+probability
+
+    min(1, exp[(1/T_i - 1/T_j)(U_i - U_j)])
+
+where U is the potential energy. Only the temperatures (and the maximum 
+displacement tuned for each temperature) are swapped; the sites stay with
+their replica. The pairs tried alternate between (1,2), (3,4), ... and 
+(2,3), (4,5), ... so every pair is tried every other swap. Low temperature
+replicas that are stuck in one region of configuration space are carried
+to high temperatures, where they decorrelate quickly, and back.
+
+The averages are collected for each temperature whichever replica is at 
+that temperature. Each replica draws its moves from its own stream of 
+random numbers made from the seed (src/rng.py), so the results are the 
+same whether or not the replicas run in parallel. The workers are started 
+by forking the main process. Where fork is not available, the replicas are
+run one after another in the main process.
+"""
+
+# Import relevant libraries
+import multiprocessing as mp
+import numpy as np
+from numba import set_num_threads
+from src.move import sweeps
+from src.rng import stream, draw, ireplica, iswap
+from src.forces import forces
+from src.ljpyclasses import particles, props
+from src.cell_list import mccells, build_mccells
+from src.blocking import blocks
+from src.next_stop import nextstop
+from src.prop_output import propwriter
+
+# Indices of the sums returned by a replica for each run of sweeps
+ipe=0       # sum of the potential energy after each move
+ipe2=1      # sum of the squared potential energy
+ivirial=2   # sum of the virial
+iaccept=3   # number of moves accepted
+itry=4      # number of moves tried
+nsum=5
+
+# The class for one replica of the system
+class replica:
+    # This function is passed a simulation object, a particles object
+    # with the starting positions, and the number of the replica. The 
+    # positions are copied so each replica has its own sites.
+    def __init__(self, sim, atom, k):
+        self.sim=sim
+        self.k=k
+        self.atom=particles(sim.N, False)
+        self.atom.r[:,:]=atom.r
+        if sim.neighbor == "cell" and sim.ncell >= 3:
+            self.cl=mccells(sim.N, sim.ncell)
+            build_mccells(sim, self.atom, self.cl)
+        else:
+            self.cl=mccells(0, 0)
+        self.iprop=props()
+        self.iprop.pe, self.iprop.virial = forces(sim, self.atom)
+        self.iprop.pe2=self.iprop.pe*self.iprop.pe
+        self.rng=stream(sim.seed, ireplica + k, 5*sim.N + 3)
+        self.blk=blocks()
+        self.drift=0.0
+    
+    # This function is passed a temperature, the maximum displacement, the
+    # number of the first sweep, and the number of sweeps. It performs the
+    # sweeps at the temperature and recalculates the energy. It returns the
+    # energy, the tuned maximum displacement, the sums of the properties,
+    # and the largest drift of the running energy total.
+    def run(self, T, delta, first, nsweeps):
+        sim=self.sim
+        iprop=self.iprop
+        sim.T=T
+        sim.dt=delta
+        aprop=props()
+        sweeps(sim, self.atom, self.cl, self.rng, iprop, aprop, self.blk, 
+               first, nsweeps, 1)
+        pe, virial = forces(sim, self.atom)
+        self.drift=max(self.drift, abs(iprop.pe - pe)/sim.N)
+        iprop.pe=pe
+        iprop.virial=virial
+        iprop.pe2=pe*pe
+        sums=np.array([aprop.pe, aprop.pe2, aprop.virial, aprop.naccept,
+                       aprop.ntry], dtype=np.float64)
+        return(pe, sim.dt, sums, self.drift)
+
+# This function is passed one end of a pipe, a simulation object, a 
+# particles object, and the number of the replica. It is run by a worker 
+# process, which starts its own threads of numba, and runs the replica for
+# every message from the main process until it receives None.
+def worker(conn, sim, atom, k):
+    set_num_threads(sim.nthreads)
+    rep=replica(sim, atom, k)
+    while True:
+        msg=conn.recv()
+        if msg is None: break
+        conn.send(rep.run(*msg))
+    conn.close()
+
+# This function is passed the temperatures, the assignment of replicas to
+# temperatures, the energy of the replica at each temperature, the first 
+# temperature of the pairs to try (0 or 1), and a stream of random numbers.
+# It tries to swap the replicas of the pairs of neighboring temperatures 
+# (first, first+1), (first+2, first+3), ... and swaps the assignments and 
+# energies of the pairs that are accepted. It returns the lower temperature
+# of each pair tried and whether the swap was accepted.
+def tryswaps(ladder, assign, pe, first, rng):
+    tried=[]
+    for t in range(first, len(ladder)-1, 2):
+        x=(1.0/ladder[t] - 1.0/ladder[t+1])*(pe[t] - pe[t+1])
+        accept=x >= 0.0 or draw(rng) < np.exp(x)
+        if accept:
+            assign[t], assign[t+1] = assign[t+1], assign[t]
+            pe[t], pe[t+1] = pe[t+1], pe[t]
+        tried.append((t, accept))
+    return(tried)
+
+# This function is passed a simulation object and a particles object. It
+# runs the parallel tempering simulation and writes the averages at each
+# temperature to the output file.
+def ptmc(sim, atom):
+    ladder=sim.ladder.copy()
+    M=len(ladder)
+    
+    # Start a worker for each replica, or make the replicas in this 
+    # process if fork is not available
+    parallel="fork" in mp.get_all_start_methods()
+    if parallel:
+        ctx=mp.get_context("fork")
+        conns=[]
+        procs=[]
+        for k in range(M):
+            parent, child = ctx.Pipe()
+            p=ctx.Process(target=worker, args=(child, sim, atom, k))
+            p.start()
+            child.close()
+            conns.append(parent)
+            procs.append(p)
+    else:
+        set_num_threads(sim.nthreads)
+        reps=[replica(sim, atom, k) for k in range(M)]
+    
+    # This function is passed the assignment of replicas to temperatures,
+    # the maximum displacements, the first sweep, and the number of sweeps.
+    # It runs every replica and returns their results by temperature.
+    def runall(assign, deltas, first, n):
+        if parallel:
+            for t in range(M):
+                conns[assign[t]].send((ladder[t], deltas[t], first, n))
+            return([conns[assign[t]].recv() for t in range(M)])
+        return([reps[assign[t]].run(ladder[t], deltas[t], first, n)
+                for t in range(M)])
+    
+    # assign[t] is the replica at temperature t
+    # deltas[t] is the maximum displacement at temperature t
+    # sums[t] holds the sums of the properties at temperature t
+    # pe[t] is the energy of the replica at temperature t
+    assign=list(range(M))
+    deltas=[sim.dt]*M
+    sums=np.zeros((M,nsum))
+    pe=np.zeros(M)
+    drift=np.zeros(M)
+    swaptry=np.zeros(M-1, dtype=np.int64)
+    swapaccept=np.zeros(M-1, dtype=np.int64)
+    nswap=0
+    rng=stream(sim.seed, iswap, 64)
+    output=propwriter(sim, names=tuple("PE{}".format(t+1) for t in range(M)))
+    
+    # Perform the equilibration and then the production sweeps. The 
+    # replicas are run in parallel up to the next swap or output.
+    for stage, nsteps in ((0, sim.eq), (1, sim.pr)):
+        i=0
+        while i < nsteps:
+            n=nextstop(i, nsteps, sim.swap, sim.output)-i
+            results=runall(assign, deltas, i+1, n)
+            i+=n
+            for t, (pe[t], deltas[t], s, d) in enumerate(results):
+                if stage == 1: sums[t]+=s
+                drift[assign[t]]=d
+            
+            # Try to swap the temperatures of neighboring replicas
+            if i%sim.swap == 0:
+                for t, accept in tryswaps(ladder, assign, pe, nswap%2, rng):
+                    if stage == 1:
+                        swaptry[t]+=1
+                        swapaccept[t]+=accept
+                nswap+=1
+            
+            # Output the energy at each temperature
+            if i%sim.output == 0:
+                output.row(stage, i, *(pe/sim.N + sim.utail))
+                print(("Equilibration", "Production")[stage] + " Step " +
+                      str(i) + "\n")
+    output.close()
+    
+    # Stop the workers
+    if parallel:
+        for conn in conns: conn.send(None)
+        for p in procs: p.join()
+    
+    finalizetempering(sim, ladder, sums, deltas, swaptry, swapaccept, 
+                      drift.max())
+
+# This function is passed a simulation object, the temperatures, the sums
+# of the properties at each temperature, the maximum displacements, the 
+# numbers of swaps tried and accepted between each pair of neighboring
+# temperatures, and the largest energy drift. It writes the averages of
+# each temperature to the output file.
+def finalizetempering(sim, ladder, sums, deltas, swaptry, swapaccept, drift):
+    N=sim.N
+    fp=open(sim.outputfile, "a")
+    if sim.pr == 0:
+        fp.write("\nNo productions steps were specified, so simulation " +
+                 "averages were not calculated.\n\n")
+        fp.close()
+        return
+    fp.write("\n***Parallel Tempering Averages***\n\n")
+    fp.write("{:>10}  {:>10}  {:>10}  {:>10}  {:>10}  {:>10}  {:>10}  {:>10}"
+             "\n".format("T", "P", "PE", "Cv", "Moves Acc.", "Max Disp.",
+                         "Swaps Try", "Swaps Acc."))
+    for t, T in enumerate(ladder):
+        moves=N*sim.pr
+        pe=sums[t,ipe]/moves
+        pe2=sums[t,ipe2]/moves
+        virial=sums[t,ivirial]/moves
+        P=sim.rho*T + 1.0/3.0/sim.length**3.0*virial + sim.ptail
+        cv=(pe2 - pe*pe)/(T*T)/N + 3.0/2.0
+        fp.write("{:10.6f}  {:10.6f}  {:10.6f}  {:10.6f}  {:10.6f}  {:10.6f}"
+                 .format(T, P, pe/N + sim.utail, cv, 
+                         sums[t,iaccept]/sums[t,itry], deltas[t]))
+        if t < len(ladder) - 1:
+            fp.write("  {:10d}  {:10.6f}\n".format(swaptry[t], 
+                     swapaccept[t]/max(swaptry[t], 1)))
+        else:
+            fp.write("\n")
+    fp.write("\nThe swaps are between the temperature of the row and the " +
+             "next one.\n")
+    fp.write("Max. Energy Drift:      {:10.3e}\n".format(drift))
+    fp.close()
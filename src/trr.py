@@ -0,0 +1,128 @@
+# trr is part of ljpy for Lennard Jones simulations.                        #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# trr.py                                                                  	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It writes the movie of a simulation as a 
+GROMACS .trr file, which can be loaded in VMD after the .xyz file written by
+initializefiles. Each frame holds the box, the positions, and (for MD) the
+velocities in single precision, in reduced units.
+
+The frames are not written one at a time. They are copied into a buffer that
+holds many frames and the buffer is written to the file in one large write
+when it is full, when a checkpoint is written, and at the end of the 
+simulation. Copying a frame into the buffer costs about as much as one pass
+over the positions, so a frame can be saved every step.
+
+The layout of a frame (all 4 byte big-endian words) is
+
+    header:     1993, 13, 12, "GMX_trn_file" (3 words), ir_size, e_size,
+                box_size, vir_size, pres_size, top_size, sym_size, x_size,
+                v_size, f_size, natoms, step, nre, t, lambda
+    box:        the 3x3 box matrix
+    x:          the positions of the sites
+    v:          the velocities of the sites (MD only)
+"""
+
+# Import relevant libraries
+import numpy as np
+
+nheader=21      # number of words in the header of a frame
+bufsize=8*2**20 # size of the frame buffer in bytes
+
+# The class that writes the movie file
+class trrwriter:
+    # This function is passed a simulation object, a particles object, and
+    # the number of bytes of the movie file to keep. The file is started 
+    # over if it is None. Otherwise, it is cut to that size and the frames 
+    # are added to it, which is used when a simulation is restarted.
+    def __init__(self, sim, atom, keep=None):
+        # nv is the number of velocity words in a frame (zero for MC)
+        # nwords is the number of words in a frame
+        # buf holds the frames that have not been written yet (as integers)
+        # fbuf is the same buffer viewed as floats
+        # nbuf is the number of frames in the buffer
+        N=sim.N
+        nv=3*atom.v.shape[0]
+        self.nwords=nheader + 9 + 3*N + nv
+        self.nv=nv
+        nframes=max(1, bufsize//(4*self.nwords))
+        self.buf=np.zeros((nframes, self.nwords), dtype=">i4")
+        self.fbuf=self.buf.view(">f4")
+        self.nbuf=0
+        
+        # Fill in the parts of the header and box that are the same in
+        # every frame (the box changes in NPT MC)
+        self.buf[:,0]=1993
+        self.buf[:,1]=13
+        self.buf[:,2]=12
+        self.buf[:,3:6]=np.frombuffer(b"GMX_trn_file", dtype=">i4")
+        self.buf[:,8]=9*4           # box_size
+        self.buf[:,13]=3*N*4        # x_size
+        self.buf[:,14]=nv*4         # v_size
+        self.buf[:,16]=N            # natoms
+        self.fbuf[:,nheader]=sim.length
+        self.fbuf[:,nheader+4]=sim.length
+        self.fbuf[:,nheader+8]=sim.length
+        self.sim=sim
+        
+        # Open the file
+        if keep is None:
+            self.fp=open(sim.moviefile, "wb")
+        else:
+            self.fp=open(sim.moviefile, "r+b")
+            self.fp.truncate(keep)
+            self.fp.seek(keep)
+
+    # This function is passed the step number, the time, and a particles 
+    # object. It copies a frame into the buffer and writes the buffer if it
+    # is full.
+    def frame(self, step, t, atom):
+        k=self.nbuf
+        x0=nheader + 9
+        self.buf[k,17]=step
+        self.fbuf[k,19]=t
+        if self.sim.npt: # the box changes with the volume
+            self.fbuf[k,[nheader,nheader+4,nheader+8]]=self.sim.length
+        self.fbuf[k,x0:x0+atom.r.size]=atom.r.ravel()
+        if self.nv: self.fbuf[k,x0+atom.r.size:]=atom.v.ravel()
+        self.nbuf+=1
+        if self.nbuf == self.buf.shape[0]: self.flush()
+
+    # This function writes the frames in the buffer to the file. It returns
+    # the size of the file.
+    def flush(self):
+        if self.nbuf:
+            self.fp.write(self.buf[:self.nbuf].tobytes())
+            self.nbuf=0
+        self.fp.flush()
+        return(self.fp.tell())
+
+    # This function writes the frames left in the buffer and closes the file.
+    def close(self):
+        self.flush()
+        self.fp.close()
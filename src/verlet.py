@@ -28,51 +28,113 @@
 
 """
 This module is part of ljpy. It contains two functions to integrate the 
-equations of motion using the velocity verlet algorithm.
+equations of motion using the velocity verlet algorithm. It also contains a
+function that advances the system many time steps in compiled code, which
+combines the two halves of the algorithm, the force calculation, the kinetic
+energy, and the accumulation of the properties.
 """
 # Import relevant libraries
 from numba import njit
-# This function is passed a simulation object and a list of site objects.
+from src.forces import forces, forces_nlist
+from src.neighbor_list import update_nlist
+from src.scale_velocities import scalevelocities
+from src.blocking import add, ipe, ike, iT, iP, ivirial
+
+# This function is passed a simulation object and a particles object.
 # It is the first needed to use the velocity verlet algorithm. It uses
 # the data at time step t to update the positions to the next time step and
 # the velocities to the next half time step.
-@njit
+@njit(cache=True)
 def verlet1(sim, atom):
+    r=atom.r
+    v=atom.v
+    f=atom.f
+    d=atom.d
     
     for i in range(sim.N):
         # Update the positions to a full time step.
-        dx=sim.dt*atom[i].vx+sim.dt*sim.dt*atom[i].fx/2.0
-        dy=sim.dt*atom[i].vy+sim.dt*sim.dt*atom[i].fy/2.0
-        dz=sim.dt*atom[i].vz+sim.dt*sim.dt*atom[i].fz/2.0
-        atom[i].x=atom[i].x+dx
-        atom[i].y=atom[i].y+dy
-        atom[i].z=atom[i].z+dz
+        dx=sim.dt*v[i,0]+sim.dt*sim.dt*f[i,0]/2.0
+        dy=sim.dt*v[i,1]+sim.dt*sim.dt*f[i,1]/2.0
+        dz=sim.dt*v[i,2]+sim.dt*sim.dt*f[i,2]/2.0
+        r[i,0]=r[i,0]+dx
+        r[i,1]=r[i,1]+dy
+        r[i,2]=r[i,2]+dz
         
         # Update the displacement accumulators for diffusivity
-        atom[i].dx=atom[i].dx+dx
-        atom[i].dy=atom[i].dy+dy
-        atom[i].dz=atom[i].dz+dz
+        d[i,0]=d[i,0]+dx
+        d[i,1]=d[i,1]+dy
+        d[i,2]=d[i,2]+dz
         
         # Apply periodic boundary conditions
-        if atom[i].x < 0.0:          atom[i].x=atom[i].x+sim.length
-        elif atom[i].x > sim.length: atom[i].x=atom[i].x-sim.length
-        if atom[i].y < 0.0:          atom[i].y=atom[i].y+sim.length
-        elif atom[i].y > sim.length: atom[i].y=atom[i].y-sim.length
-        if atom[i].z < 0.0:          atom[i].z=atom[i].z+sim.length
-        elif atom[i].z > sim.length: atom[i].z=atom[i].z-sim.length
+        if r[i,0] < 0.0:          r[i,0]=r[i,0]+sim.length
+        elif r[i,0] > sim.length: r[i,0]=r[i,0]-sim.length
+        if r[i,1] < 0.0:          r[i,1]=r[i,1]+sim.length
+        elif r[i,1] > sim.length: r[i,1]=r[i,1]-sim.length
+        if r[i,2] < 0.0:          r[i,2]=r[i,2]+sim.length
+        elif r[i,2] > sim.length: r[i,2]=r[i,2]-sim.length
         
         # Update the velocities to half a time step
-        atom[i].vx=atom[i].vx+sim.dt*atom[i].fx/2.0
-        atom[i].vy=atom[i].vy+sim.dt*atom[i].fy/2.0
-        atom[i].vz=atom[i].vz+sim.dt*atom[i].fz/2.0
+        v[i,0]=v[i,0]+sim.dt*f[i,0]/2.0
+        v[i,1]=v[i,1]+sim.dt*f[i,1]/2.0
+        v[i,2]=v[i,2]+sim.dt*f[i,2]/2.0
         
-# This function is passed a simulation object and a list of site objects.
+# This function is passed a simulation object and a particles object.
 # It is the second function needed to use the velocity verlet       
 # algorithm.  It updates the velocites from the half time step to the 
-# full time step.
-@njit
+# full time step. The kinetic energy is calculated in the same loop and
+# returned.
+@njit(cache=True)
 def verlet2(sim, atom):
+    v=atom.v
+    f=atom.f
+    ke=0.0
     for i in range(sim.N):
-        atom[i].vx=atom[i].vx+sim.dt*atom[i].fx/2.0
-        atom[i].vy=atom[i].vy+sim.dt*atom[i].fy/2.0
-        atom[i].vz=atom[i].vz+sim.dt*atom[i].fz/2.0       
\ No newline at end of file
+        v[i,0]=v[i,0]+sim.dt*f[i,0]/2.0
+        v[i,1]=v[i,1]+sim.dt*f[i,1]/2.0
+        v[i,2]=v[i,2]+sim.dt*f[i,2]/2.0
+        ke=ke+0.5*(v[i,0]*v[i,0] + v[i,1]*v[i,1] + v[i,2]*v[i,2])
+    return(ke)
+
+# This function is passed a simulation object, a particles object, the
+# instantaneous and average property objects, a blocks object for the 
+# errors, a neighbor list (only used if the neighbor keyword is verlet), the
+# number of the first step, the number of steps to perform, the frequency to
+# rescale the velocities (zero for no rescaling), and whether the steps are
+# production steps. It advances the system the number of steps and 
+# accumulates the properties each step.
+@njit(cache=True)
+def verletsteps(sim, atom, iprop, aprop, blk, nl, first, nsteps, rescale_freq,
+                production):
+    x=blk.x
+    for i in range(first, first+nsteps):
+        verlet1(sim, atom) # first half of velocity verlet algorithm
+        if sim.neighbor == "verlet":
+            update_nlist(sim, atom, nl) # rebuild the list if needed
+            pe, virial = forces_nlist(sim, atom, nl)
+        else:
+            pe, virial = forces(sim, atom) # calculate the forces
+        ke=verlet2(sim, atom) # second half of velocity verlet algorithm
+        iprop.pe=pe
+        iprop.virial=virial
+        iprop.ke=ke
+        iprop.T=2.0/3.0/sim.N*ke
+        
+        # Accumulate the properties
+        aprop.pe+=iprop.pe
+        aprop.ke+=iprop.ke
+        aprop.T+=iprop.T
+        aprop.virial+=iprop.virial
+        if production: aprop.pe2+=iprop.pe*iprop.pe
+        x[ipe]=iprop.pe
+        x[ike]=iprop.ke
+        x[iT]=iprop.T
+        x[iP]=sim.rho*iprop.T + 1.0/3.0/sim.length**3.0*iprop.virial + \
+              sim.ptail
+        x[ivirial]=iprop.virial
+        add(blk)
+        
+        # Rescale the velocities to achieve the temperature specified
+        # in the input file. This is only done during the equilibration
+        # steps of MD simulations.
+        if rescale_freq > 0:
+            if i%rescale_freq == 0: scalevelocities(sim, atom, aprop.T/i)       
\ No newline at end of file
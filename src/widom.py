@@ -0,0 +1,158 @@
+# widom is part of ljpy for Lennard Jones simulations.                      #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# widom.py                                                                	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It calculates the excess chemical potential by
+the test particle insertion method of Widom (J. Chem. Phys. 39, 2808, 1963).
+At the interval of the widom keyword during the production steps, ghost 
+particles are put at random points in the box and the energy of each with
+all the particles is found. The ghosts do not change the system. The excess
+chemical potential is 
+
+    mu_ex = -T ln < exp(-U_ghost/T) > + 2 utail
+
+where 2 utail is the tail correction for the added particle. For NVE MD, 
+whose temperature fluctuates, the form of Frenkel and Smit (Understanding 
+Molecular Simulation, 2nd ed., section 7.2.1) is used with the 
+instantaneous temperature of each frame:
+
+    mu_ex = -<T> ln( < T^(3/2) exp(-U_ghost/T) > / < T^(3/2) > ) + 2 utail
+
+All the insertions of a frame are done in one call of compiled code. The 
+particles are sorted into the cells of an MC cell list once per frame, so 
+the energy of a ghost only visits the 27 cells around it and the cost of an
+insertion does not grow with the number of particles. The average for each
+frame is added to a blocks object. The chemical potential of MD is a 
+function of three averages that are correlated, so its error is found by
+blocking the linear change of the chemical potential with the three 
+quantities of each frame, whose variance needs the covariances of the 
+quantities. The blocks also hold the sums of each pair of quantities, and
+the covariance of two quantities is half the variance of their sum less 
+their variances.
+
+The positions of the ghosts come from their own stream of random numbers 
+(src/rng.py), which is separate from the one used by the moves, so the 
+insertions do not change the trajectory of the simulation.
+"""
+
+# Import relevant libraries
+import numpy as np
+from numba import njit
+from src.atomic_pe import cell_energy, pair_energy
+from src.cell_list import mccells, build_mccells
+from src.blocking import blocks, add, mean, levelvar, levelerror
+from src.rng import stream, draw, iwidom
+
+# Indices of the properties in the blocks of the insertions
+iboltz=0    # T^(3/2) times the average Boltzmann factor of a frame
+iT32=1      # T^(3/2)
+itemp=2     # temperature
+pairs=((iboltz, iT32, 3), (iboltz, itemp, 4), (iT32, itemp, 5)) # sums
+
+# This function is passed a simulation object, a particles object, an MC 
+# cell list, a stream of random numbers, the number of ghosts to insert, 
+# and the temperature. It 
+# returns the average of the Boltzmann factors of the energies of the 
+# ghosts.
+@njit(cache=True)
+def insertions(sim, atom, cl, rng, ninsert, T):
+    # Variables
+    r=atom.r
+    tab=sim.tab
+    L=sim.length
+    s=0.0
+    
+    for k in range(ninsert):
+        # Put a ghost at a random point
+        x=draw(rng)*L
+        y=draw(rng)*L
+        z=draw(rng)*L
+        
+        # Calculate the energy of the ghost with all the particles
+        if cl.ncell >= 3:
+            u, w = cell_energy(sim, tab, r, cl, -1, x, y, z)
+        else:
+            u=0.0
+            for i in range(sim.N):
+                ui, wi = pair_energy(sim, tab, r, i, x, y, z)
+                u+=ui
+        s+=np.exp(-u/T)
+    
+    return(s/ninsert)
+
+# The class that samples the chemical potential
+class widomsampler:
+    # This function is passed a simulation object. The cells of the 
+    # insertions are those of the cell list of the simulation, and all the
+    # particles are visited if the box holds fewer than 3 per side.
+    def __init__(self, sim):
+        # cl is the cell list of the insertions
+        # rng is the stream of random numbers of the ghosts of a frame
+        # blk holds the averages of the frames
+        if sim.ncell >= 3: self.cl=mccells(sim.N, sim.ncell)
+        else: self.cl=mccells(0, 0)
+        self.rng=stream(sim.seed, iwidom, 3*sim.ninsert)
+        self.blk=blocks()
+    
+    # This function is passed a simulation object, a particles object, and
+    # the temperature of the frame. It inserts the ghosts of a frame.
+    def frame(self, sim, atom, T):
+        if self.cl.ncell >= 3: build_mccells(sim, atom, self.cl)
+        boltz=insertions(sim, atom, self.cl, self.rng, sim.ninsert, T)
+        x=self.blk.x
+        x[iboltz]=T**1.5*boltz
+        x[iT32]=T**1.5
+        x[itemp]=T
+        for j, l, m in pairs: x[m]=x[j] + x[l]
+        add(self.blk)
+    
+    # This function is passed a simulation object. It returns the excess
+    # chemical potential, its error, and its correlation time in frames. 
+    # The error and correlation time are nan if there are too few frames,
+    # and the chemical potential is infinite if every ghost overlapped a
+    # particle.
+    def mu(self, sim):
+        blk=self.blk
+        boltz=mean(blk, iboltz)
+        if boltz == 0.0: return(np.inf, np.nan, np.nan)
+        T32=mean(blk, iT32)
+        T=mean(blk, itemp)
+        mu=-T*np.log(boltz/T32) + 2.0*sim.utail
+        
+        # The change of mu with each of the three averages and the variance
+        # of the blocks of each level of the sum of the changes
+        c=np.zeros(3)
+        c[iboltz]=-T/boltz
+        c[iT32]=T/T32
+        c[itemp]=-np.log(boltz/T32)
+        var=sum(c[j]*c[j]*levelvar(blk, j) for j in range(3))
+        for j, l, m in pairs:
+            cov=0.5*(levelvar(blk, m) - levelvar(blk, j) - levelvar(blk, l))
+            var+=2.0*c[j]*c[l]*cov
+        err, tau = levelerror(blk.n, np.maximum(var, 0.0))
+        return(mu, err, tau)
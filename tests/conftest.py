@@ -0,0 +1,96 @@
+# conftest is part of ljpy for Lennard Jones simulations.                   #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# conftest.py                                                             	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It sets up the tests of ljpy, which are run 
+with pytest from the top folder of ljpy. It puts the top folder on the path
+so the tests import the modules of src as ljpy.py does, and it has the 
+fixture that builds a simulation from the lines of an input file, and 
+the functions that run ljpy.py and read the averages of its output file.
+"""
+
+# Import relevant libraries
+import os, sys, subprocess
+import numpy as np
+import pytest
+from numba import set_num_threads
+
+top=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if top not in sys.path: sys.path.insert(0, top)
+
+from src.read_input import readinput
+from src.initialize_positions import initializepositions
+from src.initialize_velocities import initializevelocities
+
+# Configuration of 500 particles at a density of 0.9 that comes with ljpy
+cor500=os.path.join(top, "n500t085r090.cor")
+
+# This function is passed the temporary folder of a test. It returns a 
+# function that is passed the lines of an input file, writes them to the
+# folder, and returns the simulation and particles objects made from them.
+# The threads are set as src/simulate.py sets them.
+@pytest.fixture
+def makesim(tmp_path):
+    def make(lines):
+        inputfile=tmp_path / "test.input"
+        inputfile.write_text("\n".join(lines) + "\n")
+        sim=readinput(["ljpy.py", str(inputfile), 
+                       str(tmp_path / "test.output")])
+        set_num_threads(sim.nthreads)
+        atom=initializepositions(sim)
+        if sim.method == "md": initializevelocities(sim, atom)
+        return(sim, atom)
+    return(make)
+
+
+# This function is passed a folder, the name of a simulation, the lines of
+# its input file, and optionally environment variables to set. It runs 
+# ljpy.py in the folder, in its own process as a user would, and returns 
+# the text of the output file.
+def runljpy(folder, name, lines, env={}):
+    with open(os.path.join(folder, name + ".input"), "w") as fp:
+        fp.write("\n".join(lines) + "\n")
+    done=subprocess.run([sys.executable, os.path.join(top, "ljpy.py"),
+                         name + ".input", name + ".output"], cwd=folder,
+                        capture_output=True, text=True, 
+                        env=dict(os.environ, **env))
+    assert done.returncode == 0, done.stderr
+    with open(os.path.join(folder, name + ".output")) as fp: 
+        return(fp.read())
+
+# This function is passed the text of an output file and the label of an 
+# average. It returns the average, its error, and its correlation time 
+# (nan for those that are not reported).
+def reported(text, label):
+    line=text[text.index("***Simulation Averages***"):].split(label)[1]
+    words=line.split("\n")[0].split()
+    value=[float(words[0]), np.nan, np.nan]
+    if len(words) > 2 and words[1] == "+/-":
+        value[1]=float(words[2])
+        if len(words) > 5: value[2]=float(words[5])
+    return(tuple(value))
@@ -0,0 +1,94 @@
+# test_blocking is part of ljpy for Lennard Jones simulations.              #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_blocking.py                                                        	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests the errors and correlation times found
+by blocking (src/blocking.py) on series with known answers: independent 
+samples, an AR(1) process, and a series whose neighbors are anticorrelated.
+"""
+
+# Import relevant libraries
+import numpy as np
+from numba import njit
+from src.blocking import blocks, add, mean, error, ipe
+
+# This function is passed a blocks object and a series. It adds the series
+# to the blocks as the potential energy.
+@njit
+def addseries(b, x):
+    for v in x:
+        b.x[ipe]=v
+        add(b)
+
+# This function is passed a series. It returns the mean, error, and 
+# correlation time found by blocking.
+def blocked(x):
+    b=blocks()
+    addseries(b, x)
+    err, tau = error(b, ipe)
+    return(mean(b, ipe), err, tau)
+
+# This function is passed a random number generator, the correlation of 
+# neighbors, and the number of samples. It returns an AR(1) series of unit
+# variance.
+def ar1(gen, phi, n):
+    e=gen.standard_normal(n)*np.sqrt(1.0 - phi*phi)
+    x=np.empty(n)
+    x[0]=gen.standard_normal()
+    for t in range(1, n): x[t]=phi*x[t-1] + e[t]
+    return(x)
+
+# This function tests independent samples, whose error is sigma/sqrt(n) and
+# whose correlation time is zero.
+def test_independent_samples():
+    n=2**17
+    m, err, tau = blocked(np.random.default_rng(1).standard_normal(n))
+    assert abs(err*np.sqrt(n) - 1.0) < 0.05
+    assert 0.0 <= tau < 0.1
+
+# This function tests an AR(1) process, whose statistical inefficiency is 
+# g=(1+phi)/(1-phi), so the error is sqrt(g/n) and the correlation time 
+# (g-1)/2 = phi/(1-phi).
+def test_ar1_process():
+    n=2**18
+    phi=0.8
+    m, err, tau = blocked(ar1(np.random.default_rng(2), phi, n))
+    g=(1.0 + phi)/(1.0 - phi)
+    assert abs(err/np.sqrt(g/n) - 1.0) < 0.15
+    assert abs(tau/(phi/(1.0 - phi)) - 1.0) < 0.3
+    assert abs(m) < 5.0*np.sqrt(g/n)
+
+# This function tests a series whose neighbors are anticorrelated, whose
+# blocks have a smaller error than the samples. The error of the samples and
+# a correlation time of zero must be returned.
+def test_anticorrelated_samples():
+    n=2**16
+    x=ar1(np.random.default_rng(3), -0.8, n)
+    m, err, tau = blocked(x)
+    assert tau == 0.0
+    assert np.isclose(err, np.std(x)/np.sqrt(n - 1), rtol=1e-6)
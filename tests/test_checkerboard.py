@@ -0,0 +1,68 @@
+# test_checkerboard is part of ljpy for Lennard Jones simulations.          #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_checkerboard.py                                                    	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests the MC sweeps on the checkerboard 
+(keyword checkerboard) against the serial Metropolis sweeps, and that they 
+give the same simulation, to the last bit, for any number of threads. Each
+simulation is run by ljpy.py in its own process, as a user would run it.
+"""
+
+# Import relevant libraries
+import numpy as np
+from conftest import runljpy, reported
+
+# Lines of the input file of a state point whose box holds 4 cells of the
+# checkerboard per side
+lines=["sim mc", "N 256", "temp 1.5", "rho 0.5", "rcut 1.9", "dt 0.1",
+       "neighbor cell", "coord generate", "seed -3"]
+
+# This function tests that the averages of the checkerboard agree with 
+# those of the Metropolis sweeps within their errors.
+def test_checkerboard_matches_metropolis(tmp_path):
+    run=lines + ["esteps 200", "psteps 3000", "output 500"]
+    serial=runljpy(tmp_path, "serial", run)
+    board=runljpy(tmp_path, "board", run + ["checkerboard"])
+    for label in ("Potential Energy:", "Pressure:"):
+        a, aerr, tau = reported(serial, label)
+        b, berr, tau = reported(board, label)
+        assert abs(a - b) < 3.0*np.hypot(aerr, berr), label
+
+# This function tests that a checkerboard run with one thread and one with 
+# three threads end in the same state. numba is allowed more threads than
+# the machine has processors so the test also runs on a single processor.
+def test_threads_are_bit_identical(tmp_path):
+    run=lines + ["esteps 20", "psteps 40", "output 10", "checkerboard"]
+    runljpy(tmp_path, "one", run + ["threads 1", "checkpoint 40 one.npz"])
+    runljpy(tmp_path, "three", run + ["threads 3", "checkpoint 40 three.npz"],
+            env={"NUMBA_NUM_THREADS": "3"})
+    one=np.load(tmp_path / "one.npz")
+    three=np.load(tmp_path / "three.npz")
+    for key in one.files:
+        if key != "outputbytes":
+            assert np.array_equal(one[key], three[key]), key
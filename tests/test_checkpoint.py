@@ -0,0 +1,84 @@
+# test_checkpoint is part of ljpy for Lennard Jones simulations.            #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_checkpoint.py                                                      	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests that a simulation restarted from a 
+checkpoint ends in the same state, to the last bit, as one that was never
+stopped. Each simulation is run by ljpy.py in its own process, as a user
+would run it.
+"""
+
+# Import relevant libraries
+import numpy as np
+import pytest
+from conftest import runljpy
+
+# Lines of the input files of a short MC and MD simulation
+mclines=["sim mc", "N 108", "temp 1.5", "rho 0.7", "esteps 20", 
+         "rcut 2.5", "dt 0.1", "coord generate", "output 10", "seed -7",
+         "widom 10 20"]
+mdlines=["sim md", "N 256", "temp 1.5", "rho 0.7", "esteps 20", 
+         "rcut 2.5", "dt 0.004", "coord generate", "output 10", "seed -7",
+         "neighbor verlet 0.3"]
+
+# This function is passed a folder, the name of a simulation, the lines of
+# its input file, and the number of production steps. It runs ljpy.py in 
+# the folder and returns the text of the output file.
+def run(folder, name, lines, psteps):
+    return(runljpy(folder, name, lines + ["psteps %d" % psteps]))
+
+# This function is passed the text of an output file. It returns the 
+# averages of the simulation.
+def averages(text):
+    return(text[text.index("***Simulation Averages***"):
+                text.index("Total Wall Time")])
+
+# This function tests a simulation that is stopped after 40 production 
+# steps and restarted to run 80 against one that runs 80 steps at once. 
+# Both write a checkpoint at the end, and the checkpoints must be the same 
+# but for the size of the output file, which holds the input file. The 
+# restarted simulation continues the .npy file of the properties, which 
+# must end up the same as that of the full simulation.
+@pytest.mark.parametrize("lines", [mclines, mdlines], ids=["mc", "md"])
+def test_restart_is_bit_identical(tmp_path, lines):
+    lines=lines + ["timeseries"]
+    run(tmp_path, "full", lines + ["checkpoint 20 full.chk.npz"], 80)
+    run(tmp_path, "part", lines + ["checkpoint 20 part.chk.npz"], 40)
+    text=run(tmp_path, "part", lines + ["checkpoint 20 part.chk.npz", 
+                                        "restart part.chk.npz"], 80)
+    assert averages(text) == averages((tmp_path / "full.output").read_text())
+    full=np.load(tmp_path / "full.chk.npz")
+    part=np.load(tmp_path / "part.chk.npz")
+    assert sorted(full.files) == sorted(part.files)
+    assert int(full["step"]) == 80 and str(full["stage"]) == "pr"
+    for key in full.files:
+        if key != "outputbytes":
+            assert np.array_equal(full[key], part[key]), key
+    series=np.load(tmp_path / "part.npy")
+    assert len(series) == 10 and series["step"][-1] == 80
+    assert np.array_equal(series, np.load(tmp_path / "full.npy"))
@@ -0,0 +1,73 @@
+# test_equilibration is part of ljpy for Lennard Jones simulations.         #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_equilibration.py                                                   	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests the statistical inefficiency and the
+detection of the end of the equilibration (keyword autoeq) of 
+src/equilibration.py on series with known answers: white noise, an AR(1)
+process, and an AR(1) process that relaxes from an exponential transient.
+"""
+
+# Import relevant libraries
+from types import SimpleNamespace
+import numpy as np
+from src.equilibration import eqdetector, inefficiency
+
+# This function is passed a random number generator, the correlation of 
+# neighbors, and the number of samples. It returns an AR(1) series of unit
+# variance, whose statistical inefficiency is (1 + phi)/(1 - phi).
+def ar1(gen, phi, n):
+    e=gen.standard_normal(n)*np.sqrt(1.0 - phi*phi)
+    x=np.empty(n)
+    x[0]=gen.standard_normal()
+    for t in range(1, n): x[t]=phi*x[t-1] + e[t]
+    return(x)
+
+# This function tests the statistical inefficiency of white noise and of an
+# AR(1) process.
+def test_inefficiency():
+    gen=np.random.default_rng(5)
+    assert abs(inefficiency(gen.standard_normal(20000)) - 1.0) < 0.1
+    assert abs(inefficiency(ar1(gen, 0.5, 20000)) - 3.0) < 0.3
+    assert inefficiency(np.ones(100)) == 1.0
+
+# This function tests the detection on an AR(1) process with an exponential
+# transient of 10 standard deviations that decays in 50 samples. The 
+# transient falls below one standard deviation after 50 ln(10) = 115 
+# samples, and the equilibration point must come after that but well 
+# before the samples run out.
+def test_detects_end_of_transient():
+    gen=np.random.default_rng(0)
+    n=6000
+    t=np.arange(n)
+    a=10.0*np.exp(-t/50.0) + ar1(gen, 0.5, n)
+    detector=eqdetector(SimpleNamespace(autoeq=10))
+    for k in range(n):
+        if detector.sample(a[k]): break
+    assert detector.t0 >= 0 and k < n-1
+    assert 50.0*np.log(10.0) < detector.t0/10 < 400
@@ -0,0 +1,103 @@
+# test_event_chain is part of ljpy for Lennard Jones simulations.           #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_event_chain.py                                                     	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests event-chain MC (keyword eventchain, 
+src/event_chain.py): the distance at which a pair uses up its budget of 
+energy, found in closed form, is where the increases of the energy of the
+pair along the path add up to the budget, and the average energy and 
+pressure agree with those of single particle MC.
+"""
+
+# Import relevant libraries
+import numpy as np
+from src.event_chain import pairevent, lj
+from src.rng import stream, imoves, draw
+from conftest import runljpy, reported
+
+# This function is passed the vector from the moving particle to the other
+# particle, the axis of the motion, the square of the cutoff radius, and 
+# the distance moved. It returns the sum of the increases of the energy of 
+# the truncated potential along the path, found on a fine grid.
+def rise(d, k, rc2, s):
+    path=np.linspace(0.0, s, 200001)
+    b2=d @ d - d[k]*d[k]
+    r2=b2 + (d[k] - path)**2
+    u=np.where(r2 < rc2, lj(r2), 0.0)
+    return(np.maximum(np.diff(u), 0.0).sum())
+
+# This function tests the distances of the events of random pairs. The 
+# budget -T ln(u) is found from a second stream that draws the same numbers
+# as the one passed to pairevent. An event at the cutoff must come after 
+# the rises below the cutoff are used up and before the rise of -u(rc) at
+# the cutoff is, and a pair without an event must never use up its budget.
+def test_pair_event_uses_up_budget():
+    rc2=2.5**2
+    uc=lj(rc2)
+    gen=np.random.default_rng(7)
+    rng=stream(-3, imoves, 4096)
+    twin=stream(-3, imoves, 4096)
+    nevent=[0, 0, 0]
+    for n in range(2000):
+        d=gen.uniform(-2.6, 2.6, 3)
+        if d @ d < 0.81: continue
+        k=n%3
+        T=(0.8, 2.0)[n%2]
+        pos=rng.pos
+        s=pairevent(d[0], d[1], d[2], k, T, rc2, uc, rng)
+        if rng.pos == pos:
+            assert s == np.inf
+            assert rise(d, k, rc2, 3.0*2.6) == 0.0
+            nevent[0]+=1
+            continue
+        budget=-T*np.log(1.0 - draw(twin))
+        b2=d @ d - d[k]*d[k]
+        if s == np.inf:
+            assert rise(d, k, rc2, d[k] + 3.0) < budget
+        elif np.isclose(s, d[k] + np.sqrt(rc2 - b2), rtol=0.0, atol=1e-12):
+            below=rise(d, k, rc2, s - 1e-9)
+            assert below <= budget <= below - uc
+            nevent[1]+=1
+        else:
+            assert np.isclose(rise(d, k, rc2, s), budget, rtol=1e-4, 
+                              atol=1e-8)
+            nevent[2]+=1
+    assert min(nevent) > 10
+
+# This function tests that the averages of event-chain MC agree with those 
+# of single particle MC within their errors.
+def test_eventchain_matches_metropolis(tmp_path):
+    run=["sim mc", "N 108", "temp 1.5", "rho 0.7", "rcut 2.5", 
+         "coord generate", "seed -13", "esteps 200", "psteps 4000",
+         "output 1000"]
+    single=runljpy(tmp_path, "single", run + ["dt 0.1"])
+    chains=runljpy(tmp_path, "chains", run + ["dt 2.0", "eventchain"])
+    for label in ("Potential Energy:", "Pressure:"):
+        a, aerr, tau = reported(single, label)
+        b, berr, tau = reported(chains, label)
+        assert abs(a - b) < 3.0*np.hypot(aerr, berr), label
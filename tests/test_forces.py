@@ -0,0 +1,82 @@
+# test_forces is part of ljpy for Lennard Jones simulations.                #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_forces.py                                                          	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests that the forces, energy, and virial 
+found by looping over all pairs, with the cell list, and with the Verlet 
+neighbor list are the same, for one thread and for several.
+"""
+
+# Import relevant libraries
+import numpy as np
+from src.forces import forces_allpairs, forces_cell, forces_nlist, \
+                       forces_allpairs_parallel, forces_cell_parallel
+from src.neighbor_list import nlist, build_nlist
+from conftest import cor500
+
+# Lines of the input file of a liquid with 3 cells per side
+lines=["sim md", "N 500", "temp 0.85", "rho 0.9", "esteps 0", "psteps 0",
+       "rcut 2.5", "dt 0.005", "coord " + cor500, "seed -5", 
+       "neighbor verlet 0.3"]
+
+# This function is passed a simulation object, a particles object, and a 
+# function that calculates the forces. It returns the energy, the virial, 
+# and a copy of the forces.
+def calculate(sim, atom, method, *args):
+    pe, virial = method(sim, atom, *args)
+    return(pe, virial, atom.f.copy())
+
+# This function tests the cell list and the neighbor list against the loop
+# over all pairs.
+def test_forces_agree(makesim):
+    sim, atom = makesim(lines)
+    assert sim.ncell >= 3
+    nl=nlist(sim.N)
+    build_nlist(sim, atom, nl)
+    pe, virial, f = calculate(sim, atom, forces_allpairs)
+    assert pe < 0.0 and np.abs(f).max() > 0.0
+    for method, args in ((forces_cell, ()), (forces_nlist, (nl,))):
+        pe2, virial2, f2 = calculate(sim, atom, method, *args)
+        assert np.isclose(pe2, pe, rtol=1e-12, atol=0.0)
+        assert np.isclose(virial2, virial, rtol=1e-12, atol=0.0)
+        assert np.allclose(f2, f, rtol=0.0, atol=1e-10)
+
+# This function tests the parallel loops, with more threads than cores, 
+# against the loop over all pairs.
+def test_parallel_forces_agree(makesim):
+    sim, atom = makesim(lines)
+    pe, virial, f = calculate(sim, atom, forces_allpairs)
+    sim.nthreads=3
+    nl=nlist(sim.N)
+    build_nlist(sim, atom, nl)
+    for method, args in ((forces_allpairs_parallel, ()), 
+                         (forces_cell_parallel, ()), (forces_nlist, (nl,))):
+        pe2, virial2, f2 = calculate(sim, atom, method, *args)
+        assert np.isclose(pe2, pe, rtol=1e-12, atol=0.0)
+        assert np.isclose(virial2, virial, rtol=1e-12, atol=0.0)
+        assert np.allclose(f2, f, rtol=0.0, atol=1e-10)
@@ -0,0 +1,124 @@
+# test_hybrid is part of ljpy for Lennard Jones simulations.                #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_hybrid.py                                                          	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests Hybrid MC (keyword hybrid, 
+src/hybrid.py): the change of the total energy over a trajectory vanishes
+with the time step and the acceptance goes to one with it, and the average
+energy and pressure agree with those of single particle MC.
+"""
+
+# Import relevant libraries
+import numpy as np
+from numba import njit
+from src.ljpyclasses import props
+from src.forces import forces, forces_allpairs
+from src.verlet import verlet1, verlet2
+from src.hybrid import hmcstep
+from src.rng import stream, imoves, gauss
+from conftest import cor500, runljpy, reported
+
+# Lines of the input file of a liquid. The potential is shifted so its 
+# energy and force go to zero at the cutoff. The energy of the truncated 
+# potential jumps whenever a pair crosses the cutoff, which leaves a change
+# of the total energy that only shrinks with the length of the trajectory.
+lines=["sim mc", "N 500", "temp 0.85", "rho 0.9", "esteps 0", "psteps 0",
+       "rcut 2.5", "dt 0.004", "coord " + cor500, "seed -5", "hybrid 10",
+       "neighbor cell", "potential lj-sf"]
+
+# This function is passed a simulation object, a particles object, a 
+# stream of random numbers, the energy of the system, and the number of 
+# trajectories. It integrates the trajectories of a step of Hybrid MC from
+# the same positions, as src/hybrid.py does, and returns the average of 
+# the absolute change of the total energy per particle. 
+@njit
+def energyerror(sim, atom, rng, pe0, ntraj):
+    r0=atom.r.copy()
+    f0=atom.f.copy()
+    v=atom.v
+    sd=np.sqrt(sim.T)
+    err=0.0
+    for n in range(ntraj):
+        ke0=0.0
+        for i in range(sim.N):
+            v[i,0]=gauss(rng, 0.0, sd)
+            v[i,1]=gauss(rng, 0.0, sd)
+            v[i,2]=gauss(rng, 0.0, sd)
+            ke0+=0.5*(v[i,0]*v[i,0] + v[i,1]*v[i,1] + v[i,2]*v[i,2])
+        for k in range(sim.hybrid):
+            verlet1(sim, atom)
+            pe, virial = forces(sim, atom)
+            ke=verlet2(sim, atom)
+        err+=abs(pe + ke - pe0 - ke0)/sim.N
+        atom.r[:,:]=r0
+        atom.f[:,:]=f0
+    return(err/ntraj)
+
+# This function tests that halving the time step divides the change of the
+# total energy over a trajectory by at least 4, the global error of 
+# velocity Verlet, and that the acceptance of the steps goes to one. The 
+# trajectories have a fixed number of time steps, so they also get shorter.
+def test_small_time_step(makesim):
+    sim, atom = makesim(lines)
+    pe, virial = forces(sim, atom)
+    r=atom.r.copy()
+    f=atom.f.copy()
+    errors=[]
+    accepted=[]
+    for dt in (0.004, 0.002, 0.001):
+        sim.dt=dt
+        errors.append(energyerror(sim, atom, stream(sim.seed, imoves, 64), 
+                                  pe, 10))
+        iprop=props()
+        iprop.pe, iprop.virial = pe, virial
+        rng=stream(sim.seed, imoves, 64)
+        for k in range(40):
+            hmcstep(sim, atom, rng, iprop, np.empty_like(r), np.empty_like(f))
+        accepted.append(iprop.naccept/iprop.ntry)
+        pe1, virial1 = forces_allpairs(sim, atom)
+        assert abs(iprop.pe - pe1)/sim.N < 1e-10
+        atom.r[:,:]=r
+        atom.f[:,:]=f
+    for k in range(2):
+        assert errors[k+1] < 0.3*errors[k]
+    assert accepted[0] <= accepted[1] <= accepted[2]
+    assert accepted[2] > 0.95
+
+# This function tests that the averages of Hybrid MC agree with those of 
+# single particle MC within their errors. Hybrid MC samples the same 
+# ensemble for any time step, so the truncated potential is used.
+def test_hybrid_matches_metropolis(tmp_path):
+    run=["sim mc", "N 108", "temp 1.5", "rho 0.7", "rcut 2.5", 
+         "coord generate", "seed -9", "esteps 200", "psteps 4000",
+         "output 1000"]
+    single=runljpy(tmp_path, "single", run + ["dt 0.1"])
+    hybrid=runljpy(tmp_path, "hybrid", run + ["dt 0.005", "hybrid 10"])
+    for label in ("Potential Energy:", "Pressure:"):
+        a, aerr, tau = reported(single, label)
+        b, berr, tau = reported(hybrid, label)
+        assert abs(a - b) < 3.0*np.hypot(aerr, berr), label
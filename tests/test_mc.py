@@ -0,0 +1,129 @@
+# test_mc is part of ljpy for Lennard Jones simulations.                    #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_mc.py                                                              	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests that the running energy and virial of
+MC, which each accepted move updates with the change of the moved particle,
+stay equal to the energy and virial of the whole system, with and without
+the cell list, and that the trial energy of a volume move of NPT MC is the
+energy of the whole system at the scaled positions.
+"""
+
+# Import relevant libraries
+import numpy as np
+from src.ljpyclasses import props
+from src.forces import forces_allpairs
+from src.cell_list import mccells, build_mccells, cell_index, \
+                          cells_per_side
+from src.potential import lj_tails
+from src.blocking import blocks
+from src.move import sweeps, volume
+from src.rng import stream, imoves
+from conftest import cor500
+
+# Lines of the input file of a liquid with 3 cells per side
+lines=["sim mc", "N 500", "temp 0.85", "rho 0.9", "esteps 0", "psteps 0",
+       "rcut 2.5", "dt 0.1", "coord " + cor500, "seed -5"]
+
+# This function is passed the lines of an input file and the value of the
+# neighbor keyword. It returns the objects of an MC simulation with the 
+# running totals set from the whole system.
+def setup(makesim, lines, neighbor):
+    sim, atom = makesim(lines + ["neighbor " + neighbor])
+    iprop=props()
+    iprop.pe, iprop.virial = forces_allpairs(sim, atom)
+    iprop.pe2=iprop.pe*iprop.pe
+    if sim.neighbor == "cell" and sim.ncell >= 3:
+        cl=mccells(sim.N, sim.ncell)
+        build_mccells(sim, atom, cl)
+    else:
+        cl=mccells(0, 0)
+    rng=stream(sim.seed, imoves, 5*sim.N + 2)
+    return(sim, atom, cl, rng, iprop, props(), blocks())
+
+# This function is passed a simulation object, a particles object, and an 
+# MC cell list. It checks that every particle is in the cell of its 
+# position.
+def check_cells(sim, atom, cl):
+    for c in range(cl.ncell**3):
+        i=cl.head[c]
+        while i >= 0:
+            assert cl.cell[i] == c
+            assert cell_index(cl.ncell, sim.length, *atom.r[i]) == c
+            i=cl.nxt[i]
+    assert all(cl.cell[cl.head[cl.cell[i]]] == cl.cell[i] 
+               for i in range(sim.N))
+
+# This function tests the running totals after 20 sweeps with and without
+# the cell list.
+def test_running_totals_do_not_drift(makesim):
+    for neighbor in ("allpairs", "cell"):
+        sim, atom, cl, rng, iprop, aprop, blk = setup(makesim, lines, 
+                                                      neighbor)
+        assert (cl.ncell >= 3) == (neighbor == "cell")
+        sweeps(sim, atom, cl, rng, iprop, aprop, blk, 1, 20, 1)
+        assert aprop.naccept > 0
+        pe, virial = forces_allpairs(sim, atom)
+        assert abs(iprop.pe - pe)/sim.N < 1e-10
+        assert abs(iprop.virial - virial)/sim.N < 1e-10
+        if cl.ncell: check_cells(sim, atom, cl)
+
+# This function tests 40 volume moves of NPT MC. The box is just wide 
+# enough for 4 cells per side and the pressure compresses it, so the moves
+# also take the box to 3 cells per side. An accepted move must leave the 
+# energy and virial of the whole system at the new volume, and a rejected 
+# move must leave the old state, but for the rounding of scaling the 
+# positions back.
+def test_volume_move_energy(makesim):
+    nptlines=[x for x in lines if not x.startswith("rcut")] + \
+             ["rcut 2.05", "npt 8.0 0.1"]
+    sim, atom, cl, rng, iprop, aprop, blk = setup(makesim, nptlines, "cell")
+    assert cl.ncell == 4
+    seen={4}
+    naccept=0
+    for k in range(40):
+        r=atom.r.copy()
+        length=sim.length
+        pe=iprop.pe
+        if volume(sim, atom, cl, rng, iprop):
+            naccept+=1
+            pe, virial = forces_allpairs(sim, atom)
+            assert abs(iprop.pe - pe)/sim.N < 1e-12
+            assert abs(iprop.virial - virial)/sim.N < 1e-12
+            assert np.isclose(sim.rho, sim.N/sim.length**3, rtol=1e-12)
+            assert np.isclose(sim.utail, lj_tails(sim.rho, sim.rc)[0], 
+                              rtol=1e-12)
+            assert sim.ncell == cells_per_side(sim.length, sim.rc)
+            assert cl.ncell == (sim.ncell if sim.ncell >= 3 else 0)
+            check_cells(sim, atom, cl)
+            seen.add(sim.ncell)
+        else:
+            assert np.allclose(atom.r, r, rtol=0.0, atol=1e-12)
+            assert sim.length == length and iprop.pe == pe
+    assert 0 < naccept < 40
+    assert seen == {3, 4}
@@ -0,0 +1,108 @@
+# test_potential is part of ljpy for Lennard Jones simulations.             #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_potential.py                                                       	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests the table of the pair potential 
+(src/potential.py) at its default size against the energy and force 
+divided by r of the lj, lj-sf, and mie potentials written out here, and 
+the direct calculation of the Lennard Jones potential without a table. The
+table interpolates linearly in s = r^2, so between two points of spacing h 
+it is off by at most h^2/8 times the largest second derivative in s.
+"""
+
+# Import relevant libraries
+import numpy as np
+import pytest
+from src.potential import pair_potential, tabr2min
+
+# This function is passed a list of (coefficient, power) terms of a 
+# function of s and an array of s. It returns the function at s and an 
+# upper bound of the absolute value of its second derivative at and above s.
+def evaluate(terms, s):
+    f=sum(c*s**p for c, p in terms)
+    d2=sum(abs(c*p*(p-1.0))*s**(p-2.0) for c, p in terms)
+    return(f, d2)
+
+# This function is passed the exponents n and m and the cutoff radius of a
+# Mie potential and whether it is shifted. It returns the terms in s of the
+# energy and of the force divided by r.
+def terms(n, m, rc, shifted):
+    C=n/(n-m)*(n/m)**(m/(n-m))
+    u=[(C, -n/2.0), (-C, -m/2.0)]
+    fr=[(C*n, -n/2.0-1.0), (-C*m, -m/2.0-1.0)]
+    if shifted:
+        uc=C*(rc**(-n) - rc**(-m))
+        fc=C*(n*rc**(-n) - m*rc**(-m))/rc
+        u+=[(-uc - rc*fc, 0.0), (fc, 0.5)]
+        fr+=[(-fc, -0.5)]
+    return(u, fr)
+
+# Lines of the input file of a small system
+lines=["sim mc", "N 108", "temp 1.0", "rho 0.8", "esteps 0", "psteps 0",
+       "rcut 2.5", "dt 0.1", "coord generate"]
+
+# The potentials, their extra input lines, and the exponents
+cases={"lj":    (["table 100000"], 12.0, 6.0, False),
+       "lj-sf": (["potential lj-sf"], 12.0, 6.0, True),
+       "mie":   (["potential mie 10 6"], 10.0, 6.0, False)}
+
+# This function tests the table of each potential at its points and at 
+# random distances from r = 0.8 to the cutoff.
+@pytest.mark.parametrize("name", list(cases))
+def test_table(makesim, name):
+    extra, n, m, shifted = cases[name]
+    sim, atom = makesim(lines + extra)
+    assert sim.table == 100000
+    h=(sim.rc2 - tabr2min)/(sim.table - 1)
+    uterms, frterms = terms(n, m, sim.rc, shifted)
+    s=tabr2min + h*np.arange(sim.table)
+    assert np.allclose(sim.tab[:,0], evaluate(uterms, s)[0], rtol=1e-12, 
+                       atol=1e-12)
+    assert np.allclose(sim.tab[:,1], evaluate(frterms, s)[0], rtol=1e-12,
+                       atol=1e-12)
+    gen=np.random.default_rng(2)
+    s=np.concatenate((gen.uniform(0.64, sim.rc2, 20000), [sim.rc2*(1-1e-15)]))
+    left=tabr2min + h*np.floor((s - tabr2min)/h)
+    for k, column in enumerate((uterms, frterms)):
+        exact=evaluate(column, s)[0]
+        bound=h*h/8.0*evaluate(column, left)[1]
+        table=np.array([pair_potential(sim, sim.tab, x)[k] for x in s])
+        assert np.all(np.abs(table - exact) <= bound + 1e-12*np.abs(exact))
+    if shifted:
+        assert abs(pair_potential(sim, sim.tab, s[-1])[0]) < 1e-12
+        assert abs(pair_potential(sim, sim.tab, s[-1])[1]) < 1e-12
+
+# This function tests the direct calculation of the Lennard Jones potential.
+def test_direct(makesim):
+    sim, atom = makesim(lines)
+    assert sim.table == 0
+    uterms, frterms = terms(12.0, 6.0, sim.rc, False)
+    for x in np.linspace(0.64, sim.rc2, 1001):
+        u, fr = pair_potential(sim, sim.tab, x)
+        assert np.isclose(u, evaluate(uterms, x)[0], rtol=1e-12, atol=1e-14)
+        assert np.isclose(fr, evaluate(frterms, x)[0], rtol=1e-12, atol=1e-14)
@@ -0,0 +1,89 @@
+# test_prop_output is part of ljpy for Lennard Jones simulations.           #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_prop_output.py                                                     	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests the .npy file of the instantaneous 
+properties (keyword timeseries) written by src/prop_output.py: the rows 
+read back with numpy.load, while the file is written and after it is 
+closed, and a restarted simulation that cuts the file and continues it.
+"""
+
+# Import relevant libraries
+from types import SimpleNamespace
+import numpy as np
+from src.prop_output import propwriter, nseries
+
+# This function is passed the temporary folder of a test. It returns the 
+# parts of a simulation object of MC that the writer uses.
+def mcsim(folder):
+    return(SimpleNamespace(method="mc", npt=False, 
+                           outputfile=str(folder / "run.output"),
+                           seriesfile=str(folder / "run.npy")))
+
+# This function is passed the first and last step. It returns the values of
+# the columns of the rows of those steps.
+def values(first, last):
+    step=np.arange(first, last+1)
+    return(np.stack([1.0 + 0.5*step, 1.0/step, -np.sqrt(step)], axis=1))
+
+# This function tests rows that fill the buffer of the .npy file more than 
+# once. The rows written so far are read while the file is still open.
+def test_round_trip(tmp_path):
+    sim=mcsim(tmp_path)
+    out=propwriter(sim)
+    n=nseries + 100
+    x=values(1, n)
+    for step in range(1, n+1): out.row(step > 50, step, *x[step-1])
+    assert out.flush() == n
+    assert np.load(sim.seriesfile).shape == (n,)
+    out.row(1, n+1, *values(n+1, n+1)[0])
+    out.close()
+    a=np.load(sim.seriesfile)
+    assert a.shape == (n+1,)
+    assert a.dtype.names == ("stage", "step", "P", "Pave", "PE")
+    assert np.array_equal(a["step"], np.arange(1, n+2))
+    assert np.array_equal(a["stage"], np.arange(1, n+2) > 50)
+    for k, name in enumerate(("P", "Pave", "PE")):
+        assert np.array_equal(a[name], values(1, n+1)[:,k])
+    assert len(open(sim.outputfile).readlines()) == n+1
+
+# This function tests a restarted simulation, which keeps the rows up to 
+# its checkpoint and adds the rest after them.
+def test_restart_continues(tmp_path):
+    sim=mcsim(tmp_path)
+    out=propwriter(sim)
+    x=values(1, 100)
+    for step in range(1, 101): out.row(1, step, *x[step-1])
+    out.close()
+    out=propwriter(sim, keep=60)
+    for step in range(61, 121): out.row(1, step, *values(step, step)[0])
+    out.close()
+    a=np.load(sim.seriesfile)
+    assert a.shape == (120,)
+    assert np.array_equal(a["step"], np.arange(1, 121))
+    assert np.array_equal(a["PE"], values(1, 120)[:,2])
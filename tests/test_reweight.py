@@ -0,0 +1,104 @@
+# test_reweight is part of ljpy for Lennard Jones simulations.              #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_reweight.py                                                        	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests histogram reweighting (src/reweight.py)
+on energies drawn from a Gaussian density of states, ln g(U) = -U^2/(2s^2),
+for which everything is known: at inverse temperature b the energies are 
+normal with mean -b s^2 and variance s^2, and the free energy is 
+f(b) = -b^2 s^2/2 up to a constant. The free energies found by Newton's 
+method must match those of the simple iteration of the equations of 
+Ferrenberg and Swendsen, and the samples of two temperatures must predict 
+the averages at a third.
+"""
+
+# Import relevant libraries
+import numpy as np
+from src.reweight import freeenergies, logsumexp, reweightreport
+
+# Width of the density of states, temperatures of the simulations, and 
+# number of samples of each
+s=10.0
+temps=np.array([1.0, 1.2])
+nsample=20000
+
+# This function is passed a random number generator. It returns the 
+# energies of the samples of all the simulations.
+def energies(gen):
+    return(np.concatenate([gen.normal(-s*s/T, s, nsample) for T in temps]))
+
+# This function is passed the energies of the samples, the inverse 
+# temperatures, and the number of samples of each simulation. It returns 
+# the free energies found by iterating the equations of Ferrenberg and 
+# Swendsen until they change by less than 1e-12.
+def iterated(U, beta, n):
+    f=np.zeros(len(beta))
+    for it in range(100000):
+        lnden=logsumexp((np.log(n) + f)[None,:] - np.outer(U, beta))
+        new=-logsumexp(-np.outer(beta, U) - lnden[None,:])
+        new-=new[0]
+        if np.all(np.abs(new - f) < 1e-12): return(new)
+        f=new
+    raise RuntimeError("The iteration did not converge.")
+
+# This function tests the free energies of Newton's method against the 
+# simple iteration and against the exact free energies.
+def test_newton_matches_iteration():
+    U=energies(np.random.default_rng(11))
+    beta=1.0/temps
+    n=np.full(len(temps), float(nsample))
+    f, lnden = freeenergies(U, np.zeros(len(U)), beta, n, 
+                            np.zeros(len(temps)))
+    assert f[0] == 0.0
+    assert np.allclose(f, iterated(U, beta, n), rtol=0.0, atol=1e-6)
+    exact=-(beta*beta - beta[0]*beta[0])*s*s/2.0
+    assert np.allclose(f, exact, rtol=0.0, atol=0.1)
+
+# This function tests the report of the averages predicted between the two
+# temperatures of the simulations. The energies are taken as those of 100 
+# particles without tail corrections.
+def test_prediction_between_temperatures(tmp_path):
+    U=energies(np.random.default_rng(12))
+    files=[]
+    for k, T in enumerate(temps):
+        name=str(tmp_path / "run{}.npz".format(k))
+        np.savez(name, T=T, N=100, rho=0.5, length=np.cbrt(200.0), utail=0.0,
+                 ptail=0.0, potential="lj", pe=U[k*nsample:(k+1)*nsample],
+                 virial=np.zeros(nsample))
+        files.append(name)
+    report=str(tmp_path / "report")
+    reweightreport(1.0, 1.2, 3, report, files)
+    lines=open(report).read().split("\n")
+    start=[k for k, line in enumerate(lines) if "Eff. Samples" in line][0]
+    rows=np.array([[float(x) for x in line.split()] 
+                   for line in lines[start+1:start+4]])
+    assert np.allclose(rows[:,0], [1.0, 1.1, 1.2])
+    assert np.allclose(rows[:,1], -s*s/rows[:,0]/100, rtol=0.0, atol=0.003)
+    assert np.allclose(rows[:,3], s*s/rows[:,0]**2/100 + 1.5, rtol=0.0,
+                       atol=0.05)
+    assert rows[1,4] > 0.5*nsample
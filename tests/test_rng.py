@@ -0,0 +1,72 @@
+# test_rng is part of ljpy for Lennard Jones simulations.                   #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_rng.py                                                             	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests the random number generator of 
+src/rng.py against the known-answer vectors of Philox4x32-10 published with
+the Random123 library (Salmon et al., SC11, 2011), and checks that a stream
+gives the same numbers however its buffer is filled.
+"""
+
+# Import relevant libraries
+import numpy as np
+from src.rng import philox, uniforms, stream, draws
+
+# Counters, keys, and the random words of Philox4x32-10 from the file 
+# kat_vectors of Random123
+mask=0xFFFFFFFF
+kat=[((0, 0, 0, 0), (0, 0), 
+      (0x6627e8d5, 0xe169c58d, 0xbc57ac4c, 0x9b00dbd8)),
+     ((mask, mask, mask, mask), (mask, mask), 
+      (0x408f276d, 0x41c83b0e, 0xa20bc7c6, 0x6d5451fd)),
+     ((0x243f6a88, 0x85a308d3, 0x13198a2e, 0x03707344), 
+      (0xa4093822, 0x299f31d0),
+      (0xd16cfe09, 0x94fdcceb, 0x5001e420, 0x24126ea1))]
+
+# This function tests the random words of the known counters and keys.
+def test_philox_known_answers():
+    for c, k, x in kat:
+        assert tuple(philox(*c, *k)) == x
+
+# This function tests that the uniform numbers are made from the high bits
+# of the words and lie on [0,1).
+def test_uniforms_from_words():
+    for c, k, x in kat:
+        u0, u1 = uniforms(*c, *k)
+        assert u0 == ((x[0] >> 5)*67108864.0 + (x[1] >> 6))/2.0**53
+        assert u1 == ((x[2] >> 5)*67108864.0 + (x[3] >> 6))/2.0**53
+        assert 0.0 <= u0 < 1.0 and 0.0 <= u1 < 1.0
+
+# This function tests that the numbers of a stream do not depend on the 
+# size of its buffer, so they only depend on the seed and the stream.
+def test_stream_independent_of_buffer():
+    a=draws(stream(-123, 0, 7), 100)
+    b=draws(stream(-123, 0, 64), 100)
+    c=draws(stream(-123, 1, 64), 100)
+    assert np.array_equal(a, b)
+    assert not np.array_equal(a, c)
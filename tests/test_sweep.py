@@ -0,0 +1,71 @@
+# test_sweep is part of ljpy for Lennard Jones simulations.                 #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_sweep.py                                                           	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests how the manifest of a sweep 
+(src/sweep.py) is read, including keywords that take several values.
+"""
+
+# Import relevant libraries
+from src.sweep import readmanifest, pointinput
+
+# This function is passed the directory of the test and the lines of a 
+# manifest. It returns the workers and points read from the manifest.
+def manifest(folder, lines):
+    path=folder / "manifest"
+    path.write_text("\n".join(lines) + "\n")
+    return(readmanifest(str(path)))
+
+def test_single_values(tmp_path):
+    workers, points = manifest(tmp_path, ["workers 3", 
+                                          "temp range 0.8 1.0 0.1",
+                                          "rho 0.7 0.8 # two densities",
+                                          "point N 500 esteps 2000"])
+    assert workers == 3
+    assert len(points) == 6
+    assert points[0] == [("temp", "0.8"), ("rho", "0.7"), ("N", "500"), 
+                         ("esteps", "2000")]
+    assert {p[0][1] for p in points} == {"0.8", "0.9", "1"}
+
+def test_multi_value_keywords(tmp_path):
+    workers, points = manifest(tmp_path, 
+                               ["npt 0.5 0.05 | 1.0 0.05|2.0   0.05",
+                                "point N 864; neighbor verlet 0.3",
+                                "point N 500; tempering 3 1.0 1.2"])
+    assert workers == 0
+    assert len(points) == 6
+    assert points[0] == [("npt", "0.5 0.05"), ("N", "864"), 
+                         ("neighbor", "verlet 0.3")]
+    assert points[5] == [("npt", "2.0 0.05"), ("N", "500"), 
+                         ("tempering", "3 1.0 1.2")]
+
+def test_point_input():
+    base=["N 108\n", "npt 1.0 0.01\n", "temp 1.0 # reduced\n", "rdf 100\n"]
+    text=pointinput(base, [("npt", "2.0 0.05"), ("neighbor", "verlet 0.3")])
+    assert text.splitlines() == ["N 108", "temp 1.0 # reduced", "rdf 100",
+                                 "npt 2.0 0.05", "neighbor verlet 0.3"]
@@ -0,0 +1,95 @@
+# test_tempering is part of ljpy for Lennard Jones simulations.             #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_tempering.py                                                       	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests parallel tempering (keyword 
+tempering, src/tempering.py) with a ladder of three temperatures: the swaps
+are accepted with the energies the replicas have at the time of the swap,
+every temperature is held by exactly one replica after every swap, and the
+averages of each temperature agree with those of a simulation at that 
+temperature alone.
+"""
+
+# Import relevant libraries
+import numpy as np
+from src.tempering import tryswaps
+from src.rng import stream, iswap, draw
+from conftest import runljpy, reported
+
+# This function tests 2000 rounds of swaps. Before each round the replicas
+# get new energies. The acceptance of each pair is found again from the 
+# energies of its replicas with a second stream that draws the same numbers
+# as the one passed to tryswaps.
+def test_swaps():
+    ladder=np.array([1.0, 1.2, 1.5])
+    gen=np.random.default_rng(4)
+    rng=stream(-1, iswap, 64)
+    twin=stream(-1, iswap, 64)
+    assign=[2, 0, 1]
+    pe=np.zeros(3)
+    naccept=0
+    for n in range(2000):
+        energy=gen.normal(-500.0, 10.0, 3)
+        pe[:]=energy[assign]
+        before=list(assign)
+        tried=tryswaps(ladder, assign, pe, n%2, rng)
+        assert [t for t, accept in tried] == [n%2]
+        t, accept = tried[0]
+        x=(1.0/ladder[t] - 1.0/ladder[t+1])*(energy[before[t]] - 
+                                             energy[before[t+1]])
+        assert accept == (x >= 0.0 or draw(twin) < np.exp(x))
+        if accept: before[t], before[t+1] = before[t+1], before[t]
+        assert assign == before
+        assert sorted(assign) == [0, 1, 2]
+        assert np.array_equal(pe, energy[assign])
+        naccept+=accept
+    assert 200 < naccept < 1800
+
+# This function is passed the text of the output file of parallel 
+# tempering. It returns the rows of its table of averages.
+def table(text):
+    lines=text[text.index("***Parallel Tempering Averages***"):].split("\n")
+    return(np.array([[float(x) for x in line.split()[:6]] 
+                     for line in lines[3:6]]))
+
+# This function tests the averages of each temperature of the ladder 
+# against a simulation at that temperature.
+def test_rows_match_single_temperatures(tmp_path):
+    run=["sim mc", "N 108", "rho 0.7", "rcut 2.5", "coord generate", 
+         "dt 0.1", "esteps 200", "psteps 4000", "output 1000"]
+    temps=(1.2, 1.5, 2.0)
+    rows=table(runljpy(tmp_path, "pt", run + ["temp 1.2", "seed -17",
+                                              "tempering 10 1.2 1.5 2.0"]))
+    assert np.allclose(rows[:,0], temps)
+    for k, T in enumerate(temps):
+        text=runljpy(tmp_path, "T{}".format(k), run + ["temp {}".format(T),
+                                                       "seed -{}".format(k+1)])
+        pe, err, tau = reported(text, "Potential Energy:")
+        P, Perr, tau = reported(text, "Pressure:")
+        assert abs(rows[k,2] - pe) < 4.0*err
+        assert abs(rows[k,1] - P) < 4.0*Perr
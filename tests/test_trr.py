@@ -0,0 +1,130 @@
+# test_trr is part of ljpy for Lennard Jones simulations.                   #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_trr.py                                                             	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests the .trr movie file written by 
+src/trr.py by reading the frames back word by word in the layout of the 
+GROMACS trajectory format: the magic number and version string, the sizes
+of the blocks in the header, the box, and the position, velocity, and 
+(absent) force blocks.
+"""
+
+# Import relevant libraries
+import struct
+from types import SimpleNamespace
+import numpy as np
+from src.trr import trrwriter
+
+# This function is passed the bytes of a .trr file and the offset of a 
+# frame. It returns the header of the frame as a dictionary, the box, the
+# positions, the velocities, and the offset of the next frame.
+def readframe(data, pos):
+    h={}
+    h["magic"], slen, vlen = struct.unpack_from(">iii", data, pos)
+    assert (slen, vlen) == (13, 12)
+    h["version"]=data[pos+12:pos+24]
+    names=("ir_size", "e_size", "box_size", "vir_size", "pres_size",
+           "top_size", "sym_size", "x_size", "v_size", "f_size", "natoms",
+           "step", "nre")
+    h.update(zip(names, struct.unpack_from(">13i", data, pos+24)))
+    h["t"], h["lambda"] = struct.unpack_from(">ff", data, pos+76)
+    pos+=84
+    box=np.frombuffer(data, ">f4", 9, pos).reshape(3, 3)
+    pos+=h["box_size"]
+    N=h["natoms"]
+    x=np.frombuffer(data, ">f4", h["x_size"]//4, pos).reshape(N, 3)
+    pos+=h["x_size"]
+    v=np.frombuffer(data, ">f4", h["v_size"]//4, pos).reshape(-1, 3)
+    pos+=h["v_size"] + h["f_size"]
+    return(h, box, x, v, pos)
+
+# This function is passed the temporary folder of a test, the number of 
+# sites, whether the simulation is MD, and whether it is NPT. It returns the 
+# parts of a simulation object and a particles object that the writer uses.
+def system(folder, N, md, npt):
+    sim=SimpleNamespace(N=N, length=5.0, npt=npt, 
+                        moviefile=str(folder / "run.trr"))
+    atom=SimpleNamespace(r=np.zeros((N, 3)), v=np.zeros((N if md else 0, 3)))
+    return(sim, atom)
+
+# This function tests two frames of MD, which have velocities.
+def test_md_frames(tmp_path):
+    sim, atom = system(tmp_path, 4, True, False)
+    gen=np.random.default_rng(3)
+    movie=trrwriter(sim, atom)
+    frames=[]
+    for step in (10, 20):
+        atom.r[:,:]=gen.uniform(0.0, sim.length, (4, 3))
+        atom.v[:,:]=gen.normal(0.0, 1.0, (4, 3))
+        movie.frame(step, 0.005*step, atom)
+        frames.append((atom.r.copy(), atom.v.copy()))
+    movie.close()
+    data=open(sim.moviefile, "rb").read()
+    assert len(data) == 2*4*(21 + 9 + 2*3*4)
+    pos=0
+    for step, (r, v) in zip((10, 20), frames):
+        h, box, x, vel, pos = readframe(data, pos)
+        assert h["magic"] == 1993 and h["version"] == b"GMX_trn_file"
+        assert (h["box_size"], h["x_size"], h["v_size"], h["f_size"]) == \
+               (36, 48, 48, 0)
+        for name in ("ir_size", "e_size", "vir_size", "pres_size", 
+                     "top_size", "sym_size", "nre"):
+            assert h[name] == 0
+        assert h["natoms"] == 4 and h["step"] == step
+        assert h["t"] == np.float32(0.005*step) and h["lambda"] == 0.0
+        assert np.array_equal(box, np.diag([np.float32(5.0)]*3))
+        assert np.array_equal(x, r.astype(np.float32))
+        assert np.array_equal(vel, v.astype(np.float32))
+    assert pos == len(data)
+
+# This function tests frames of NPT MC, which have no velocities and whose
+# box follows the volume, and a restart that keeps the first frame.
+def test_npt_frames_and_restart(tmp_path):
+    sim, atom = system(tmp_path, 3, False, True)
+    movie=trrwriter(sim, atom)
+    for step in (1, 2):
+        sim.length=5.0 + step
+        atom.r[:,:]=step
+        movie.frame(step, step, atom)
+    size=movie.flush()//2
+    movie.close()
+    movie=trrwriter(sim, atom, keep=size)
+    sim.length=9.0
+    atom.r[:,:]=7.0
+    movie.frame(7, 7, atom)
+    movie.close()
+    data=open(sim.moviefile, "rb").read()
+    assert len(data) == 2*size
+    pos=0
+    for step, length in ((1, 6.0), (7, 9.0)):
+        h, box, x, vel, pos = readframe(data, pos)
+        assert (h["x_size"], h["v_size"], h["f_size"]) == (36, 0, 0)
+        assert h["step"] == step and vel.size == 0
+        assert np.array_equal(box, np.diag([np.float32(length)]*3))
+        assert np.all(x == step)
+    assert pos == len(data)
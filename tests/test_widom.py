@@ -0,0 +1,69 @@
+# test_widom is part of ljpy for Lennard Jones simulations.                 #
+# Copyright (C) 2021 Thomas Allen Knotts IV - All Rights Reserved          	#
+#																		   	#
+# This program is free software: you can redistribute it and/or modify      #
+# it under the terms of the GNU General Public License as published by      #
+# the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                       #
+#                                                                          	#
+# This program is distributed in the hope that it will be useful,   	 	#
+# but WITHOUT ANY WARRANTY; without even the implied warranty of           	#
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            	#
+# GNU General Public License for more details.                             	#
+#                                                                          	#
+# You should have received a copy of the GNU General Public License        	#
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.   	#
+
+# ========================================================================= #
+# test_widom.py                                                           	#
+#                                                                          	#
+# Thomas A. Knotts IV                                                      	#
+# Brigham Young University                                                 	#
+# Department of Chemical Engineering                                       	#
+# Provo, UT  84606                                                         	#
+# Email: thomas.knotts@byu.edu                                             	#
+# ========================================================================= #
+# Version 1.0 - February 2021                                              	#
+# ========================================================================= #
+
+"""
+This module is part of ljpy. It tests the excess chemical potential of the
+Widom insertions (src/widom.py) of MC and MD against that of a dilute 
+Lennard Jones gas, which the second virial coefficient gives, and checks
+that the reported correlation time is not negative.
+"""
+
+# Import relevant libraries
+import numpy as np
+import pytest
+from conftest import runljpy, reported
+
+# Density of the gas and the lines of the input files. The cutoff is long
+# enough that the tail correction of the ghost is nearly exact.
+rho=0.02
+common=["N 200", "temp 1.5", "rho %g" % rho, "rcut 4.0", "coord generate",
+        "output 1000", "seed -9", "neighbor cell"]
+mclines=["sim mc", "esteps 200", "psteps 2000", "dt 1.0", "widom 1 200"]
+mdlines=["sim md", "esteps 2000", "psteps 20000", "dt 0.005", 
+         "widom 20 200"]
+
+# This function is passed a temperature. It returns the excess chemical 
+# potential of the Lennard Jones gas at the density to first order in the 
+# density, mu = 2 B2 rho T, with B2 integrated on a fine grid. Below r=0.5
+# the Boltzmann factor is zero.
+def virial_mu(T):
+    r=np.linspace(0.5, 60.0, 2000001)
+    f=np.exp(-4.0*(r**-12 - r**-6)/T) - 1.0
+    B2=-2.0*np.pi*(np.trapezoid(f*r*r, r) - 0.5**3/3.0)
+    return(2.0*B2*rho*T)
+
+# This function tests the chemical potential of MC and MD. MD runs at 
+# constant energy, so it is compared at its average temperature. The next
+# virial term adds about 0.002 at this density.
+@pytest.mark.parametrize("lines", [mclines, mdlines], ids=["mc", "md"])
+def test_dilute_gas(tmp_path, lines):
+    text=runljpy(tmp_path, "widom", lines + common)
+    mu, err, tau = reported(text, "Excess Chem. Potential:")
+    T=reported(text, "Temperature:")[0]
+    assert err > 0.0 and tau >= 0.0
+    assert abs(mu - virial_mu(T)) < 3.0*err + 0.002